@@ -0,0 +1,140 @@
+"""Admission control: per-route concurrency limits, bounded waiting, and a circuit breaker.
+
+Each limited group of routes has a RouteLimiter. At most `max_concurrent` requests run at
+once and at most `max_queue` more wait for a slot. A waiter gives up after `queue_timeout`
+seconds. A request that finds the queue full, or whose wait runs out, gets a fast 503 with
+Retry-After instead of joining the pile, so the requests that are admitted keep a bounded
+latency when traffic spikes.
+
+The CircuitBreaker wraps calls to the Rust engine. After `failure_threshold` consecutive
+failures it opens, and calls fail immediately for `reset_seconds`. Then one trial call goes
+through: if it succeeds the breaker closes, if it fails the breaker opens again.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RouteLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._service_seconds = 0.05  # EWMA of time holding a slot, for Retry-After
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def retry_after(self) -> float:
+        # Time for the work already ahead of a new request to drain
+        return self._service_seconds * (self.running + len(self._waiters)) / self.max_concurrent
+
+    async def acquire(self):
+        if self.running < self.max_concurrent and not self._waiters:
+            self.running += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(f"{self.name}: queue full", self.retry_after())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot straight to the waiter, so `running` already counts it
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # A slot handed over as the wait ran out is passed on rather than leaked
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            self.timed_out += 1
+            raise Overloaded(f"{self.name}: no slot within {self.queue_timeout:g}s", self.retry_after())
+        except asyncio.CancelledError:
+            # The client went away; a slot handed over in the same tick goes to the next waiter
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, held_seconds: float):
+        self._service_seconds += 0.1 * (held_seconds - self._service_seconds)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.admitted += 1
+                return
+        self.running -= 1
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "service_ms": round(self._service_seconds * 1000, 2),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 10.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"  # "closed", "open" or "half_open"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.short_circuited = 0
+
+    def before_call(self):
+        """Raise Overloaded when the call should not be attempted."""
+        if self.state == "closed":
+            return
+        remaining = self._opened_at + self.reset_seconds - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._trial_running:
+            self._trial_running = True  # this caller is the trial
+            return
+        self.short_circuited += 1
+        raise Overloaded(f"{self.name}: circuit open", max(remaining, 1.0))
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+        self._trial_running = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures,
+                "short_circuited": self.short_circuited}
@@ -0,0 +1,143 @@
+"""In-process reference for the Rust engine's batched analytics call (POST /analytics).
+
+A request carries several named series and several operations over them, so a dashboard makes
+one round trip instead of one per number:
+
+    {"series": {"amounts": [...]}, "keys": {"category": [...]},
+     "operations": [{"id": "p", "op": "percentiles", "series": "amounts", "q": [0.5, 0.9]},
+                    {"id": "h", "op": "histogram", "series": "amounts", "bins": 20},
+                    {"id": "c", "op": "bucket_sum", "series": "amounts", "by": "category"}]}
+
+Each result has the operation's `id`, its `value` or an `error`, and the microseconds it took.
+The semantics match apps/rust-engine/src/main.rs exactly, down to summing left to right, so the
+two give the same floats and `run` is what the engine's results are checked against. Change one,
+change the other.
+
+Operations: sum, count, mean, min, max, std (population), percentiles (linear interpolation
+between closest ranks, `q` fractions in [0, 1]), histogram (`bins`, default 10, at most
+MAX_BINS, over `range` or the data's min..max, last bin closed on the right, values outside
+skipped) and bucket_sum (count and sum per key of the `by` keys series, in key order). mean, min, max and std of an
+empty series are null.
+"""
+import math
+import time
+
+# Upper bound on histogram bins; the edges and counts are allocated before any value is read
+MAX_BINS = 10_000
+
+
+def _total(values: list[float]) -> float:
+    # Left to right like the engine's fold; sum() may round differently
+    total = 0.0
+    for x in values:
+        total += x
+    return total
+
+
+def _mean(values: list[float]) -> float | None:
+    return _total(values) / len(values) if values else None
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    position = q * (len(ordered) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _histogram(values: list[float], bins: int, range_: list[float] | None) -> dict:
+    if not 1 <= bins <= MAX_BINS:
+        raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+    if range_ is not None:
+        lower, upper = range_
+    elif not values:
+        lower, upper = 0.0, 1.0
+    else:
+        lower, upper = min(values), max(values)
+    if upper < lower:
+        raise ValueError("range must be [low, high]")
+    if lower == upper:
+        lower, upper = lower - 0.5, upper + 0.5
+    width = (upper - lower) / bins
+    edges = [lower + i * width for i in range(bins)] + [upper]
+    counts = [0] * bins
+    for x in values:
+        if not (lower <= x <= upper):
+            continue  # outside the range, or NaN
+        counts[min(math.floor((x - lower) / (upper - lower) * bins), bins - 1)] += 1
+    return {"edges": edges, "counts": counts}
+
+
+def _run_operation(operation: dict, series: dict, keys: dict, sorted_cache: dict):
+    name = operation["series"]
+    if name not in series:
+        raise ValueError(f"unknown series '{name}'")
+    values = series[name]
+    op = operation["op"]
+    if op == "sum":
+        return _total(values)
+    if op == "count":
+        return len(values)
+    if op == "mean":
+        return _mean(values)
+    if op == "min":
+        return min(values) if values else None
+    if op == "max":
+        return max(values) if values else None
+    if op == "std":
+        m = _mean(values)
+        if m is None:
+            return None
+        squares = 0.0
+        for x in values:
+            squares += (x - m) * (x - m)
+        return math.sqrt(squares / len(values))
+    if op == "percentiles":
+        q = operation.get("q") or []
+        if not q or any(not (0.0 <= f <= 1.0) for f in q):
+            raise ValueError("q must be a non-empty list of fractions in [0, 1]")
+        if not values:
+            return [None] * len(q)
+        # Sorted once per series and shared by every percentile operation on it
+        if name not in sorted_cache:
+            sorted_cache[name] = sorted(values)
+        return [_percentile(sorted_cache[name], f) for f in q]
+    if op == "histogram":
+        bins = operation.get("bins")
+        return _histogram(values, 10 if bins is None else bins, operation.get("range"))
+    if op == "bucket_sum":
+        by = operation.get("by")
+        if by is None:
+            raise ValueError("bucket_sum needs 'by', a keys series")
+        if by not in keys:
+            raise ValueError(f"unknown keys '{by}'")
+        if len(keys[by]) != len(values):
+            raise ValueError(f"keys '{by}' and series '{name}' differ in length")
+        buckets: dict[str, list] = {}
+        for key, x in zip(keys[by], values):
+            bucket = buckets.setdefault(key, [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += x
+        return [{"key": key, "count": buckets[key][0], "sum": buckets[key][1]} for key in sorted(buckets)]
+    raise ValueError(f"unknown operation '{op}'")
+
+
+def run(request: dict) -> dict:
+    """Run every operation in `request`; one bad operation reports its own error, the rest still run."""
+    started = time.perf_counter()
+    series, keys = request.get("series") or {}, request.get("keys") or {}
+    sorted_cache: dict[str, list[float]] = {}
+    results = []
+    for operation in request["operations"]:
+        operation_started = time.perf_counter()
+        try:
+            value, error = _run_operation(operation, series, keys, sorted_cache), None
+        except ValueError as exc:
+            value, error = None, str(exc)
+        results.append({
+            "id": operation["id"],
+            "op": operation["op"],
+            "value": value,
+            "error": error,
+            "elapsed_us": (time.perf_counter() - operation_started) * 1e6,
+        })
+    return {"results": results, "elapsed_us": (time.perf_counter() - started) * 1e6}
@@ -0,0 +1,350 @@
+"""Cold archive of closed months in compressed Parquet segments.
+
+Rows older than the retention window move out of the hot shard files into one Parquet segment
+per shard and month (zstd, sorted by household and date). Each shard directory keeps a
+manifest with per-segment row counts and min/max dates, ids and versions plus per-household
+row counts, so reads skip segments without opening them. Archived rows keep their ids and
+versions and are read-only; /sync serves them by version alongside the hot rows. Tombstones in an
+archived month are dropped, and a client that synced before one of them is told to resync. When
+a household moves to another shard (`python sharding.py rebalance`), its archived rows move to
+that shard's segments along with its hot rows.
+
+    python archive.py run --months 12 --vacuum
+    python archive.py status
+"""
+import argparse
+import json
+import os
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import delete, func, select, text
+
+from fx import FxRates
+from models import DEFAULT_CURRENCY, TombstonePurge, Transaction, init_schema, raise_id_floor
+from sharding import ShardRouter
+
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "./data/archive")
+ROW_GROUP_SIZE = 64 * 1024
+
+COLUMNS = ["id", "household_id", "user_id", "description", "amount", "currency", "type", "category", "date", "version"]
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("household_id", pa.string()),
+    ("user_id", pa.string()),
+    ("description", pa.string()),
+    ("amount", pa.float64()),
+    ("currency", pa.string()),  # null in segments written before amounts had a currency
+    ("type", pa.string()),
+    ("category", pa.string()),
+    ("date", pa.timestamp("us")),
+    ("version", pa.int64()),
+])
+
+
+def month_start(when: date | datetime) -> datetime:
+    return datetime(when.year, when.month, 1)
+
+
+def months_before(when: date | datetime, months: int) -> datetime:
+    index = when.year * 12 + when.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class ColdArchive:
+    def __init__(self, root: str = ARCHIVE_DIR):
+        self.root = root
+        self._manifests: dict[str, tuple[int | None, dict]] = {}
+
+    def _shard_dir(self, shard: str) -> str:
+        return os.path.join(self.root, shard)
+
+    def manifest(self, shard: str) -> dict:
+        # Archiving runs in another process (CLI or job worker), so reload whenever the file changes
+        path = os.path.join(self._shard_dir(shard), "manifest.json")
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        cached = self._manifests.get(shard)
+        if cached is None or cached[0] != mtime:
+            manifest = {"segments": {}}
+            if mtime is not None:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            cached = self._manifests[shard] = (mtime, manifest)
+        return cached[1]
+
+    def _save_manifest(self, shard: str):
+        path = os.path.join(self._shard_dir(shard), "manifest.json")
+        manifest = self.manifest(shard)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+        self._manifests[shard] = (os.stat(path).st_mtime_ns, manifest)
+
+    def horizon(self, shard: str) -> datetime | None:
+        """Start of the first month that is still entirely hot, or None when nothing is archived."""
+        segments = self.manifest(shard)["segments"]
+        if not segments:
+            return None
+        return months_before(datetime.fromisoformat(max(segments) + "-01"), -1)
+
+    def write_month(self, shard: str, month: str, table: pa.Table):
+        """Write (or extend) the segment for one month and record its metadata.
+
+        Rows already in the segment are replaced rather than added again, so a run that crashed
+        after writing the segment but before deleting the hot rows can be repeated.
+        """
+        path = os.path.join(self._shard_dir(shard), f"{month}.parquet")
+        if os.path.exists(path):
+            kept = pq.read_table(path, schema=SCHEMA)
+            kept = kept.filter(pc.invert(pc.is_in(kept["id"], value_set=table["id"].combine_chunks())))
+            table = pa.concat_tables([kept, table])
+        self._write_segment(shard, month, table)
+
+    def _write_segment(self, shard: str, month: str, table: pa.Table):
+        os.makedirs(self._shard_dir(shard), exist_ok=True)
+        path = os.path.join(self._shard_dir(shard), f"{month}.parquet")
+        # Sorting by household keeps row-group statistics tight for per-household reads
+        table = table.sort_by([("household_id", "ascending"), ("date", "ascending")])
+        pq.write_table(table, path + ".tmp", compression="zstd", row_group_size=ROW_GROUP_SIZE)
+        os.replace(path + ".tmp", path)
+
+        households = table.group_by("household_id").aggregate([("id", "count")])
+        self.manifest(shard)["segments"][month] = {
+            "file": f"{month}.parquet",
+            "rows": table.num_rows,
+            "bytes": os.path.getsize(path),
+            "min_date": pc.min(table["date"]).as_py().isoformat(),
+            "max_date": pc.max(table["date"]).as_py().isoformat(),
+            "min_id": pc.min(table["id"]).as_py(),
+            "max_id": pc.max(table["id"]).as_py(),
+            "min_version": pc.min(table["version"]).as_py(),
+            "max_version": pc.max(table["version"]).as_py(),
+            "households": dict(zip(households["household_id"].to_pylist(), households["id_count"].to_pylist())),
+        }
+        self._save_manifest(shard)
+
+    def _drop_segment(self, shard: str, month: str):
+        segment = self.manifest(shard)["segments"].pop(month)
+        self._save_manifest(shard)
+        os.remove(os.path.join(self._shard_dir(shard), segment["file"]))
+
+    def households(self, shard: str) -> set[str]:
+        return {household for segment in self.manifest(shard)["segments"].values()
+                for household in segment["households"]}
+
+    def move_household(self, source: str, destination: str, household_id: str, first_version: int,
+                       first_id: int) -> int:
+        """Re-home a household's archived rows on another shard's segments; returns rows moved.
+
+        Ids and versions belong to the shard, so the rows are renumbered from `first_id` and
+        `first_version`, which the destination set aside for them (models.move_household). The copy
+        replaces any earlier copy of the household's rows in the destination segment, so a move
+        interrupted between writing the destination and rewriting the source can be run again.
+        """
+        moved = 0
+        for month, segment in self.segments(source, household_id):
+            table = pq.read_table(os.path.join(self._shard_dir(source), segment["file"]), schema=SCHEMA)
+            theirs = pc.fill_null(pc.equal(table["household_id"], household_id), False)
+            rows = table.filter(theirs).sort_by("version")
+            for column, first in (("id", first_id), ("version", first_version)):
+                numbers = pa.array(range(first + moved, first + moved + rows.num_rows), pa.int64())
+                rows = rows.set_column(rows.column_names.index(column), column, numbers)
+            path = os.path.join(self._shard_dir(destination), f"{month}.parquet")
+            if os.path.exists(path):
+                kept = pq.read_table(path, schema=SCHEMA)
+                others = pc.invert(pc.fill_null(pc.equal(kept["household_id"], household_id), False))
+                self._write_segment(destination, month, pa.concat_tables([kept.filter(others), rows]))
+            else:
+                self._write_segment(destination, month, rows)
+            rest = table.filter(pc.invert(theirs))
+            if rest.num_rows:
+                self._write_segment(source, month, rest)
+            else:
+                self._drop_segment(source, month)
+            moved += rows.num_rows
+        return moved
+
+    def segments(self, shard: str, household_id: str | None = None, start: datetime | None = None,
+                 end: datetime | None = None) -> list[tuple[str, dict]]:
+        """Segments that can hold matching rows, oldest first; the rest are pruned unopened."""
+        found = []
+        for month, segment in sorted(self.manifest(shard)["segments"].items()):
+            if household_id is not None and household_id not in segment["households"]:
+                continue
+            if start is not None and datetime.fromisoformat(segment["max_date"]) < start:
+                continue
+            if end is not None and datetime.fromisoformat(segment["min_date"]) >= end:
+                continue
+            found.append((month, segment))
+        return found
+
+    def read(self, shard: str, household_id: str | None = None, start: datetime | None = None,
+             end: datetime | None = None, columns: list[str] | None = None, skip: int = 0,
+             limit: int | None = None, segment: dict | None = None) -> pa.Table:
+        """Archived rows for a household and date range, ordered by date."""
+        tables = []
+        for month, segment in ([(None, segment)] if segment else self.segments(shard, household_id, start, end)):
+            if start is None and end is None and household_id is not None:
+                # Whole segments before the requested page are skipped by their row counts
+                count = segment["households"][household_id]
+                if skip >= count:
+                    skip -= count
+                    continue
+            filters = []
+            if household_id is not None:
+                filters.append(("household_id", "=", household_id))
+            if start is not None:
+                filters.append(("date", ">=", start))
+            if end is not None:
+                filters.append(("date", "<", end))
+            table = pq.read_table(os.path.join(self._shard_dir(shard), segment["file"]), columns=columns,
+                                  filters=filters or None, schema=SCHEMA)
+            tables.append(table)
+            if limit is not None and sum(t.num_rows for t in tables) >= skip + limit:
+                break
+        if not tables:
+            return SCHEMA.empty_table().select(columns or COLUMNS)
+        table = pa.concat_tables(tables)
+        if limit is not None or skip:
+            table = table.slice(skip, limit)
+        return self._fill_currency(table)
+
+    def changes(self, shard: str, household_id: str, since: int, limit: int) -> pa.Table:
+        """Up to `limit` archived rows of a household with a version above `since`, lowest version first."""
+        tables = [
+            pq.read_table(os.path.join(self._shard_dir(shard), segment["file"]), schema=SCHEMA,
+                          filters=[("household_id", "=", household_id), ("version", ">", since)])
+            for month, segment in self.segments(shard, household_id) if segment["max_version"] > since
+        ]
+        if not tables:
+            return SCHEMA.empty_table()
+        return self._fill_currency(pa.concat_tables(tables).sort_by("version").slice(0, limit))
+
+    @staticmethod
+    def _fill_currency(table: pa.Table) -> pa.Table:
+        if "currency" in table.column_names and table["currency"].null_count:
+            index = table.column_names.index("currency")
+            table = table.set_column(index, "currency", pc.fill_null(table["currency"], DEFAULT_CURRENCY))
+        return table
+
+    @staticmethod
+    def _amounts_in(table: pa.Table, currency: str, fx: FxRates) -> pa.ChunkedArray:
+        """The table's amounts converted to `currency`, one column operation per source currency."""
+        if pc.all(pc.equal(table["currency"], currency)).as_py() is not False:
+            return table["amount"]
+        codes = pc.dictionary_encode(table["currency"]).combine_chunks()
+        return pa.chunked_array([fx.convert_coded(table["amount"].to_numpy(), codes.indices.to_numpy(),
+                                                  codes.dictionary.to_pylist(), table["date"].to_numpy(), currency)])
+
+    def iter_rows(self, shard: str, columns: list[str]):
+        """Every archived row as a tuple of `columns`, one segment in memory at a time."""
+        for month, segment in self.segments(shard):
+            table = pq.read_table(os.path.join(self._shard_dir(shard), segment["file"]), columns=columns)
+            yield from zip(*(table[column].to_pylist() for column in columns))
+
+    def summarize(self, shard: str, household_id: str, group_by: str, start: datetime | None = None,
+                  end: datetime | None = None, currency: str | None = None, fx: FxRates | None = None) -> dict:
+        """{group: (count, total amount)} over archived rows, reading only the needed columns.
+
+        With `currency`, amounts are converted to it with `fx` before they are added up.
+        """
+        extra = ["currency", "date"] if currency is not None else []
+        if group_by == "month":
+            # Segments are months already: one column read and one sum per segment, no grouping
+            totals = {}
+            for month, segment in self.segments(shard, household_id, start, end):
+                table = self.read(shard, household_id, start, end, columns=["amount", *extra], segment=segment)
+                if table.num_rows:
+                    amounts = self._amounts_in(table, currency, fx) if currency is not None else table["amount"]
+                    totals[month] = (table.num_rows, pc.sum(amounts).as_py())
+            return totals
+        table = self.read(shard, household_id, start, end, columns=[group_by, "amount", *extra])
+        if not table.num_rows:
+            return {}
+        if currency is not None:
+            table = table.select([group_by]).append_column("amount", self._amounts_in(table, currency, fx))
+        grouped = table.group_by(group_by).aggregate([("amount", "count"), ("amount", "sum")])
+        return dict(zip(grouped[group_by].to_pylist(),
+                        zip(grouped["amount_count"].to_pylist(), grouped["amount_sum"].to_pylist())))
+
+    def count(self, shard: str, household_id: str) -> int:
+        return sum(segment["households"].get(household_id, 0) for segment in self.manifest(shard)["segments"].values())
+
+
+def archive_shard(router: ShardRouter, archive: ColdArchive, shard: str, cutoff: datetime,
+                  vacuum: bool = False) -> int:
+    """Move live rows dated before `cutoff` (a month boundary) out of a shard; returns rows moved."""
+    moved = 0
+    with router.session_for_shard(shard) as db:
+        segments = archive.manifest(shard)["segments"]
+        if segments:
+            # Ids archived before the table kept its sequence (see models) are never handed out again
+            raise_id_floor(db, max(segment["max_id"] for segment in segments.values()))
+            db.commit()
+        oldest = db.execute(select(Transaction.date).where(Transaction.date < cutoff)
+                            .order_by(Transaction.date).limit(1)).scalar()
+        month = month_start(oldest) if oldest is not None else cutoff
+        while month < cutoff:
+            next_month = months_before(month, -1)
+            in_month = (Transaction.date >= month) & (Transaction.date < next_month)
+            rows = db.execute(
+                select(*(getattr(Transaction, c) for c in COLUMNS)).where(in_month, Transaction.deleted.is_(False))
+            ).all()
+            if rows:
+                table = pa.Table.from_pylist([dict(zip(COLUMNS, row)) for row in rows], schema=SCHEMA)
+                archive.write_month(shard, month.strftime("%Y-%m"), table)
+            # Clients that synced before a dropped tombstone never saw the delete; /sync sends them a resync
+            purged = db.execute(
+                select(Transaction.household_id, func.max(Transaction.version))
+                .where(in_month, Transaction.deleted.is_(True)).group_by(Transaction.household_id)
+            ).all()
+            for household_id, version in purged:
+                marker = db.get(TombstonePurge, household_id)
+                if marker is None:
+                    db.add(TombstonePurge(household_id=household_id, version=version))
+                elif marker.version < version:
+                    marker.version = version
+            # The segment is on disk before the hot rows (and old tombstones) go away
+            db.execute(delete(Transaction).where(in_month))
+            db.commit()
+            moved += len(rows)
+            month = next_month
+    if vacuum and moved:
+        with router.engine(shard).connect() as connection:
+            connection.execute(text("VACUUM"))
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed months into Parquet segments")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="archive every shard's rows older than the retention window")
+    run.add_argument("--months", type=int, default=12, help="months kept hot, counting the current one")
+    run.add_argument("--vacuum", action="store_true", help="shrink shard files after archiving")
+    commands.add_parser("status", help="list archived segments per shard")
+    args = parser.parse_args()
+
+    router = ShardRouter(init_schema=init_schema)
+    archive = ColdArchive()
+    if args.command == "run":
+        cutoff = months_before(date.today(), args.months - 1)
+        for shard in router.shards():
+            moved = archive_shard(router, archive, shard, cutoff, vacuum=args.vacuum)
+            print(f"{shard}: archived {moved} rows dated before {cutoff:%Y-%m-%d}")
+        return
+
+    for shard in router.shards():
+        segments = archive.manifest(shard)["segments"]
+        rows = sum(s["rows"] for s in segments.values())
+        size = sum(s["bytes"] for s in segments.values()) / 1024 / 1024
+        print(f"{shard:<32} {len(segments):>4} segments {rows:>10} rows {size:>9.1f} MB "
+              f"hot from {archive.horizon(shard) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
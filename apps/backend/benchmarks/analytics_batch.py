@@ -0,0 +1,158 @@
+"""One batched /analytics call versus one round trip per dashboard number.
+
+Builds a synthetic series of transaction amounts with a category per row and the operations a
+spending dashboard needs: total, count, mean, std, min, max, percentiles, a histogram and
+per-category totals. Sends them through the API's POST /analytics once as a single batch and
+once as one request per operation, and reports the wall time, request bytes and the time spent
+inside the engine. Every result is checked against the in-process reference in analytics.py.
+
+Without --engine-url the engine is a stand-in that answers with the reference, for trees where
+the Rust engine is not built; with it, the check compares the engine to the reference.
+
+    python benchmarks/analytics_batch.py --rows 20000 --repeat 20
+    python benchmarks/analytics_batch.py --engine-url http://127.0.0.1:8001
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+CATEGORIES = ["Groceries", "Transport", "Dining", "Utilities", "Shopping", "Health", "Travel", "Other"]
+
+
+def serve_engine(port):
+    import uvicorn
+    from fastapi import FastAPI
+
+    import analytics
+
+    engine = FastAPI()
+
+    @engine.post("/analytics")
+    async def batch(request: dict):
+        return analytics.run(request)
+
+    @engine.get("/health")
+    async def health():
+        return "ok"
+
+    uvicorn.run(engine, host="127.0.0.1", port=port, log_level="warning")
+
+
+def build_request(rows, seed):
+    rng = random.Random(seed)
+    amounts = [round(-rng.lognormvariate(3, 1), 2) for _ in range(rows)]
+    operations = [
+        {"id": "total", "op": "sum", "series": "amounts"},
+        {"id": "count", "op": "count", "series": "amounts"},
+        {"id": "mean", "op": "mean", "series": "amounts"},
+        {"id": "std", "op": "std", "series": "amounts"},
+        {"id": "largest", "op": "min", "series": "amounts"},
+        {"id": "smallest", "op": "max", "series": "amounts"},
+        {"id": "quartiles", "op": "percentiles", "series": "amounts", "q": [0.25, 0.5, 0.75]},
+        {"id": "tail", "op": "percentiles", "series": "amounts", "q": [0.01, 0.05]},
+        {"id": "histogram", "op": "histogram", "series": "amounts", "bins": 20},
+        {"id": "by_category", "op": "bucket_sum", "series": "amounts", "by": "category"},
+    ]
+    return {"series": {"amounts": amounts},
+            "keys": {"category": [rng.choice(CATEGORIES) for _ in range(rows)]},
+            "operations": operations}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve-engine":
+        serve_engine(int(sys.argv[2]))
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--engine-url", help="a running Rust engine; default is the Python stand-in")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    engine = None
+    if args.engine_url is None:
+        engine = subprocess.Popen([sys.executable, __file__, "--serve-engine", str(args.port)], cwd=BACKEND,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        args.engine_url = f"http://127.0.0.1:{args.port}"
+        for _ in range(200):
+            try:
+                httpx.get(args.engine_url + "/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+
+    request = build_request(args.rows, seed=7)
+    singles = [dict(request, operations=[operation]) for operation in request["operations"]]
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            # The app reads its storage locations and engine URL at import time
+            os.environ["SHARD_DIR"] = data_dir
+            os.environ["JOBS_DB"] = os.path.join(data_dir, "jobs.sqlite")
+            os.environ["ARCHIVE_DIR"] = os.path.join(data_dir, "archive")
+            os.environ["RUST_ENGINE_URL"] = args.engine_url
+            from fastapi.testclient import TestClient
+
+            import analytics
+            import main as app_module
+
+            expected = {r["id"]: r["value"] for r in analytics.run(request)["results"]}
+            with TestClient(app_module.app) as client:
+                def post(body):
+                    response = client.post("/analytics", json=body)
+                    response.raise_for_status()
+                    return response.json()
+
+                timings = {"batched": [], "one per operation": []}
+                engine_us = {"batched": [], "one per operation": []}
+                mismatches = set()
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    batch = post(request)
+                    timings["batched"].append(time.perf_counter() - started)
+                    engine_us["batched"].append(batch["elapsed_us"])
+
+                    started, inside, results = time.perf_counter(), 0.0, []
+                    for body in singles:
+                        single = post(body)
+                        inside += single["elapsed_us"]
+                        results.extend(single["results"])
+                    timings["one per operation"].append(time.perf_counter() - started)
+                    engine_us["one per operation"].append(inside)
+
+                    mismatches.update(r["id"] for r in batch["results"] + results
+                                      if r["error"] is not None or r["value"] != expected[r["id"]])
+            app_module.shard_router.dispose()
+    finally:
+        if engine is not None:
+            engine.terminate()
+            engine.wait()
+
+    ms = 1000
+    sizes = {"batched": len(json.dumps(request)), "one per operation": sum(len(json.dumps(b)) for b in singles)}
+    print(f"{len(request['operations'])} operations over {args.rows:,} rows, {args.repeat} repeats, "
+          f"engine {args.engine_url}")
+    print(f"{'calls':<20} {'requests':>8} {'sent MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'in engine ms':>13}")
+    for label, calls in (("batched", 1), ("one per operation", len(singles))):
+        print(f"{label:<20} {calls:>8} {sizes[label] / 1e6:>8.2f} {percentile(timings[label], 0.5) * ms:>8.1f} "
+              f"{percentile(timings[label], 0.95) * ms:>8.1f} {percentile(engine_us[label], 0.5) / 1000:>13.2f}")
+    print("results match the reference" if not mismatches else f"MISMATCH against the reference: {sorted(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Hot-file size and full-history aggregate time before and after archiving cold months.
+
+Fills one household shard with several years of synthetic transactions, times the monthly
+summary over all history with every row in SQLite, then archives everything older than the
+retention window and times the same summary over hot SQLite plus Parquet segments.
+
+    python benchmarks/archive_scan.py --rows 1000000 --years 3 --keep-months 12
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import func, select
+
+from archive import ColdArchive, archive_shard, months_before
+from models import Transaction, init_schema
+from sharding import ShardRouter
+
+HOUSEHOLD = "bench"
+
+
+def fill(path, rows, years, seed):
+    rng = random.Random(seed)
+    now = datetime(2026, 10, 15)
+    span = years * 365 * 86400
+    merchants = ["SAFEWAY", "NETFLIX.COM", "SHELL OIL", "AMAZON MKTPLACE", "RENT PAYMENT", "CHIPOTLE"]
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO transactions (household_id, user_id, description, amount, type, category, date, version, deleted)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            ((HOUSEHOLD, f"user-{i % 4}", f"{rng.choice(merchants)} #{rng.randint(100, 9999)}",
+              round(rng.lognormvariate(3, 1), 2), "expense" if rng.random() < 0.9 else "income",
+              rng.choice(["groceries", "dining", "transport", None]),
+              (now - timedelta(seconds=rng.randrange(span))).isoformat(sep=" "), i + 1)
+             for i in range(rows))
+        )
+        conn.execute("UPDATE sync_state SET version = ?", (rows,))
+
+
+def hot_summary(router, shard):
+    key = func.strftime("%Y-%m", Transaction.date)
+    with router.session_for_shard(shard) as db:
+        return {group: (count, total) for group, count, total in db.execute(
+            select(key, func.count(), func.sum(Transaction.amount))
+            .where(Transaction.household_id == HOUSEHOLD, Transaction.deleted.is_(False)).group_by(key))}
+
+
+def combined_summary(router, archive, shard):
+    totals = archive.summarize(shard, HOUSEHOLD, "month")
+    for group, (count, total) in hot_summary(router, shard).items():
+        archived_count, archived_total = totals.get(group, (0, 0.0))
+        totals[group] = (archived_count + count, archived_total + total)
+    return totals
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--keep-months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        router = ShardRouter(data_dir=data_dir, init_schema=init_schema)
+        archive = ColdArchive(os.path.join(data_dir, "archive"))
+        shard = router.shard_for(HOUSEHOLD)
+        path = router.path_for(shard)
+        router.engine(shard)
+        fill(path, args.rows, args.years, args.seed)
+        router.dispose()
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        hot_before = os.path.getsize(path)
+
+        all_hot, expected = timed(lambda: hot_summary(router, shard))
+
+        started = time.perf_counter()
+        moved = archive_shard(router, archive, shard, months_before(datetime(2026, 10, 1), args.keep_months - 1),
+                              vacuum=True)
+        archiving = time.perf_counter() - started
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        hot_after = os.path.getsize(path)
+        cold_bytes = sum(s["bytes"] for s in archive.manifest(shard)["segments"].values())
+
+        mixed, result = timed(lambda: combined_summary(router, archive, shard))
+        recent_start = months_before(datetime(2026, 10, 1), 2)
+        recent, _ = timed(lambda: archive.summarize(shard, HOUSEHOLD, "month", start=recent_start))
+        router.dispose()
+
+    assert {k: (c, round(t, 2)) for k, (c, t) in result.items()} == \
+           {k: (c, round(t, 2)) for k, (c, t) in expected.items()}, "archived summary differs"
+    mb = 1024 * 1024
+    print(f"rows: {args.rows:,} over {args.years} years, kept hot: {args.keep_months} months")
+    print(f"archived {moved:,} rows in {archiving:.1f} s into {len(archive.manifest(shard)['segments'])} segments")
+    print(f"hot file: {hot_before / mb:.1f} MB -> {hot_after / mb:.1f} MB, cold segments: {cold_bytes / mb:.1f} MB")
+    print(f"monthly summary over full history: all-SQLite {all_hot * 1000:.0f} ms, "
+          f"hot + Parquet {mixed * 1000:.0f} ms ({all_hot / mixed:.1f}x)")
+    print(f"summary over the last 3 months: cold segments all pruned in {recent * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Accuracy and throughput benchmark for the transaction categorizer.
+
+Generates noisy bank-statement style descriptions for a set of merchants per category,
+trains on one split, and reports held-out accuracy plus batch prediction throughput.
+
+    python benchmarks/categorizer_bench.py --rows 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from categorizer import Categorizer
+
+MERCHANTS = {
+    "groceries": ["WHOLE FOODS MKT", "TRADER JOE'S", "SAFEWAY", "KROGER", "ALDI", "COSTCO WHSE"],
+    "dining": ["STARBUCKS", "CHIPOTLE", "MCDONALD'S", "DOORDASH", "UBER EATS", "PANERA BREAD"],
+    "transport": ["SHELL OIL", "CHEVRON", "UBER TRIP", "LYFT RIDE", "EXXONMOBIL", "BART CLIPPER"],
+    "utilities": ["PG&E WEB ONLINE", "COMCAST CABLE", "AT&T BILL PAY", "VERIZON WIRELESS", "WATER DEPT"],
+    "entertainment": ["NETFLIX.COM", "SPOTIFY USA", "HULU", "STEAM GAMES", "AMC THEATRES", "DISNEY PLUS"],
+    "shopping": ["AMAZON MKTPLACE", "TARGET", "WALMART", "BEST BUY", "IKEA", "ETSY.COM"],
+    "health": ["CVS PHARMACY", "WALGREENS", "KAISER PERM", "DENTAL CARE", "PLANET FITNESS"],
+    "housing": ["RENT PAYMENT", "HOA DUES", "HOME DEPOT", "LOWES", "MORTGAGE PMT"],
+}
+PREFIXES = ["POS ", "DEBIT CARD PURCHASE ", "SQ *", "TST* ", "PURCHASE AUTHORIZED ON ", ""]
+CITIES = ["SAN FRANCISCO CA", "OAKLAND CA", "SEATTLE WA", "AUSTIN TX", "NEW YORK NY", ""]
+
+
+def synthetic_rows(count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        category = rng.choice(list(MERCHANTS))
+        merchant = rng.choice(MERCHANTS[category])
+        description = (f"{rng.choice(PREFIXES)}{merchant} #{rng.randint(100, 99999)} "
+                       f"{rng.choice(CITIES)} {rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}")
+        rows.append((description, category))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows to categorize for throughput")
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=5, help="timed prediction passes; the median is reported")
+    args = parser.parse_args()
+
+    train = synthetic_rows(args.train_rows, seed=1)
+    test = synthetic_rows(args.rows, seed=2)
+
+    started = time.perf_counter()
+    model = Categorizer.train([d for d, _ in train], [c for _, c in train])
+    train_seconds = time.perf_counter() - started
+
+    descriptions = [d for d, _ in test]
+    model.predict(descriptions[:1000])  # warm up
+    timings = []
+    for _ in range(args.repeats):
+        started = time.perf_counter()
+        predictions = model.predict(descriptions)
+        timings.append(time.perf_counter() - started)
+    predict_seconds = statistics.median(timings)
+
+    correct = sum(p == c for p, (_, c) in zip(predictions, test))
+    print(f"trained on {len(train)} rows in {train_seconds:.2f} s")
+    print(f"accuracy: {correct / len(test):.2%} on {len(test)} held-out rows")
+    # The figure moves with the machine and its load; quote it with the row count and the pass range
+    print(f"throughput at {len(test):,} rows: {len(test) / (predict_seconds * 1000):,.0f} rows/ms "
+          f"({predict_seconds * 1e6 / len(test):.2f} us/row), median of {len(timings)} passes "
+          f"from {len(test) / (max(timings) * 1000):,.0f} to {len(test) / (min(timings) * 1000):,.0f}; "
+          f"{os.cpu_count()} CPUs")
+
+    # Incremental path: a user renames a category for one merchant
+    corrections = [(d, "coffee") for d, _ in synthetic_rows(2000, seed=3) if "STARBUCKS" in d][:20]
+    model.partial_fit([d for d, _ in corrections], [c for _, c in corrections])
+    check = [d for d, _ in synthetic_rows(20_000, seed=4) if "STARBUCKS" in d]
+    learned = sum(p == "coffee" for p in model.predict(check)) / len(check)
+    print(f"after {len(corrections)} corrections, {learned:.0%} of new STARBUCKS rows -> 'coffee'")
+
+
+if __name__ == "__main__":
+    main()
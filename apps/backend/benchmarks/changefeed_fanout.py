@@ -0,0 +1,99 @@
+"""Fan-out benchmark for the transaction change feed.
+
+Connects thousands of idle SSE subscribers to one ChangeBroadcaster, publishes a burst of
+events and reports publish cost, delivery latency percentiles and queue bounds for clients
+that never read.
+
+    python benchmarks/changefeed_fanout.py --subscribers 5000 --events 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from changefeed import ChangeBroadcaster, event_stream
+
+
+async def consume(broadcaster, expected, published_at, latencies, done):
+    received = 0
+    async for chunk in event_stream(broadcaster):
+        # Messages are shared strings, so the publish time is looked up instead of re-parsed
+        if chunk not in published_at:
+            continue
+        latencies.append(time.perf_counter() - published_at[chunk])
+        received += 1
+        if received == expected:
+            done.set()
+            return
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--stalled", type=int, default=100, help="subscribers that never read their queue")
+    parser.add_argument("--max-queue", type=int, default=256)
+    args = parser.parse_args()
+
+    broadcaster = ChangeBroadcaster(max_queue=args.max_queue)
+    latencies = []
+    published_at = {}
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    events_done = []
+    tasks = []
+    for _ in range(args.subscribers):
+        done = asyncio.Event()
+        events_done.append(done)
+        tasks.append(asyncio.create_task(consume(broadcaster, args.events, published_at, latencies, done)))
+    stalled = [broadcaster.subscribe() for _ in range(args.stalled)]
+    await asyncio.sleep(0)  # let every consumer subscribe and reach its first await
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    publish_times = []
+    started = time.perf_counter()
+    for i in range(args.events):
+        publish_started = time.perf_counter()
+        message = broadcaster.publish({"type": "transaction.created",
+                                       "transactions": [{"id": i, "description": "coffee", "amount": 4.5}]})
+        published_at[message] = publish_started
+        publish_times.append(time.perf_counter() - publish_started)
+        await asyncio.sleep(0)
+    await asyncio.gather(*(done.wait() for done in events_done))
+    total = time.perf_counter() - started
+
+    # Push stalled clients past their bound to show writers never block on them
+    overflow_started = time.perf_counter()
+    for i in range(args.max_queue * 2):
+        broadcaster.publish({"type": "transaction.created", "transactions": [{"id": -i}]})
+    overflow_publish = (time.perf_counter() - overflow_started) / (args.max_queue * 2)
+
+    for task in tasks:
+        task.cancel()
+
+    ms = 1000
+    print(f"subscribers: {args.subscribers} active + {args.stalled} stalled, events: {args.events}")
+    print(f"memory per idle subscriber: {(after - before) / (args.subscribers + args.stalled) / 1024:.1f} KiB")
+    print(f"publish (fan-out enqueue): mean {statistics.mean(publish_times) * ms:.2f} ms, "
+          f"max {max(publish_times) * ms:.2f} ms")
+    print(f"delivery latency: p50 {percentile(latencies, 0.5) * ms:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * ms:.2f} ms, max {max(latencies) * ms:.2f} ms")
+    print(f"deliveries: {len(latencies)} in {total:.2f} s ({len(latencies) / total:,.0f}/s)")
+    print(f"stalled queue depth: {max(s.queue.qsize() for s in stalled)} (bound {args.max_queue}), "
+          f"dropped per stalled client: {stalled[0].dropped}, publish while saturated: {overflow_publish * ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""Latency of currency-converted totals over millions of rows.
+
+Fills one household shard with years of transactions in four currencies and writes a daily
+rate table for that span to an FX directory. Then it times:
+
+  - conversion of the whole amount column, row by row in Python (a bisect per row, the way a
+    client converts) and with FxRates (one searchsorted per currency)
+  - GET /transactions/summary converted to USD, with every row in SQLite and again after
+    archiving the older months to Parquet, against fetching the rows and converting them one
+    by one
+
+    python benchmarks/fx_summary.py --rows 2000000 --years 3
+"""
+import argparse
+import bisect
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+HOUSEHOLD = "bench"
+NOW = datetime(2026, 10, 15)
+CURRENCIES = {"USD": 0.70, "EUR": 0.15, "GBP": 0.10, "JPY": 0.05}
+START_RATES = {"EUR": 0.92, "GBP": 0.79, "JPY": 148.0}
+
+
+def write_rates(path, years, seed):
+    rng = random.Random(seed)
+    first = (NOW - timedelta(days=years * 365 + 1)).date()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "currency", "rate"])
+        for currency, rate in START_RATES.items():
+            for offset in range((NOW.date() - first).days + 1):
+                rate *= 1 + rng.gauss(0, 0.004)
+                writer.writerow([(first + timedelta(days=offset)).isoformat(), currency, f"{rate:.6f}"])
+
+
+def fill(path, rows, years, seed):
+    rng = random.Random(seed)
+    span = years * 365 * 86400
+    names, weights = list(CURRENCIES), list(CURRENCIES.values())
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO transactions (household_id, user_id, description, amount, currency, type, category, date,"
+            " version, deleted) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            ((HOUSEHOLD, f"user-{i % 4}", f"MERCHANT #{rng.randint(100, 9999)}", round(-rng.lognormvariate(3, 1), 2),
+              rng.choices(names, weights)[0], "expense", rng.choice(["groceries", "dining", "transport", None]),
+              (NOW - timedelta(seconds=rng.randrange(span))).isoformat(sep=" "), i + 1)
+             for i in range(rows))
+        )
+        conn.execute("UPDATE sync_state SET version = ?", (rows,))
+
+
+def per_row_rates(fx):
+    # What a client holding the same table would do: a dict of sorted dates and a bisect per row
+    return {currency: ([str(d) for d in starts], rates.tolist()) for currency, (starts, rates) in fx.periods().items()}
+
+
+def convert_row(table, amount, currency, day, to="USD"):
+    def rate(code):
+        if code == "USD":
+            return 1.0
+        days, rates = table[code]
+        return rates[bisect.bisect_right(days, day) - 1]
+    return amount * rate(to) / rate(currency)
+
+
+def per_row_summary(db_path, table):
+    totals = {}
+    with sqlite3.connect(db_path) as conn:
+        for month, amount, currency, day in conn.execute(
+                "SELECT strftime('%Y-%m', date), amount, currency, date(date) FROM transactions"
+                " WHERE household_id = ? AND deleted = 0", (HOUSEHOLD,)):
+            count, total = totals.get(month, (0, 0.0))
+            totals[month] = (count + 1, total + convert_row(table, amount, currency, day))
+    return totals
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--keep-months", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The app reads its storage locations at import time; it starts on an empty shard directory
+        # so startup does not replay millions of rows into the forecaster
+        os.environ["SHARD_DIR"] = os.path.join(data_dir, "shards")
+        os.environ["JOBS_DB"] = os.path.join(data_dir, "jobs.sqlite")
+        os.environ["ARCHIVE_DIR"] = os.path.join(data_dir, "archive")
+        os.environ["FX_DIR"] = os.path.join(data_dir, "fx")
+        os.makedirs(os.environ["FX_DIR"])
+        write_rates(os.path.join(os.environ["FX_DIR"], "daily.csv"), args.years, args.seed)
+        from fastapi.testclient import TestClient
+
+        import main as app_module
+        from archive import archive_shard, months_before
+
+        router, fx = app_module.shard_router, app_module.fx_rates
+        shard = router.shard_for(HOUSEHOLD)
+        router.engine(shard)
+        started = time.perf_counter()
+        fill(router.path_for(shard), args.rows, args.years, args.seed)
+        filling = time.perf_counter() - started
+
+        # Column conversion alone, on the columns as they come out of SQLite
+        with sqlite3.connect(router.path_for(shard)) as conn:
+            amounts, currencies, days = zip(*conn.execute("SELECT amount, currency, date(date) FROM transactions"))
+        table = per_row_rates(fx)
+        per_row, expected = timed(lambda: [convert_row(table, *row) for row in zip(amounts, currencies, days)], 1)
+        columns = (np.array(amounts), np.array(currencies), np.array(days, dtype="datetime64[D]"))
+        vectorized, converted = timed(lambda: fx.convert(*columns, "USD"))
+        assert np.allclose(converted, expected, rtol=1e-12), "column conversion differs"
+        del amounts, currencies, days, columns, expected, converted
+
+        with TestClient(app_module.app) as client:
+            def summary():
+                response = client.get("/transactions/summary", params={"group_by": "month", "currency": "USD"},
+                                      headers={"X-Household-ID": HOUSEHOLD})
+                response.raise_for_status()
+                return {row["key"]: (row["count"], row["total"]) for row in response.json()}
+
+            baseline, expected = timed(lambda: per_row_summary(router.path_for(shard), table), 1)
+            all_hot, result = timed(summary)
+            archive_shard(router, app_module.cold_archive, shard,
+                          months_before(NOW, args.keep_months - 1), vacuum=True)
+            mixed, archived_result = timed(summary)
+        router.dispose()
+
+    for got in (result, archived_result):
+        assert got.keys() == expected.keys() and all(
+            got[k][0] == expected[k][0] and abs(got[k][1] - expected[k][1]) < 0.01 for k in expected), \
+            "converted summary differs from the per-row result"
+    ms = 1000
+    print(f"{args.rows:,} rows over {args.years} years in {', '.join(CURRENCIES)} (filled in {filling:.0f} s), "
+          f"daily rates")
+    print(f"convert the amount column: per row {per_row * ms:.0f} ms, vectorized {vectorized * ms:.0f} ms "
+          f"({per_row / vectorized:.0f}x)")
+    print(f"monthly summary in USD: per-row conversion {baseline * ms:.0f} ms, "
+          f"all-SQLite {all_hot * ms:.0f} ms ({baseline / all_hot:.1f}x), "
+          f"hot + Parquet ({args.keep_months} months hot) {mixed * ms:.0f} ms ({baseline / mixed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Request latency of inline bulk inserts versus queued imports, with queue depth and job latency.
+
+Posts a burst of large imports to a fresh data directory, first inline through
+POST /transactions/bulk/ and then through POST /transactions/import with a pool of worker
+processes draining the queue. Reports how long each request held the client, how deep the
+queue got, and the queue-wait and run times from GET /jobs/metrics.
+
+    python benchmarks/job_queue.py --imports 8 --rows 5000 --workers 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--imports", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The app reads its storage locations at import time
+        os.environ["SHARD_DIR"] = data_dir
+        os.environ["JOBS_DB"] = os.path.join(data_dir, "jobs.sqlite")
+        os.environ["ARCHIVE_DIR"] = os.path.join(data_dir, "archive")
+        from fastapi.testclient import TestClient
+
+        import main as app_module
+        from jobs import start_pool
+
+        def rows(tag):
+            return [{"user_id": f"user-{i % 4}", "description": f"{tag} MERCHANT #{i}", "amount": -12.5,
+                     "type": "expense"} for i in range(args.rows)]
+
+        with TestClient(app_module.app) as client:
+            inline = []
+            for n in range(args.imports):
+                started = time.perf_counter()
+                client.post("/transactions/bulk/", json=rows("inline"),
+                            headers={"X-Household-ID": f"inline-{n}"}).raise_for_status()
+                inline.append(time.perf_counter() - started)
+
+            pool = start_pool(args.workers, os.environ["JOBS_DB"], poll_seconds=0.05)
+            try:
+                queued, job_ids = [], []
+                burst_started = time.perf_counter()
+                for n in range(args.imports):
+                    started = time.perf_counter()
+                    response = client.post("/transactions/import", json=rows("queued"),
+                                           headers={"X-Household-ID": f"queued-{n}"})
+                    response.raise_for_status()
+                    queued.append(time.perf_counter() - started)
+                    job_ids.append(response.json()["id"])
+                max_depth = 0
+                while True:
+                    depth = client.get("/jobs/metrics").json()["depth"]
+                    max_depth = max(max_depth, depth["queued"] + depth["running"])
+                    if depth["queued"] + depth["running"] == 0:
+                        break
+                    time.sleep(0.05)
+                drained = time.perf_counter() - burst_started
+                metrics = client.get("/jobs/metrics").json()
+            finally:
+                for process in pool:
+                    process.terminate()
+                for process in pool:
+                    process.join()
+        app_module.shard_router.dispose()
+
+    ms = 1000
+    print(f"{args.imports} imports of {args.rows:,} rows, {args.workers} worker processes")
+    print(f"{'path':<28} {'p50 ms':>9} {'max ms':>9}")
+    print(f"{'inline /transactions/bulk/':<28} {percentile(inline, 0.5) * ms:>9.1f} {max(inline) * ms:>9.1f}")
+    print(f"{'queued /transactions/import':<28} {percentile(queued, 0.5) * ms:>9.1f} {max(queued) * ms:>9.1f}")
+    print(f"queue: max depth {max_depth}, drained in {drained:.1f} s, "
+          f"{metrics['depth']['done']} done, {metrics['depth']['failed']} failed, {metrics['retried']} retried")
+    print(f"job wait p50 {metrics['wait_seconds']['p50'] * ms:.0f} ms, p95 {metrics['wait_seconds']['p95'] * ms:.0f} ms; "
+          f"run p50 {metrics['run_seconds']['p50'] * ms:.0f} ms, p95 {metrics['run_seconds']['p95'] * ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
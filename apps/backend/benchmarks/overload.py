@@ -0,0 +1,192 @@
+"""Tail latency under overload with and without admission control.
+
+Starts a stand-in for the Rust engine that serves at most `--engine-slots` requests at a
+time, each taking `--engine-delay` seconds, and sizes the /calculate-sum/ limit to twice
+those slots. Starts the API with uvicorn, once with the
+limits in main.py and once with the limits lifted. Many concurrent clients then hit
+/calculate-sum/ and GET /transactions/ harder than the engine can keep up with. A second
+phase makes the engine hang, to show the circuit breaker turning timeouts into fast 503s.
+
+    python benchmarks/overload.py --clients 40 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+
+
+def serve_engine(port, delay, slots, hang):
+    import uvicorn
+    from fastapi import FastAPI
+
+    engine = FastAPI()
+    capacity = asyncio.Semaphore(slots)
+
+    @engine.post("/sum")
+    async def total(numbers: dict):
+        if hang:
+            await asyncio.sleep(3600)
+        async with capacity:
+            await asyncio.sleep(delay)
+        return {"sum": sum(numbers["values"])}
+
+    uvicorn.run(engine, host="127.0.0.1", port=port, log_level="warning")
+
+
+def serve_api(port, engine_port, admission, rust_limit):
+    import uvicorn
+
+    os.environ["RUST_ENGINE_URL"] = f"http://127.0.0.1:{engine_port}"
+    import main
+
+    # The engine stand-in is far slower than the real one, so its route limit is sized to it
+    main.route_limiters["rust"].max_concurrent = rust_limit
+    main.route_limiters["rust"].max_queue = rust_limit * 2
+    if not admission:
+        for limiter in main.route_limiters.values():
+            limiter.max_concurrent = limiter.max_queue = 1_000_000
+        main.rust_breaker.failure_threshold = 1_000_000
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def spawn(*args, env=None):
+    return subprocess.Popen([sys.executable, __file__, *args], cwd=BACKEND, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url):
+    async with httpx.AsyncClient() as client:
+        for _ in range(200):
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def drive(base, clients, seconds, paths, think):
+    results = []  # (path, status, seconds)
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async def client_loop(client, i):
+        n = i
+        while time.monotonic() < deadline:
+            method, path, body = paths[n % len(paths)]
+            n += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, base + path, json=body)
+                status = response.status_code
+            except httpx.TransportError:
+                status = 0
+            results.append((path, status, time.perf_counter() - started))
+            await asyncio.sleep(think)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        await asyncio.gather(*(client_loop(client, i) for i in range(clients)))
+    return results
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def report(label, results, seconds):
+    ms = 1000
+    for path in sorted({r[0].split("?")[0] for r in results}):
+        rows = [r for r in results if r[0].split("?")[0] == path]
+        ok = [r[2] for r in rows if r[1] == 200]
+        shed = [r[2] for r in rows if r[1] == 503]
+        errors = len(rows) - len(ok) - len(shed)
+        print(f"{label:<16} {path:<16} {len(ok) / seconds:>7.0f} {len(shed):>7} {errors:>7} "
+              f"{percentile(ok, 0.5) * ms:>8.0f} {percentile(ok, 0.99) * ms:>8.0f} "
+              f"{max(ok, default=float('nan')) * ms:>8.0f} {percentile(shed, 0.99) * ms:>9.1f}")
+
+
+async def run_phase(args, data_dir, hang, admission, paths, clients):
+    engine_port, api_port = args.port + 1, args.port
+    env = dict(os.environ, SHARD_DIR=data_dir, JOBS_DB=os.path.join(data_dir, "jobs.sqlite"),
+               ARCHIVE_DIR=os.path.join(data_dir, "archive"))
+    engine = spawn("--serve-engine", str(engine_port), str(args.engine_delay), str(args.engine_slots),
+                   *(["--hang"] if hang else []))
+    api = spawn("--serve-api", str(api_port), str(engine_port), str(args.engine_slots * 2),
+                *([] if admission else ["--no-admission"]), env=env)
+    try:
+        await wait_ready(f"http://127.0.0.1:{api_port}/")
+        return await drive(f"http://127.0.0.1:{api_port}", clients, args.seconds, paths, args.think)
+    finally:
+        for process in (api, engine):
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()  # uvicorn waits for in-flight requests, and a hung engine has them forever
+                process.wait()
+
+
+async def benchmark(args):
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, SHARD_DIR=data_dir, JOBS_DB=os.path.join(data_dir, "jobs.sqlite"),
+                   ARCHIVE_DIR=os.path.join(data_dir, "archive"))
+        # Seed some rows so the read path does real work
+        api = spawn("--serve-api", str(args.port), str(args.port + 1), str(args.engine_slots * 2), env=env)
+        try:
+            await wait_ready(f"http://127.0.0.1:{args.port}/")
+            async with httpx.AsyncClient() as client:
+                (await client.post(f"http://127.0.0.1:{args.port}/transactions/bulk/", json=[
+                    {"description": f"MERCHANT #{i}", "amount": -5.0, "type": "expense"} for i in range(2000)
+                ])).raise_for_status()
+        finally:
+            api.terminate()
+            api.wait()
+
+        mixed = [("POST", "/calculate-sum/", {"values": [1.0, 2.0, 3.0]}),
+                 ("GET", "/transactions/?limit=50", None)]
+        print(f"engine: {args.engine_slots} slots x {args.engine_delay * 1000:.0f} ms "
+              f"(~{args.engine_slots / args.engine_delay:.0f} req/s), {args.clients} clients, "
+              f"{args.think * 1000:.0f} ms think time, {args.seconds} s each")
+        print(f"{'setup':<16} {'route':<16} {'ok/s':>7} {'503':>7} {'errors':>7} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'503 p99':>9}")
+        for label, admission in (("no limits", False), ("admission", True)):
+            results = await run_phase(args, data_dir, False, admission, mixed, args.clients)
+            report(label, results, args.seconds)
+
+        print("errors: 5xx from the API or no response within the 60 s client timeout")
+        print("engine hanging (the API gives up on the engine after 2 s):")
+        rust_only = [("POST", "/calculate-sum/", {"values": [1.0]})]
+        for label, admission in (("no breaker", False), ("breaker", True)):
+            results = await run_phase(args, data_dir, True, admission, rust_only, max(1, args.clients // 4))
+            report(label, results, args.seconds)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve-engine":
+        serve_engine(int(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4]), "--hang" in sys.argv)
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve-api":
+        serve_api(int(sys.argv[2]), int(sys.argv[3]), "--no-admission" not in sys.argv, int(sys.argv[4]))
+        return
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=40)
+    parser.add_argument("--think", type=float, default=0.5, help="seconds each client waits between requests")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--engine-delay", type=float, default=0.25)
+    parser.add_argument("--engine-slots", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
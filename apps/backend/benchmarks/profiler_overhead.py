@@ -0,0 +1,80 @@
+"""Request latency with the sampling profiler off, and on at several sampling intervals.
+
+Seeds a household with transactions, then times GET /transactions/ and GET /transactions/summary
+in-process: first with no profile running (the path every production request takes), then
+while a whole-process profile samples every thread. Reports p50/p99 per setup and what a profile
+of the run caught.
+
+    python benchmarks/profiler_overhead.py --rows 20000 --requests 400
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # The app reads its storage locations at import time
+        os.environ["SHARD_DIR"] = data_dir
+        os.environ["JOBS_DB"] = os.path.join(data_dir, "jobs.sqlite")
+        os.environ["ARCHIVE_DIR"] = os.path.join(data_dir, "archive")
+        from fastapi.testclient import TestClient
+
+        import main as app_module
+        from profiler import SamplingProfiler
+
+        with TestClient(app_module.app) as client:
+            for start in range(0, args.rows, 5000):
+                client.post("/transactions/bulk/", json=[
+                    {"user_id": f"user-{i % 4}", "description": f"MERCHANT #{i}", "amount": -(i % 90) - 1.5,
+                     "type": "expense", "category": ["groceries", "dining", "transport"][i % 3]}
+                    for i in range(start, min(args.rows, start + 5000))]).raise_for_status()
+            paths = ["/transactions/?limit=100&skip=5000", "/transactions/summary?group_by=category"]
+
+            def run():
+                latencies = {path: [] for path in paths}
+                for n in range(args.requests):
+                    path = paths[n % len(paths)]
+                    started = time.perf_counter()
+                    client.get(path).raise_for_status()
+                    latencies[path].append(time.perf_counter() - started)
+                return latencies
+
+            run()  # warm up
+            results = [("off", run(), None)]
+            for interval_ms in (10, 5, 1):
+                with SamplingProfiler(interval_ms / 1000) as profiler:
+                    latencies = run()
+                results.append((f"on, {interval_ms} ms", latencies, profiler))
+        app_module.shard_router.dispose()
+
+    ms = 1000
+    print(f"{args.rows:,} rows, {args.requests} requests per setup")
+    print(f"{'profiler':<12} {'route':<40} {'p50 ms':>8} {'p99 ms':>8} {'samples':>8}")
+    for label, latencies, profiler in results:
+        for path, values in latencies.items():
+            print(f"{label:<12} {path:<40} {percentile(values, 0.5) * ms:>8.2f} {percentile(values, 0.99) * ms:>8.2f} "
+                  f"{profiler.sample_count if profiler else '-':>8}")
+    summary = results[-1][2].summary(top=5)
+    print("hottest frames at 1 ms:", "; ".join(f"{f['frame']} {f['ms']:.0f} ms" for f in summary["self"]))
+    print("slowest SQL at 1 ms:", "; ".join(f"{s['statement'][:60]}... x{s['count']} {s['total_ms']:.0f} ms"
+                                           for s in summary["sql"][:2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Memory per row and read latency of "last 90 days for this user": ORM objects versus the columnar cache.
+
+Fills one household shard with a year of synthetic transactions for many users, then reads
+each user's recent rows through the ORM query GET /transactions/ used to run and through
+RecentTransactionCache (first read loads from SQLite, later reads hit the arrays). Latencies are
+timed without tracing; memory is measured in a separate traced pass that holds every user's ORM
+result, against the cache's own accounting of its resident arrays.
+
+    python benchmarks/recent_reads.py --users 500 --rows-per-user 1000
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import select
+
+from hotset import RecentTransactionCache
+from models import Transaction, init_schema
+from sharding import ShardRouter
+
+HOUSEHOLD = "bench"
+NOW = datetime(2026, 10, 15)
+
+
+def fill(path, users, rows_per_user, seed):
+    rng = random.Random(seed)
+    merchants = ["SAFEWAY", "NETFLIX.COM", "SHELL OIL", "AMAZON MKTPLACE", "RENT PAYMENT", "CHIPOTLE"]
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO transactions (household_id, user_id, description, amount, type, category, date, version, deleted)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+            ((HOUSEHOLD, f"user-{i % users}", f"{rng.choice(merchants)} #{rng.randint(100, 9999)}",
+              round(rng.lognormvariate(3, 1), 2), "expense" if rng.random() < 0.9 else "income",
+              rng.choice(["groceries", "dining", "transport", None]),
+              (NOW - timedelta(seconds=rng.randrange(365 * 86400))).isoformat(sep=" "), i + 1)
+             for i in range(users * rows_per_user))
+        )
+
+
+def orm_read(db, user_id, since):
+    return db.query(Transaction).filter(
+        Transaction.household_id == HOUSEHOLD, Transaction.user_id == user_id, Transaction.deleted.is_(False),
+        Transaction.date >= since).order_by(Transaction.date, Transaction.id).all()
+
+
+def loader(db, user_id):
+    def load(since):
+        return db.execute(
+            select(Transaction.id, Transaction.description, Transaction.amount, Transaction.type,
+                   Transaction.category, Transaction.date, Transaction.currency)
+            .where(Transaction.household_id == HOUSEHOLD, Transaction.user_id == user_id,
+                   Transaction.deleted.is_(False), Transaction.date >= since)
+            .order_by(Transaction.date, Transaction.id)).all()
+    return load
+
+
+def timed_reads(users, read):
+    latencies, results = [], []
+    for user_id in users:
+        started = time.perf_counter()
+        results.append(read(user_id))
+        latencies.append(time.perf_counter() - started)
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--rows-per-user", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    users = [f"user-{i}" for i in range(args.users)]
+    since = NOW - timedelta(days=args.days)
+    with tempfile.TemporaryDirectory() as data_dir:
+        router = ShardRouter(data_dir=data_dir, init_schema=init_schema)
+        shard = router.shard_for(HOUSEHOLD)
+        router.engine(shard)
+        fill(router.path_for(shard), args.users, args.rows_per_user, args.seed)
+
+        with router.session_for_shard(shard) as db:
+            timed_reads(users[:20], lambda u: orm_read(db, u, since))  # warm the page cache
+            db.expunge_all()
+            orm_latencies, orm_results = timed_reads(users, lambda u: orm_read(db, u, since))
+            rows = sum(map(len, orm_results))
+            expected = [[(t.id, t.description, t.amount, t.category) for t in result] for result in orm_results]
+        del orm_results
+        with router.session_for_shard(shard) as db:
+            tracemalloc.start()
+            held = [orm_read(db, u, since) for u in users]
+            orm_bytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del held
+
+        with router.session_for_shard(shard) as db:
+            cache = RecentTransactionCache(days=args.days, max_bytes=1 << 40)
+            miss_latencies, _ = timed_reads(users, lambda u: cache.get(HOUSEHOLD, u, args.days, NOW, loader(db, u)))
+        hit_latencies, cached = timed_reads(users, lambda u: cache.get(HOUSEHOLD, u, args.days, NOW, None))
+        router.dispose()
+
+    assert [[(r.id, r.description, r.amount, r.category) for r in result] for result in cached] == expected
+    stats = cache.stats()
+    ms = 1000
+    print(f"{args.users} users, {rows:,} rows in the last {args.days} days ({rows // args.users} per user)")
+    print(f"{'path':<28} {'bytes/row':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, per_row, latencies in (
+        ("ORM objects", orm_bytes / rows, orm_latencies),
+        ("cache, first read (load)", stats["bytes_per_row"], miss_latencies),
+        ("cache, later reads", stats["bytes_per_row"], hit_latencies),
+    ):
+        ordered = sorted(latencies)
+        print(f"{name:<28} {per_row:>10.0f} {statistics.median(ordered) * ms:>8.2f} "
+              f"{ordered[int(0.99 * (len(ordered) - 1))] * ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Scaling and accuracy benchmark for recurring charge detection.
+
+Each synthetic user gets a few subscriptions (weekly to yearly, with jittered dates and the odd
+price change) mixed into everyday purchases at the same merchants. Reports full-history detection
+time as the row count doubles, recall/precision against the planted series, and the cost of
+incremental updates.
+
+    python benchmarks/recurring_detect.py --rows 2000000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from recurring import RecurringDetector
+
+SUBSCRIPTIONS = [
+    ("NETFLIX.COM 866-579-7172 CA", 15.49, 30), ("SPOTIFY USA 877-7781161 NY", 10.99, 30),
+    ("RENT PAYMENT REF", 2100.0, 30), ("PLANET FITNESS #4412", 24.99, 30),
+    ("BLUE APRON 888-2783349", 59.94, 7), ("PAYROLL ACME CORP", 2800.0, 14),
+    ("STATE FARM INSURANCE", 310.0, 91), ("AMAZON PRIME*2K4", 139.0, 365),
+]
+EVERYDAY = ["POS SAFEWAY #{} OAKLAND CA", "SQ *BLUE BOTTLE COFFEE", "UBER TRIP HELP.UBER.COM",
+            "AMAZON MKTPLACE PMTS {}", "SHELL OIL {} SAN JOSE CA", "CHIPOTLE {} AUSTIN TX"]
+
+
+def synthetic_history(rows, days, seed):
+    """Rows as (id, household_id, user_id, description, amount, type, date) plus the planted (user, merchant) series."""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    history, planted = [], set()
+    user = 0
+    while len(history) < rows:
+        user_id = f"user-{user}"
+        user += 1
+        for description, amount, interval in rng.sample(SUBSCRIPTIONS, 3):
+            if days // interval >= 3:  # a yearly charge needs three years of history to be detectable
+                planted.add((user_id, description.split()[0].lower()))
+            kind = "income" if description.startswith("PAYROLL") else "expense"
+            day = rng.randrange(interval)
+            while day < days:
+                # Jittered posting dates and an occasional small price change
+                if rng.random() < 0.02:
+                    amount = round(amount * 1.03, 2)
+                posted = max(0, day + rng.randint(-1, 1))
+                history.append((len(history), "default", user_id, description, -amount, kind,
+                                start + timedelta(days=posted)))
+                day += interval
+        for _ in range(rng.randint(150, 300)):
+            template = rng.choice(EVERYDAY)
+            history.append((len(history), "default", user_id, template.format(rng.randint(100, 9999)),
+                            -round(rng.lognormvariate(3, 0.8), 2), "expense",
+                            start + timedelta(days=rng.randrange(days))))
+    history.sort(key=lambda row: row[6])
+    return history[:rows], planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history, planted = synthetic_history(args.rows, args.days, args.seed)
+
+    sizes = []
+    size = args.rows
+    while size >= 250_000 and len(sizes) < 4:
+        sizes.insert(0, size)
+        size //= 2
+    for size in sizes or [args.rows]:
+        detector = RecurringDetector()
+        started = time.perf_counter()
+        detector.rebuild(history[:size])
+        elapsed = time.perf_counter() - started
+        print(f"full detection over {size:>9,} rows: {elapsed:6.2f} s ({elapsed / size * 1e6:.2f} us/row)")
+
+    found = {(s.user_id, s.merchant.split()[0]) for series in detector.series.values() for s in series}
+    users = {row[2] for row in history}
+    planted = {p for p in planted if p[0] in users}
+    hits = len(found & planted)
+    print(f"planted series: {len(planted):,}, detected: {len(found):,}, "
+          f"recall {hits / len(planted):.1%}, precision {hits / max(len(found), 1):.1%}")
+
+    # Incremental path: hold back the last 10% of history and feed it row by row
+    split = int(len(history) * 0.9)
+    detector = RecurringDetector()
+    detector.rebuild(history[:split])
+    before = sum(len(series) for series in detector.series.values())
+    started = time.perf_counter()
+    for row in history[split:]:
+        detector.observe(*row)
+    elapsed = time.perf_counter() - started
+    after = sum(len(series) for series in detector.series.values())
+    print(f"incremental: {len(history) - split:,} rows in {elapsed:.2f} s "
+          f"({elapsed / (len(history) - split) * 1e6:.1f} us/row), series {before:,} -> {after:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Write throughput and latency with one shared SQLite file versus one file per household.
+
+Each household runs in its own thread and commits through the same path as
+POST /transactions/bulk/ (allocate versions, insert, commit). Half of the households are doing a
+large import in batches; the others add single transactions and record how long each write
+took. The shared setup pins every household to one shard, which reproduces the old single
+sql_app.db.
+
+    python benchmarks/shard_writes.py --households 2 4 8 --import-batches 5 --batch-size 2000
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.exc import OperationalError
+
+from models import Transaction, allocate_versions, init_schema
+from sharding import ShardRouter
+
+
+def write(router, household_id, rows):
+    with router.session(household_id) as db:
+        first_version = allocate_versions(db, rows)
+        db.add_all(
+            Transaction(household_id=household_id, user_id="bench", description=f"import row {i}",
+                        amount=-12.5, type="expense", version=first_version + i)
+            for i in range(rows)
+        )
+        db.commit()
+
+
+def importer(router, household_id, batches, batch_size, done, imported):
+    for _ in range(batches):
+        try:
+            write(router, household_id, batch_size)
+            imported.append(batch_size)
+        except OperationalError:
+            pass  # "database is locked" after the busy timeout; the batch is lost
+    done.set()
+
+
+def interactive(router, household_id, done, latencies, failures):
+    while not done.is_set():
+        started = time.perf_counter()
+        try:
+            write(router, household_id, 1)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            failures.append(household_id)
+        time.sleep(0.005)
+
+
+def run(households, shared, batches, batch_size):
+    with tempfile.TemporaryDirectory() as data_dir:
+        router = ShardRouter(data_dir=data_dir, mode="household", init_schema=init_schema)
+        ids = [f"family-{i}" for i in range(households)]
+        if shared:
+            router.pins = {household_id: "sql_app" for household_id in ids}
+        for household_id in ids:
+            router.engine(router.shard_for(household_id))  # create schemas outside the timing
+
+        importers = ids[:max(1, households // 2)]
+        done_events = [threading.Event() for _ in importers]
+        all_done = threading.Event()
+        imported, latencies, failures = [], [], []
+        threads = [threading.Thread(target=importer, args=(router, h, batches, batch_size, done, imported))
+                   for h, done in zip(importers, done_events)]
+        threads += [threading.Thread(target=interactive, args=(router, h, all_done, latencies, failures))
+                    for h in ids[len(importers):]]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for done in done_events:
+            done.wait()
+        elapsed = time.perf_counter() - started
+        all_done.set()
+        for thread in threads:
+            thread.join()
+        router.dispose()
+    failed_batches = len(importers) * batches - len(imported)
+    return sum(imported) / elapsed, failed_batches, latencies, len(failures)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--households", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--import-batches", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    ms = 1000
+    print(f"{'households':>10} {'layout':>8} {'import rows/s':>14} {'failed':>7} {'small writes':>13} "
+          f"{'locked':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for households in args.households:
+        for layout, shared in (("shared", True), ("sharded", False)):
+            throughput, failed_batches, latencies, failures = run(households, shared, args.import_batches,
+                                                                  args.batch_size)
+            print(f"{households:>10} {layout:>8} {throughput:>14,.0f} {failed_batches:>7} {len(latencies):>13} "
+                  f"{failures:>7} "
+                  f"{percentile(latencies, 0.5) * ms:>8.1f} {percentile(latencies, 0.99) * ms:>8.1f} "
+                  f"{max(latencies, default=float('nan')) * ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Local transaction categorization.
+
+A linear model over hashed character n-grams of the transaction description. Features are
+extracted for a whole batch at once with NumPy, so bulk imports are categorized in a
+handful of array operations instead of a Python loop per row.
+
+Train offline from a labeled CSV (description,category), then fold in user corrections:
+
+    python categorizer.py train labeled.csv --model data/categorizer.npz
+    python categorizer.py retrain --model data/categorizer.npz --data-dir data
+"""
+import argparse
+import csv
+import os
+import sqlite3
+from functools import lru_cache
+
+import numpy as np
+
+from sharding import SHARD_DIR, ShardRouter
+
+WIDTH = 48  # descriptions are truncated to this many bytes
+NGRAM_SIZES = (3, 4, 5)
+HASH_BITS = 18
+BATCH_ROWS = 4096  # keeps the (rows, positions, classes) gather under a few MB
+
+# Code point lookup table: lowercase letters, digits collapse to '0', everything else becomes a
+# space. Index 256 stands for any code point beyond Latin-1.
+_LUT = np.full(257, ord(" "), dtype=np.uint8)
+_LUT[0] = 0  # padding stays padding
+for _c in range(ord("a"), ord("z") + 1):
+    _LUT[_c] = _c
+    _LUT[_c - 32] = _c
+_LUT[ord("0"):ord("9") + 1] = ord("0")
+_LUT[0xC0:0x100] = np.arange(0xC0, 0x100)  # keep accented Latin-1 letters
+
+
+def _encode(descriptions) -> np.ndarray:
+    # Fixed-width unicode array conversion runs in C; code points outside Latin-1 become spaces
+    codepoints = np.array([d or "" for d in descriptions], dtype=f"U{WIDTH - 1}").view(np.uint32)
+    codepoints = codepoints.reshape(-1, WIDTH - 1)
+    chars = np.empty((len(codepoints), WIDTH), dtype=np.uint8)
+    chars[:, 0] = ord(" ")  # leading space marks the word boundary at the start
+    chars[:, 1:] = _LUT[np.minimum(codepoints, 256)]
+    return chars
+
+
+def _unique_rows(chars: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Distinct rows of chars and the index of each row's distinct value."""
+    # Sort one 64-bit hash per row instead of comparing whole rows
+    words = chars.view(np.uint64)
+    keys = np.zeros(len(chars), dtype=np.uint64)
+    for column in range(words.shape[1]):
+        keys = (keys ^ words[:, column]) * np.uint64(0x100000001B3 + 2 * column)
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    unique = chars[first]
+    if not np.array_equal(unique[inverse], chars):
+        # Hash collision between different lines: fall back to an exact row comparison
+        unique, inverse = np.unique(chars.view(f"V{WIDTH}").ravel(), return_inverse=True)
+        unique, inverse = unique.view(np.uint8).reshape(len(unique), WIDTH), inverse.ravel()
+    return unique, inverse
+
+
+def _features_from_chars(chars: np.ndarray) -> np.ndarray:
+    lengths = (chars != 0).sum(axis=1)
+    chars = chars.astype(np.uint32)
+    null_bucket = np.uint32(1 << HASH_BITS)
+    blocks = []
+    # Grow n-gram hashes incrementally: the hash for size n extends the one for size n - 1
+    h = chars
+    for n in range(2, max(NGRAM_SIZES) + 1):
+        h = h[:, :-1] * np.uint32(0x01000193) + chars[:, n - 1:]
+        if n not in NGRAM_SIZES:
+            continue
+        # Multiplicative hashing spreads the rolling hash over the top HASH_BITS bits
+        buckets = (h * np.uint32(0x9E3779B1 + n)) >> np.uint32(32 - HASH_BITS)
+        valid = np.arange(h.shape[1])[None, :] + n <= lengths[:, None]
+        blocks.append(np.where(valid, buckets, null_bucket))
+    return np.concatenate(blocks, axis=1).astype(np.intp)
+
+
+def hashed_features(descriptions) -> np.ndarray:
+    """Return a (rows, positions) array of feature bucket ids; padding maps to the null bucket."""
+    return _features_from_chars(_encode(descriptions))
+
+
+class Categorizer:
+    def __init__(self, weights: np.ndarray, classes: list[str], corrections_applied: dict[str, int] | None = None):
+        # One extra all-zero row absorbs the padding bucket
+        self.weights = weights
+        self.classes = list(classes)
+        # Last correction id folded in, per shard: ids are only unique within one shard file
+        self.corrections_applied = dict(corrections_applied or {})
+
+    @classmethod
+    def empty(cls, classes: list[str]) -> "Categorizer":
+        return cls(np.zeros(((1 << HASH_BITS) + 1, len(classes)), dtype=np.float32), classes)
+
+    def _scores(self, features: np.ndarray) -> np.ndarray:
+        return self.weights[features].sum(axis=1)
+
+    def predict(self, descriptions) -> list[str | None]:
+        chars = _encode(descriptions)
+        # Statement lines repeat heavily once digits are collapsed, so score each distinct line once
+        unique, inverse = _unique_rows(chars)
+        labels = np.empty(len(unique), dtype=np.intp)
+        for start in range(0, len(unique), BATCH_ROWS):
+            scores = self._scores(_features_from_chars(unique[start:start + BATCH_ROWS]))
+            best = scores.argmax(axis=1)
+            # No positive evidence for any class means we leave the row uncategorized
+            known = scores[np.arange(len(best)), best] > 0
+            labels[start:start + BATCH_ROWS] = np.where(known, best, -1)
+        names = self.classes + [None]  # index -1 picks None
+        return [names[i] for i in labels[inverse].tolist()]
+
+    def _class_index(self, label: str) -> int:
+        if label not in self.classes:
+            self.classes.append(label)
+            self.weights = np.hstack([self.weights, np.zeros((len(self.weights), 1), dtype=np.float32)])
+        return self.classes.index(label)
+
+    def partial_fit(self, descriptions, labels):
+        """Perceptron updates for rows the model gets wrong; used for user corrections."""
+        features = hashed_features(descriptions)
+        null_bucket = 1 << HASH_BITS
+        for row, label in zip(features, labels):
+            target = self._class_index(label)
+            row = row[row != null_bucket]
+            predicted = int(self.weights[row].sum(axis=0).argmax())
+            if predicted != target or self.weights[row, target].sum() <= 0:
+                np.add.at(self.weights, (row, target), 1.0)
+                if predicted != target:
+                    np.add.at(self.weights, (row, predicted), -1.0)
+
+    @classmethod
+    def train(cls, descriptions, labels, epochs: int = 5, seed: int = 0) -> "Categorizer":
+        """Averaged perceptron over the labeled rows."""
+        classes = sorted(set(labels))
+        model = cls.empty(classes)
+        totals = np.zeros(model.weights.shape, dtype=np.float64)
+        targets = np.array([classes.index(label) for label in labels])
+        features = hashed_features(descriptions)
+        null_bucket = 1 << HASH_BITS
+        rows = [f[f != null_bucket] for f in features]
+        rng = np.random.default_rng(seed)
+        step = 1
+        for _ in range(epochs):
+            for i in rng.permutation(len(rows)):
+                row, target = rows[i], targets[i]
+                predicted = int(model.weights[row].sum(axis=0).argmax())
+                if predicted != target:
+                    np.add.at(model.weights, (row, target), 1.0)
+                    np.add.at(model.weights, (row, predicted), -1.0)
+                    np.add.at(totals, (row, target), step)
+                    np.add.at(totals, (row, predicted), -step)
+                step += 1
+        model.weights -= totals / step
+        return model
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, classes=np.array(self.classes),
+                            applied_shards=np.array(list(self.corrections_applied), dtype=str),
+                            applied_ids=np.array(list(self.corrections_applied.values()), dtype=np.int64))
+
+    @classmethod
+    def load(cls, path: str) -> "Categorizer":
+        with np.load(path) as data:
+            if "applied_shards" in data.files:
+                applied = dict(zip((str(s) for s in data["applied_shards"]), (int(i) for i in data["applied_ids"])))
+            else:
+                # Models saved before sharding kept one watermark, for the single sql_app.db
+                applied = {"sql_app": int(data["corrections_applied"])}
+            return cls(data["weights"], [str(c) for c in data["classes"]], applied)
+
+
+CATEGORIZER_MODEL_PATH = os.environ.get("CATEGORIZER_MODEL_PATH", "./data/categorizer.npz")
+
+
+@lru_cache(maxsize=4)
+def _load_cached(path: str, mtime: float) -> Categorizer:
+    return Categorizer.load(path)
+
+
+def get_categorizer(path: str = CATEGORIZER_MODEL_PATH) -> Categorizer | None:
+    """Model loaded once per worker, reloaded only when the file on disk changes."""
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+    return _load_cached(path, mtime)
+
+
+def _read_labeled_csv(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [(row["description"], row["category"]) for row in csv.DictReader(f) if row.get("category")]
+    return [d for d, _ in rows], [c for _, c in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the transaction categorizer")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="train from a labeled CSV with description,category columns")
+    train.add_argument("csv")
+    train.add_argument("--model", default=CATEGORIZER_MODEL_PATH)
+    train.add_argument("--epochs", type=int, default=5)
+    retrain = commands.add_parser("retrain", help="fold new user corrections into an existing model")
+    retrain.add_argument("--model", default=CATEGORIZER_MODEL_PATH)
+    retrain.add_argument("--data-dir", default=SHARD_DIR, help="directory holding the household shards")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        descriptions, labels = _read_labeled_csv(args.csv)
+        Categorizer.train(descriptions, labels, epochs=args.epochs).save(args.model)
+        print(f"trained on {len(labels)} rows -> {args.model}")
+        return
+
+    model = Categorizer.load(args.model)
+    descriptions, labels = [], []
+    router = ShardRouter(data_dir=args.data_dir)
+    for shard in router.shards():
+        with sqlite3.connect(router.path_for(shard)) as conn:
+            rows = conn.execute(
+                "SELECT id, description, category FROM category_corrections WHERE id > ? ORDER BY id",
+                (model.corrections_applied.get(shard, 0),),
+            ).fetchall()
+        if rows:
+            descriptions += [r[1] for r in rows]
+            labels += [r[2] for r in rows]
+            model.corrections_applied[shard] = rows[-1][0]
+    if labels:
+        model.partial_fit(descriptions, labels)
+        model.save(args.model)
+    print(f"applied {len(labels)} corrections -> {args.model}")
+
+
+if __name__ == "__main__":
+    main()
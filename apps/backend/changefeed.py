@@ -0,0 +1,83 @@
+import asyncio
+import json
+from typing import AsyncIterator
+
+# In-process change feed: writers publish events, every connected client gets its own bounded queue.
+
+class Subscriber:
+    def __init__(self, max_queue: int, topic: str | None = None):
+        self.topic = topic  # only events published to this topic (None: every event)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0  # events discarded because this client fell behind
+
+class ChangeBroadcaster:
+    def __init__(self, max_queue: int = 256, heartbeat_seconds: float = 15.0):
+        self.max_queue = max_queue
+        self.heartbeat_seconds = heartbeat_seconds
+        self.subscribers: set[Subscriber] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+
+    def subscribe(self, topic: str | None = None) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        subscriber = Subscriber(self.max_queue, topic)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    async def _heartbeat(self):
+        # One shared timer instead of a per-subscriber timeout on every queue read
+        while self.subscribers:
+            await asyncio.sleep(self.heartbeat_seconds)
+            for subscriber in self.subscribers:
+                if not subscriber.queue.full():
+                    # Comment lines keep proxies from closing idle connections
+                    subscriber.queue.put_nowait(HEARTBEAT)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: dict, topic: str | None = None) -> str:
+        # Serialize once per event; every subscriber queue shares the same string
+        message = format_sse(event["type"], event)
+        # Handlers running in the threadpool hand the event over to the event loop
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._fan_out, message, topic)
+            return message
+        self._fan_out(message, topic)
+        return message
+
+    def _fan_out(self, message: str, topic: str | None = None):
+        for subscriber in self.subscribers:
+            if subscriber.topic is not None and subscriber.topic != topic:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Never block writers on a slow client: drop its oldest event and tell it to resync
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(message)
+                subscriber.dropped += 1
+
+HEARTBEAT = ": heartbeat\n\n"
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def event_stream(broadcaster: ChangeBroadcaster, topic: str | None = None) -> AsyncIterator[str]:
+    # Subscribed once the response starts iterating: a client gone before then never leaves a queue behind
+    subscriber = broadcaster.subscribe(topic)
+    try:
+        yield ": connected\n\n"
+        while True:
+            message = await subscriber.queue.get()
+            if subscriber.dropped:
+                yield format_sse("resync", {"dropped": subscriber.dropped})
+                subscriber.dropped = 0
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscriber)
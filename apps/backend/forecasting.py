@@ -0,0 +1,144 @@
+"""Streaming spend-velocity forecasts.
+
+Each user of each household keeps a small running state: an exponentially weighted average of daily spend and a
+Welford mean/variance of daily totals. Inserting a transaction updates it in O(1); days without
+spending are folded in with closed-form updates instead of being replayed one by one. From that
+state we project end-of-month spend and balance and raise an alert once per month when the
+projection crosses the user's budget.
+"""
+import calendar
+import math
+from datetime import date, datetime
+
+Z_95 = 1.645  # one-sided 95% band on the projected spend
+
+
+class SpendState:
+    __slots__ = ("day", "day_total", "ewma", "days", "mean", "m2",
+                 "period", "period_days", "period_spent", "period_income", "alerted")
+
+    def __init__(self, day: int, period: tuple[int, int]):
+        self.day = day  # ordinal of the open (not yet folded in) day
+        self.day_total = 0.0
+        self.ewma = 0.0
+        self.days = 0  # closed days folded into ewma/mean/m2
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.period = period
+        self.period_days = calendar.monthrange(*period)[1]
+        self.period_spent = 0.0
+        self.period_income = 0.0
+        self.alerted = False
+
+
+def _close_days(ewma: float, days: int, mean: float, m2: float, total: float, gap: int, alpha: float):
+    """Fold one day's total and then `gap` zero-spend days into the running statistics."""
+    ewma = total if days == 0 else alpha * total + (1 - alpha) * ewma
+    days += 1
+    delta = total - mean
+    mean += delta / days
+    m2 += delta * (total - mean)
+    if gap > 0:
+        # k zero days at once: EWMA decays by (1 - alpha)^k, Welford merges a batch with mean 0 and M2 0
+        ewma *= (1 - alpha) ** gap
+        merged = days + gap
+        m2 += mean * mean * days * gap / merged
+        mean *= days / merged
+        days = merged
+    return ewma, days, mean, m2
+
+
+class SpendForecaster:
+    def __init__(self, span_days: int = 7, min_days: int = 3):
+        self.alpha = 2 / (span_days + 1)
+        self.min_days = min_days  # no alerts until this many days of history exist
+        # Keyed by (household_id, user_id): user ids are only unique within a household
+        self.states: dict[tuple[str, str], SpendState] = {}
+        self.budgets: dict[tuple[str, str], float] = {}
+
+    def set_budget(self, household_id: str, user_id: str, monthly_limit: float | None):
+        key = (household_id, user_id)
+        if monthly_limit is None:
+            self.budgets.pop(key, None)
+        else:
+            self.budgets[key] = monthly_limit
+        state = self.states.get(key)
+        if state is not None:
+            state.alerted = False  # a new limit gets its own alert
+
+    def reset(self, household_id: str, user_id: str):
+        self.states.pop((household_id, user_id), None)
+
+    def observe(self, household_id: str, user_id: str, amount: float, type: str,
+                when: datetime | date) -> dict | None:
+        """Update the user's state with one transaction; returns an alert when one fires."""
+        key = (household_id, user_id)
+        day = when.toordinal()
+        period = (when.year, when.month)
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = SpendState(day, period)
+        if day > state.day:
+            state.ewma, state.days, state.mean, state.m2 = _close_days(
+                state.ewma, state.days, state.mean, state.m2, state.day_total, day - state.day - 1, self.alpha)
+            state.day, state.day_total = day, 0.0
+        if period > state.period:
+            state.period, state.period_spent, state.period_income, state.alerted = period, 0.0, 0.0, False
+            state.period_days = calendar.monthrange(*period)[1]
+        elif period < state.period:
+            return None  # backdated into a month we have already closed
+
+        if type == "income":
+            state.period_income += abs(amount)
+            return None
+        spent = abs(amount)
+        state.period_spent += spent
+        if day == state.day:
+            state.day_total += spent
+        # Late rows for an earlier day of this month count towards the month but not the daily rate
+
+        limit = self.budgets.get(key)
+        if limit is None or state.alerted or state.days < self.min_days:
+            return None
+        # Cheap check first: the full forecast is only built when the alert actually fires
+        if state.period_spent + state.ewma * (state.period_days - when.day) <= limit:
+            return None
+        state.alerted = True
+        return {"type": "forecast.alert", **self._project(key, state, when)}
+
+    def forecast(self, household_id: str, user_id: str, as_of: datetime | date) -> dict | None:
+        key = (household_id, user_id)
+        state = self.states.get(key)
+        if state is None:
+            return None
+        return self._project(key, state, as_of)
+
+    def _project(self, key: tuple[str, str], state: SpendState, as_of: datetime | date) -> dict:
+        ewma, days, mean, m2 = state.ewma, state.days, state.mean, state.m2
+        today = as_of.toordinal()
+        if today > state.day:
+            # Evaluate as if the open day and the quiet days since were already folded in
+            ewma, days, mean, m2 = _close_days(ewma, days, mean, m2, state.day_total, today - state.day - 1, self.alpha)
+        elif days == 0:
+            ewma = state.day_total  # first day of history: today's spend is the only signal
+        same_period = (as_of.year, as_of.month) == state.period
+        spent = state.period_spent if same_period else 0.0
+        income = state.period_income if same_period else 0.0
+
+        remaining = calendar.monthrange(as_of.year, as_of.month)[1] - as_of.day
+        variance = m2 / (days - 1) if days > 1 else 0.0
+        projected = spent + ewma * remaining
+        limit = self.budgets.get(key)
+        return {
+            "user_id": key[1],
+            "period": f"{as_of.year:04d}-{as_of.month:02d}",
+            "as_of": date.fromordinal(today).isoformat(),
+            "spent": round(spent, 2),
+            "income": round(income, 2),
+            "daily_rate": round(ewma, 2),
+            "days_remaining": remaining,
+            "projected_spend": round(projected, 2),
+            "projected_spend_p95": round(projected + Z_95 * math.sqrt(variance * remaining), 2),
+            "projected_balance": round(income - projected, 2),
+            "monthly_limit": limit,
+        }
@@ -0,0 +1,123 @@
+"""Exchange rates from local CSV files, cached in memory by date, and whole-column conversion.
+
+Rates are read from FX_DIR (default ./data/fx), never fetched over the network. Every `*.csv`
+file there has the header `date,currency,rate`. A line means that from `date` on, one unit of
+the pivot currency (FX_PIVOT, USD unless set) buys `rate` units of `currency`. Each line holds
+until that currency's next line, so a currency's rates are contiguous periods. When two lines
+give the same currency and date, the one read last wins; files are read in name order. Drop
+new files in the directory and the next conversion picks them up.
+
+Each currency's periods are cached as two sorted NumPy arrays: period start days and rates.
+To convert a column, rows are grouped by source currency. Each group finds its rows' periods
+with one np.searchsorted over the start days, then multiplies by the ratio of the two rates.
+No Python code runs per row.
+
+    python fx.py status
+"""
+import argparse
+import csv
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+FX_DIR = os.environ.get("FX_DIR", "./data/fx")
+FX_PIVOT = os.environ.get("FX_PIVOT", "USD")
+
+
+class MissingRate(ValueError):
+    pass
+
+
+class FxRates:
+    def __init__(self, root: str = FX_DIR, pivot: str = FX_PIVOT):
+        self.root = root
+        self.pivot = pivot
+        self._stamp: tuple | None = None
+        self._periods: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _files(self) -> list[str]:
+        try:
+            return sorted(entry.path for entry in os.scandir(self.root) if entry.name.endswith(".csv"))
+        except FileNotFoundError:
+            return []
+
+    def _load(self, paths: list[str]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        by_currency: dict[str, dict[str, float]] = {}
+        for path in paths:
+            with open(path, newline="", encoding="utf-8") as f:
+                for line, row in enumerate(csv.DictReader(f), start=2):
+                    try:
+                        day = date.fromisoformat(row["date"]).isoformat()
+                        currency, rate = row["currency"].strip().upper(), float(row["rate"])
+                    except (KeyError, TypeError, ValueError) as exc:
+                        raise ValueError(f"{path}:{line}: expected date,currency,rate ({exc})") from None
+                    if not rate > 0:
+                        raise ValueError(f"{path}:{line}: rate must be positive")
+                    by_currency.setdefault(currency, {})[day] = rate
+        periods = {}
+        for currency, rates in by_currency.items():
+            days = sorted(rates)
+            periods[currency] = (np.array(days, dtype="datetime64[D]"), np.array([rates[d] for d in days]))
+        return periods
+
+    def periods(self) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """{currency: (period start days, rates)}, reloaded when a file is added, removed or changed."""
+        paths = self._files()
+        stamp = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+        with self._lock:
+            if stamp != self._stamp:
+                self._periods = self._load(paths)
+                self._stamp = stamp
+            return self._periods
+
+    def rates(self, currency: str, days: np.ndarray) -> np.ndarray:
+        """Units of `currency` per unit of the pivot on each of `days` (datetime64[D])."""
+        if currency == self.pivot:
+            return np.ones(len(days))
+        found = self.periods().get(currency)
+        if found is None:
+            raise MissingRate(f"No exchange rates for {currency}")
+        starts, rates = found
+        index = np.searchsorted(starts, days, side="right") - 1
+        if len(index) and index.min() < 0:
+            raise MissingRate(f"No {currency} rate on or before {days[index < 0].min()}")
+        return rates[index]
+
+    def convert_coded(self, amounts: np.ndarray, codes: np.ndarray, currencies: list[str], dates: np.ndarray,
+                      to: str) -> np.ndarray:
+        """Convert `amounts` to `to`; row i is in `currencies[codes[i]]` and dated `dates[i]`."""
+        converted = np.array(amounts, dtype=np.float64)
+        days = np.asarray(dates).astype("datetime64[D]")
+        for code, currency in enumerate(currencies):
+            if currency == to:
+                continue
+            rows = np.flatnonzero(codes == code)
+            if not len(rows):
+                continue
+            on = days[rows]
+            converted[rows] *= self.rates(to, on) / self.rates(currency, on)
+        return converted
+
+    def convert(self, amounts: np.ndarray, currencies: np.ndarray, dates: np.ndarray, to: str) -> np.ndarray:
+        """Like convert_coded, with each row's currency code given directly."""
+        names, codes = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        return self.convert_coded(amounts, codes, names.tolist(), dates, to)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the local exchange rate tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list the periods loaded for each currency")
+    parser.parse_args()
+
+    fx = FxRates()
+    print(f"pivot {fx.pivot}, rates from {os.path.abspath(fx.root)}")
+    for currency, (starts, rates) in sorted(fx.periods().items()):
+        print(f"{currency:<4} {len(starts):>6} periods  {starts[0]} .. {starts[-1]}  latest {rates[-1]:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Columnar in-memory cache of each active user's recent transactions.
+
+"The last 90 days for this user" is the most common read. Through the ORM every row becomes a
+full Transaction instance with its SQLAlchemy state attached. Here a cached user's rows live in
+parallel NumPy arrays, sorted by date: ids, dates, amounts, currency, type and category codes, and the
+offsets into one UTF-8 buffer that holds the descriptions. A row costs a few dozen bytes. Reads
+slice the arrays from a binary search on the date and return light `__slots__` rows.
+
+Writes call `add`, `remove` and `set_category`, which keep cached users consistent with their
+shard. A user who is not cached is loaded from the shard on their next read. Once the cache is
+over its byte budget, the least recently read users are evicted first.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable
+
+import numpy as np
+
+RECENT_DAYS = int(os.environ.get("RECENT_DAYS", "90"))
+RECENT_CACHE_BYTES = int(os.environ.get("RECENT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# (id, description, amount, type, category, date, currency), the order loaders and writers pass rows in
+Row = tuple[int, str, float, str, str | None, datetime, str]
+
+
+def _naive_utc(when: datetime) -> datetime:
+    # Shards store naive UTC; aware values from callers are converted to match
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when
+
+
+class RecentRow:
+    """Read-only view of one cached row, shaped like TransactionResponse."""
+    __slots__ = ("id", "user_id", "description", "amount", "currency", "type", "category", "date")
+
+    def __init__(self, id, user_id, description, amount, currency, type, category, date):
+        self.id = id
+        self.user_id = user_id
+        self.description = description
+        self.amount = amount
+        self.currency = currency
+        self.type = type
+        self.category = category
+        self.date = date
+
+
+_COLUMNS = ("ids", "dates", "amounts", "currencies", "types", "categories", "starts", "lengths")
+
+
+class _UserRows:
+    __slots__ = ("ids", "dates", "amounts", "currencies", "types", "categories", "starts", "lengths", "text", "since")
+
+    def nbytes(self) -> int:
+        # Whole objects, headers included, so the budget reflects what the process actually holds
+        return sys.getsizeof(self) + sys.getsizeof(self.text) + sum(
+            sys.getsizeof(getattr(self, name)) for name in _COLUMNS)
+
+    def take(self, index: np.ndarray):
+        for name in _COLUMNS:
+            column = getattr(self, name)[index]
+            # A sliced view would pin the old array and hide it from nbytes()
+            setattr(self, name, column.copy() if column.base is not None else column)
+
+    def compact(self):
+        # Deletes and trims leave dead description bytes behind; rewrite once they are the majority
+        live = int(self.lengths.sum())
+        if live * 2 >= len(self.text):
+            return
+        text = bytes(self.text)
+        self.text = bytearray(b"".join(text[s:s + n] for s, n in zip(self.starts.tolist(), self.lengths.tolist())))
+        self.starts = np.zeros_like(self.lengths)
+        np.cumsum(self.lengths[:-1], out=self.starts[1:])
+
+
+class RecentTransactionCache:
+    def __init__(self, days: int = RECENT_DAYS, max_bytes: int = RECENT_CACHE_BYTES):
+        self.days = days
+        self.max_bytes = max_bytes
+        self._users: OrderedDict[tuple[str, str], _UserRows] = OrderedDict()
+        self._sizes: dict[tuple[str, str], int] = {}
+        self._bytes = 0
+        # Currencies, types and categories are interned cache-wide; code 0 stands for None
+        self._labels: list[str | None] = [None]
+        self._codes: dict[str | None, int] = {None: 0}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _code(self, label: str | None) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self._labels)
+            self._labels.append(label)
+        return code
+
+    def _block(self, rows: list[Row], since: datetime) -> _UserRows:
+        block = _UserRows()
+        encoded = [(row[1] or "").encode() for row in rows]
+        block.ids = np.fromiter((row[0] for row in rows), np.int64, len(rows))
+        block.dates = np.array([_naive_utc(row[5]) for row in rows], dtype="datetime64[us]")
+        block.amounts = np.fromiter((row[2] for row in rows), np.float64, len(rows))
+        block.currencies = np.fromiter((self._code(row[6]) for row in rows), np.int32, len(rows))
+        block.types = np.fromiter((self._code(row[3]) for row in rows), np.int32, len(rows))
+        block.categories = np.fromiter((self._code(row[4]) for row in rows), np.int32, len(rows))
+        block.lengths = np.fromiter(map(len, encoded), np.int32, len(rows))
+        block.starts = np.zeros_like(block.lengths)
+        np.cumsum(block.lengths[:-1], out=block.starts[1:])
+        block.text = bytearray(b"".join(encoded))
+        block.since = np.datetime64(_naive_utc(since), "us")
+        return block
+
+    def _resize(self, key: tuple[str, str], block: _UserRows):
+        size = block.nbytes()
+        self._bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        # Least recently read first, never the block just touched
+        while self._bytes > self.max_bytes and len(self._users) > 1:
+            evicted, _ = self._users.popitem(last=False)
+            self._bytes -= self._sizes.pop(evicted)
+            self.evictions += 1
+
+    def get(self, household_id: str, user_id: str, days: int, now: datetime,
+            load: Callable[[datetime], Iterable[Row]]) -> list[RecentRow]:
+        """Rows dated within `days` of `now`, oldest first; `load(since)` fetches an uncached user from the shard."""
+        if days > self.days:
+            raise ValueError(f"Only the last {self.days} days are cached")
+        now = _naive_utc(now)
+        key = (household_id, user_id)
+        with self._lock:
+            block = self._users.get(key)
+            if block is None:
+                self.misses += 1
+                since = now - timedelta(days=self.days)
+                block = self._users[key] = self._block(list(load(since)), since)
+                self._resize(key, block)
+            else:
+                self.hits += 1
+                self._users.move_to_end(key)
+            first = int(np.searchsorted(block.dates, np.datetime64(now - timedelta(days=days), "us")))
+            labels, text = self._labels, block.text
+            return [
+                RecentRow(id, user_id, text[start:start + length].decode(), amount, labels[currency_code],
+                          labels[type_code], labels[category_code], date)
+                for id, start, length, amount, currency_code, type_code, category_code, date in zip(
+                    block.ids[first:].tolist(), block.starts[first:].tolist(), block.lengths[first:].tolist(),
+                    block.amounts[first:].tolist(), block.currencies[first:].tolist(), block.types[first:].tolist(),
+                    block.categories[first:].tolist(), block.dates[first:].tolist())
+            ]
+
+    def add(self, household_id: str, user_id: str, rows: list[Row]):
+        """Fold newly written rows into a cached user; uncached users pick them up when loaded."""
+        key = (household_id, user_id)
+        with self._lock:
+            block = self._users.get(key)
+            if block is None:
+                return
+            new = self._block(rows, block.since.item())
+            # A block loaded after the rows were committed (an import from the worker) already holds them
+            keep = (new.dates >= block.since) & ~np.isin(new.ids, block.ids)
+            if not keep.all():
+                new.take(keep)
+            if not len(new.ids):
+                return
+            appended = len(block.ids) == 0 or new.dates.min() >= block.dates[-1]
+            new.starts += len(block.text)
+            block.text += new.text
+            for name in _COLUMNS:
+                setattr(block, name, np.concatenate([getattr(block, name), getattr(new, name)]))
+            if not appended or not np.all(new.dates[1:] >= new.dates[:-1]):
+                # Backdated rows: restore (date, id) order
+                block.take(np.lexsort((block.ids, block.dates)))
+            self._trim(block)
+            self._resize(key, block)
+
+    def _trim(self, block: _UserRows):
+        # Rows that slid out of the window are dropped as writes arrive, so a cached user stays bounded
+        cutoff = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.days), "us")
+        if block.since < cutoff:
+            first = int(np.searchsorted(block.dates, cutoff))
+            if first:
+                block.take(slice(first, None))
+            block.since = cutoff
+        block.compact()
+
+    def remove(self, household_id: str, user_id: str, transaction_id: int):
+        key = (household_id, user_id)
+        with self._lock:
+            block = self._users.get(key)
+            if block is None:
+                return
+            keep = block.ids != transaction_id
+            if not keep.all():
+                block.take(keep)
+                block.compact()
+                self._resize(key, block)
+
+    def set_category(self, household_id: str, user_id: str, transaction_id: int, category: str | None):
+        with self._lock:
+            block = self._users.get((household_id, user_id))
+            if block is not None:
+                block.categories[block.ids == transaction_id] = self._code(category)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = sum(len(block.ids) for block in self._users.values())
+            return {
+                "users": len(self._users),
+                "rows": rows,
+                "bytes": self._bytes,
+                "bytes_per_row": self._bytes / rows if rows else 0.0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
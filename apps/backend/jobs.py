@@ -0,0 +1,417 @@
+"""Persistent background job queue for work that should not run inside a request.
+
+Jobs are rows in a SQLite file of their own, separate from the household shards. Request
+handlers enqueue a job and return its id straight away. Worker processes started with
+`python jobs.py work` claim the highest-priority runnable job in a single UPDATE, so two
+workers never take the same job, and then run the handler registered for its kind.
+
+While a job runs the worker holds a lease on it and renews the lease on every progress
+report. A job whose worker died is claimed again once the lease runs out. A handler that
+raises is retried with exponential backoff until `max_attempts`, then marked failed. Handlers
+can save a checkpoint with their progress, and a retried job resumes from it.
+
+    python jobs.py work --processes 2
+    python jobs.py enqueue archive --payload '{"months": 12}' --priority 5
+    python jobs.py status
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from datetime import date
+from typing import Callable
+
+from sqlalchemy import Column, Float, Index, Integer, String, Text, create_engine, event, func, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, sessionmaker
+
+from archive import ColdArchive, archive_shard, months_before
+from categorizer import get_categorizer
+from models import ImportCheckpoint, Transaction, allocate_versions, init_schema
+from sharding import ShardRouter
+
+JOBS_DB = os.environ.get("JOBS_DB", "./data/jobs.sqlite")  # not *.db, so it is never mistaken for a shard
+LEASE_SECONDS = 60.0
+BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 600.0
+IMPORT_BATCH = 1000
+
+STATUSES = ("queued", "running", "done", "failed")
+
+JobBase = declarative_base()
+
+
+class Job(JobBase):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    household_id = Column(String, nullable=False, index=True)
+    payload = Column(Text, nullable=False)  # JSON
+    priority = Column(Integer, nullable=False, default=0)  # higher runs first
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    # Times are Unix seconds so queue-wait and run-time arithmetic stays in SQL and floats
+    created = Column(Float, nullable=False)
+    run_after = Column(Float, nullable=False)
+    started = Column(Float, nullable=True)
+    finished = Column(Float, nullable=True)
+    lease_until = Column(Float, nullable=True)
+    worker = Column(String, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    message = Column(String, nullable=True)
+    checkpoint = Column(Text, nullable=True)  # JSON, saved by the handler to resume after a retry
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_after"),
+        Index("ix_jobs_finished", "finished"),
+    )
+
+
+def _configure(dbapi_connection, connection_record):
+    # Many workers poll and write the same file: WAL so reads never wait on a claim
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+class LeaseLost(Exception):
+    """The job was reclaimed by another worker after this worker's lease ran out."""
+
+
+# Handlers run in worker processes: handler(context) -> JSON-serializable result or None
+HANDLERS: dict[str, Callable[["JobContext"], dict | None]] = {}
+
+
+def handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class JobQueue:
+    def __init__(self, path: str = JOBS_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        event.listen(self.engine, "connect", _configure)
+        try:
+            JobBase.metadata.create_all(bind=self.engine)
+        except OperationalError:
+            # Another process created the table between the existence check and the CREATE
+            JobBase.metadata.create_all(bind=self.engine)
+        self._sessions = sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def session(self) -> Session:
+        return self._sessions()
+
+    def enqueue(self, kind: str, payload: dict, household_id: str, priority: int = 0,
+                max_attempts: int = 3, delay: float = 0.0) -> Job:
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job = Job(kind=kind, household_id=household_id, payload=json.dumps(payload), priority=priority,
+                  max_attempts=max_attempts, created=now, run_after=now + delay)
+        with self.session() as db:
+            db.add(job)
+            db.commit()
+        return job
+
+    def get(self, job_id: int) -> Job | None:
+        with self.session() as db:
+            return db.get(Job, job_id)
+
+    def list(self, household_id: str, status: str | None = None, limit: int = 100) -> list[Job]:
+        query = select(Job).where(Job.household_id == household_id)
+        if status is not None:
+            query = query.where(Job.status == status)
+        with self.session() as db:
+            return db.execute(query.order_by(Job.id.desc()).limit(limit)).scalars().all()
+
+    def claim(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Job | None:
+        """Take the best runnable job, or one whose worker's lease ran out; None when there is nothing to do."""
+        now = time.time()
+        runnable = (
+            select(Job.id)
+            .where(((Job.status == "queued") & (Job.run_after <= now))
+                   | ((Job.status == "running") & (Job.lease_until < now)))
+            .order_by(Job.priority.desc(), Job.run_after, Job.id).limit(1)
+            .scalar_subquery()
+        )
+        with self.session() as db:
+            # A job that keeps killing its worker stops being reclaimed once its attempts are used up
+            db.execute(update(Job).where(Job.status == "running", Job.lease_until < now,
+                                         Job.attempts >= Job.max_attempts)
+                       .values(status="failed", finished=now, lease_until=None, error="worker lease expired"))
+            # One statement picks and marks the job, so concurrent workers cannot both get it
+            job = db.execute(
+                update(Job).where(Job.id == runnable)
+                .values(status="running", worker=worker, lease_until=now + lease_seconds, started=now,
+                        attempts=Job.attempts + 1)
+                .returning(Job)
+            ).scalar_one_or_none()
+            db.commit()
+            return job
+
+    def heartbeat(self, job_id: int, worker: str, progress: float | None = None, message: str | None = None,
+                  checkpoint: dict | None = None, lease_seconds: float = LEASE_SECONDS):
+        values = {"lease_until": time.time() + lease_seconds}
+        if progress is not None:
+            values["progress"] = max(0.0, min(1.0, progress))
+        if message is not None:
+            values["message"] = message
+        if checkpoint is not None:
+            values["checkpoint"] = json.dumps(checkpoint)
+        with self.session() as db:
+            updated = db.execute(
+                update(Job).where(Job.id == job_id, Job.worker == worker, Job.status == "running").values(**values)
+            ).rowcount
+            db.commit()
+        if not updated:
+            raise LeaseLost(f"job {job_id} is no longer held by {worker}")
+
+    def complete(self, job_id: int, worker: str, result: dict | None):
+        with self.session() as db:
+            db.execute(
+                update(Job).where(Job.id == job_id, Job.worker == worker, Job.status == "running")
+                .values(status="done", progress=1.0, finished=time.time(), lease_until=None,
+                        result=json.dumps(result) if result is not None else None, error=None)
+            )
+            db.commit()
+
+    def fail(self, job_id: int, worker: str, error: str):
+        """Requeue with exponential backoff and jitter, or mark failed once attempts are used up."""
+        now = time.time()
+        with self.session() as db:
+            job = db.get(Job, job_id)
+            if job is None or job.worker != worker or job.status != "running":
+                return
+            if job.attempts < job.max_attempts:
+                backoff = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+                job.status = "queued"
+                job.run_after = now + backoff * random.uniform(0.5, 1.0)
+                job.message = f"attempt {job.attempts} failed, retrying"
+            else:
+                job.status = "failed"
+                job.finished = now
+            job.lease_until = None
+            job.error = error
+            db.commit()
+
+    def metrics(self, window: int = 1000) -> dict:
+        """Queue depth by status and priority, and wait and run times over the last `window` finished jobs."""
+        now = time.time()
+        with self.session() as db:
+            depth = dict(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+            queued_by_priority = dict(db.execute(
+                select(Job.priority, func.count()).where(Job.status == "queued").group_by(Job.priority)).all())
+            oldest = db.execute(select(func.min(Job.created)).where(Job.status == "queued")).scalar()
+            recent = db.execute(
+                select(Job.status, Job.created, Job.started, Job.finished, Job.attempts)
+                .where(Job.finished.is_not(None)).order_by(Job.finished.desc()).limit(window)
+            ).all()
+        waits = sorted(r.started - r.created for r in recent)
+        runs = sorted(r.finished - r.started for r in recent)
+        return {
+            "depth": {status: depth.get(status, 0) for status in STATUSES},
+            "queued_by_priority": {str(p): n for p, n in sorted(queued_by_priority.items(), reverse=True)},
+            "oldest_queued_seconds": now - oldest if oldest is not None else 0.0,
+            "finished": len(recent),
+            "failed": sum(r.status == "failed" for r in recent),
+            "retried": sum(r.attempts > 1 for r in recent),
+            # started is the last attempt's start, so wait includes time spent in backoff
+            "wait_seconds": {"p50": _percentile(waits, 0.5), "p95": _percentile(waits, 0.95),
+                             "max": waits[-1] if waits else 0.0},
+            "run_seconds": {"p50": _percentile(runs, 0.5), "p95": _percentile(runs, 0.95),
+                            "max": runs[-1] if runs else 0.0},
+        }
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class JobContext:
+    """What a handler sees: its payload, the last checkpoint, and a way to report progress."""
+
+    def __init__(self, queue: JobQueue, job: Job, worker: str):
+        self.queue = queue
+        self.job_id = job.id
+        self.household_id = job.household_id
+        self.worker = worker
+        self.payload = json.loads(job.payload)
+        self.checkpoint = json.loads(job.checkpoint) if job.checkpoint else None
+        self.attempt = job.attempts
+
+    def progress(self, fraction: float, message: str | None = None, checkpoint: dict | None = None):
+        # Also renews the lease; raises LeaseLost if another worker has taken the job over
+        self.queue.heartbeat(self.job_id, self.worker, fraction, message, checkpoint)
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+
+
+def run_one(queue: JobQueue, worker: str) -> bool:
+    """Claim and run a single job; False when the queue had nothing runnable."""
+    job = queue.claim(worker)
+    if job is None:
+        return False
+    fn = HANDLERS.get(job.kind)
+    if fn is None:
+        queue.fail(job.id, worker, f"no handler for job kind {job.kind!r}")
+        return True
+    try:
+        result = fn(JobContext(queue, job, worker))
+    except LeaseLost:
+        return True  # whoever holds the job now finishes it
+    except Exception:
+        queue.fail(job.id, worker, traceback.format_exc(limit=5))
+        return True
+    queue.complete(job.id, worker, result)
+    return True
+
+
+def work(path: str = JOBS_DB, poll_seconds: float = 0.5, stop: Callable[[], bool] = lambda: False):
+    queue = JobQueue(path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while not stop():
+        if not run_one(queue, worker):
+            time.sleep(poll_seconds)
+
+
+def _work_process(path: str, poll_seconds: float):
+    stopping = []
+    # Finish the job in hand on SIGTERM/SIGINT instead of abandoning it to lease expiry
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+    work(path, poll_seconds, stop=lambda: bool(stopping))
+
+
+def start_pool(processes: int, path: str = JOBS_DB, poll_seconds: float = 0.5) -> list[multiprocessing.Process]:
+    JobQueue(path)  # create the schema once, before the workers race to
+    pool = [multiprocessing.Process(target=_work_process, args=(path, poll_seconds), daemon=True)
+            for _ in range(processes)]
+    for process in pool:
+        process.start()
+    return pool
+
+
+# Handlers -------------------------------------------------------------------------------------
+
+_router: ShardRouter | None = None
+
+
+def _shard_router() -> ShardRouter:
+    # One router per worker process, created after the fork
+    global _router
+    if _router is None:
+        _router = ShardRouter(init_schema=init_schema)
+    return _router
+
+
+@handler("import")
+def import_transactions(context: JobContext) -> dict:
+    """Insert a large batch of transactions for one household, IMPORT_BATCH rows per commit."""
+    rows = context.payload["transactions"]
+    model = get_categorizer()
+    with _shard_router().session(context.household_id) as db:
+        # The shard's copy of the checkpoint commits with each batch, so it is the one to resume from;
+        # the job's copy may be a batch behind if the worker died between the two
+        saved = db.get(ImportCheckpoint, context.job_id)
+        if saved is None:
+            saved = ImportCheckpoint(job_id=context.job_id, offset=0, batches="[]")
+            db.add(saved)
+        # Version ranges of committed batches, so the API process can pick up exactly these rows
+        state = {"offset": saved.offset, "batches": json.loads(saved.batches)}
+        while state["offset"] < len(rows):
+            batch = rows[state["offset"]:state["offset"] + IMPORT_BATCH]
+            first_version = allocate_versions(db, len(batch))
+            transactions = [Transaction(**row, household_id=context.household_id, version=first_version + i)
+                            for i, row in enumerate(batch)]
+            uncategorized = [t for t in transactions if not t.category]
+            if model is not None and uncategorized:
+                for transaction, category in zip(uncategorized,
+                                                 model.predict([t.description for t in uncategorized])):
+                    transaction.category = category
+            db.add_all(transactions)
+            state = {"offset": state["offset"] + len(batch),
+                     "batches": state["batches"] + [[first_version, first_version + len(batch) - 1]]}
+            saved.offset, saved.batches = state["offset"], json.dumps(state["batches"])
+            db.commit()
+            context.progress(state["offset"] / len(rows), f"{state['offset']} of {len(rows)} rows", state)
+    return {"inserted": state["offset"], "batches": state["batches"]}
+
+
+@handler("archive")
+def archive_cold_months(context: JobContext) -> dict:
+    """Move every shard's rows older than the retention window into the Parquet archive."""
+    months = int(context.payload.get("months", 12))
+    cutoff = months_before(date.today(), months - 1)
+    router, archive = _shard_router(), ColdArchive()
+    shards = router.shards()
+    done = set((context.checkpoint or {}).get("shards", []))
+    moved = 0
+    for shard in shards:
+        if shard in done:
+            continue
+        moved += archive_shard(router, archive, shard, cutoff, vacuum=bool(context.payload.get("vacuum")))
+        done.add(shard)
+        context.progress(len(done) / len(shards), f"{shard}: archived", {"shards": sorted(done)})
+    return {"shards": len(shards), "archived_rows": moved, "cutoff": cutoff.isoformat()}
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and inspect the background job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("work", help="start a pool of worker processes")
+    run.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    run.add_argument("--poll", type=float, default=0.5, help="seconds between polls of an empty queue")
+    enqueue = commands.add_parser("enqueue", help="queue a job")
+    enqueue.add_argument("kind", choices=sorted(HANDLERS))
+    enqueue.add_argument("--payload", default="{}")
+    enqueue.add_argument("--household", default="default")
+    enqueue.add_argument("--priority", type=int, default=0)
+    commands.add_parser("status", help="print queue depth and latency metrics")
+    args = parser.parse_args()
+
+    if args.command == "work":
+        pool = start_pool(args.processes, poll_seconds=args.poll)
+        print(f"started {len(pool)} workers on {JOBS_DB}")
+        signal.signal(signal.SIGTERM, _interrupt)
+        try:
+            while True:
+                time.sleep(1.0)
+                # Replace workers that crashed; their jobs come back when the lease runs out
+                for i, process in enumerate(pool):
+                    if not process.is_alive():
+                        print(f"worker {process.pid} exited with {process.exitcode}, restarting")
+                        pool[i] = start_pool(1, poll_seconds=args.poll)[0]
+        except KeyboardInterrupt:
+            for process in pool:
+                process.terminate()  # each worker finishes the job in hand, then exits
+            for process in pool:
+                process.join()
+        return
+    if args.command == "enqueue":
+        job = JobQueue().enqueue(args.kind, json.loads(args.payload), args.household, args.priority)
+        print(f"queued job {job.id} ({job.kind}, priority {job.priority})")
+        return
+    print(json.dumps(JobQueue().metrics(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
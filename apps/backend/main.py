@@ -1,35 +1,48 @@
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from datetime import datetime, timezone
+from fastapi import FastAPI, HTTPException, Depends, Header, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
+from typing import Any
+import asyncio
+import hmac
 import httpx
+import json
+import numpy as np
+import os
+import time
 
-# Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/sql_app.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+from admission import CircuitBreaker, Overloaded, RouteLimiter
+from analytics import MAX_BINS
+from archive import COLUMNS as ARCHIVE_COLUMNS, ColdArchive
+from categorizer import get_categorizer
+from changefeed import ChangeBroadcaster, event_stream
+from forecasting import SpendForecaster
+from fx import FxRates, MissingRate
+from hotset import RECENT_DAYS, RecentTransactionCache
+from jobs import HANDLERS as JOB_HANDLERS, Job, JobQueue
+from models import (DEFAULT_CURRENCY, Budget, CategoryCorrection, HouseholdMove, ImportCheckpoint, SyncState,
+                    TombstonePurge, Transaction, allocate_versions, init_schema)
+from profiler import FORMATS as PROFILE_FORMATS, ProfileRequestMiddleware, ProfileStore, SamplingProfiler
+from recurring import RecurringDetector
+from sharding import DEFAULT_HOUSEHOLD, ShardRouter
 
-# Database model
-class Transaction(Base):
-    __tablename__ = "transactions"
-
-    id = Column(Integer, primary_key=True, index=True)
-    description = Column(String, index=True)
-    amount = Column(Float)
-    type = Column(String) # e.g., 'income', 'expense'
-    date = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Database setup: one SQLite file per household (or per hashed shard), opened on demand
+shard_router = ShardRouter(init_schema=init_schema)
+# Closed months moved out of the shard files by `python archive.py run`; read-only
+cold_archive = ColdArchive()
+# Exchange rate tables from local CSV files, for totals over rows in several currencies
+fx_rates = FxRates()
 
 # Pydantic models for request/response
 class TransactionCreate(BaseModel):
+    user_id: str = "default"
     description: str
     amount: float
+    currency: str = DEFAULT_CURRENCY
     type: str
+    category: str | None = None
 
 class TransactionResponse(TransactionCreate):
     id: int
@@ -38,47 +51,664 @@ class TransactionResponse(TransactionCreate):
     class Config:
         from_attributes = True
 
+class TransactionChange(BaseModel):
+    id: int
+    version: int
+    deleted: bool
+    user_id: str | None = None
+    description: str | None = None
+    amount: float | None = None
+    currency: str | None = None
+    type: str | None = None
+    category: str | None = None
+    date: datetime | None = None
+
+class SyncResponse(BaseModel):
+    changes: list[TransactionChange]
+    version: int  # pass back as `since` on the next sync; negative while a sync from 0 has more pages
+    has_more: bool
+    shard: str  # versions are per shard
+    resync: bool = False  # drop every local row and apply these changes as a sync from version 0
+
+class CategoryUpdate(BaseModel):
+    category: str
+
+class BudgetUpdate(BaseModel):
+    monthly_limit: float
+
+class Forecast(BaseModel):
+    user_id: str
+    period: str
+    as_of: str
+    spent: float
+    income: float
+    daily_rate: float
+    days_remaining: int
+    projected_spend: float
+    projected_spend_p95: float
+    projected_balance: float
+    monthly_limit: float | None = None
+
+class RecurringSeriesResponse(BaseModel):
+    user_id: str
+    merchant: str
+    type: str
+    period: str
+    interval_days: float
+    amount: float
+    occurrences: int
+    first_date: date
+    last_date: date
+    next_expected: date
+    transaction_ids: list[int]
+
+    class Config:
+        from_attributes = True
+
+class SummaryRow(BaseModel):
+    key: str | None
+    count: int
+    total: float
+    currency: str
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: dict = {}
+    priority: int = 0
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    progress: float
+    message: str | None = None
+    error: str | None = None
+    result: dict | None = None
+    created: datetime
+    started: datetime | None = None
+    finished: datetime | None = None
+
 class NumbersToSum(BaseModel):
     values: list[float]
 
 class SumResult(BaseModel):
     sum: float
 
+class AnalyticsOperation(BaseModel):
+    id: str
+    op: str
+    series: str
+    q: list[float] = []
+    bins: int | None = Field(None, ge=1, le=MAX_BINS)
+    range: tuple[float, float] | None = None
+    by: str | None = None
+
+class AnalyticsRequest(BaseModel):
+    series: dict[str, list[float]] = {}
+    keys: dict[str, list[str]] = {}
+    operations: list[AnalyticsOperation]
+
+class AnalyticsResult(BaseModel):
+    id: str
+    op: str
+    value: Any = None
+    error: str | None = None
+    elapsed_us: float
+
+class AnalyticsResponse(BaseModel):
+    results: list[AnalyticsResult]
+    elapsed_us: float  # inside the engine
+    round_trip_us: float  # as seen from here, including the network and (de)serialization
+
 app = FastAPI()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
+# Admin routes (profiling) need X-Admin-Token to match ADMIN_TOKEN; without ADMIN_TOKEN they are disabled
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+def admin_token_ok(token: str | None) -> bool:
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str, and headers arrive as latin-1
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(
+        token.encode("utf-8", "surrogateescape"), ADMIN_TOKEN.encode("utf-8", "surrogateescape"))
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    if not admin_token_ok(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Finished profiles, from POST /admin/profile or from any request sent with X-Profile
+profiles = ProfileStore()
+app.add_middleware(ProfileRequestMiddleware, store=profiles, authorize=admin_token_ok)
+
+# Admission control: past these limits a request gets a fast 503 instead of waiting indefinitely.
+# Handlers run database calls on the event loop, so reads + writes in flight stay under the
+# 15-connection SQLAlchemy pool: past that, checkout blocks the loop that would release connections.
+route_limiters = {
+    "reads": RouteLimiter("transactions-read", max_concurrent=8, max_queue=64, queue_timeout=1.0),
+    "writes": RouteLimiter("transactions-write", max_concurrent=4, max_queue=32, queue_timeout=2.0),
+    "rust": RouteLimiter("rust-engine", max_concurrent=16, max_queue=32, queue_timeout=0.5),
+}
+RUST_ENGINE_URL = os.environ.get("RUST_ENGINE_URL", "http://localhost:8001")
+RUST_TIMEOUT_SECONDS = 2.0
+rust_breaker = CircuitBreaker("rust-engine", failure_threshold=5, reset_seconds=10.0)
+_rust_client: tuple[asyncio.AbstractEventLoop, httpx.AsyncClient] | None = None
+
+def rust_client() -> httpx.AsyncClient:
+    # One pooled client per event loop: building a client (and its SSL context) per call costs
+    # more CPU than the call itself
+    global _rust_client
+    loop = asyncio.get_running_loop()
+    if _rust_client is None or _rust_client[0] is not loop:
+        _rust_client = (loop, httpx.AsyncClient(base_url=RUST_ENGINE_URL, timeout=RUST_TIMEOUT_SECONDS,
+                                                limits=httpx.Limits(max_connections=64)))
+    return _rust_client[1]
+
+def _overloaded(exc: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=exc.reason, headers={"Retry-After": exc.retry_after_header})
+
+def _admission(limiter: RouteLimiter):
+    async def admit():
+        try:
+            await limiter.acquire()
+        except Overloaded as exc:
+            raise _overloaded(exc)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            limiter.release(time.monotonic() - started)
+    return admit
+
+admit_reads = _admission(route_limiters["reads"])
+admit_writes = _admission(route_limiters["writes"])
+admit_rust = _admission(route_limiters["rust"])
+
+# Family members subscribe to this instead of re-polling GET /transactions/
+change_feed = ChangeBroadcaster()
+
+def get_household(x_household_id: str = Header(DEFAULT_HOUSEHOLD)) -> str:
+    try:
+        shard_router.shard_for(x_household_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return x_household_id
+
+# Dependency to get a DB session on the caller's household shard
+def get_db(household: str = Depends(get_household)):
+    db = shard_router.session(household)
     try:
         yield db
     finally:
         db.close()
 
+# Running spend statistics per user, rebuilt once at startup and then updated on every insert
+forecaster = SpendForecaster()
+
+def replay_history(db: Session, household_id: str | None = None, user_id: str | None = None):
+    query = select(Transaction.household_id, Transaction.user_id, Transaction.amount, Transaction.type,
+                   Transaction.date).where(Transaction.deleted.is_(False)).order_by(Transaction.date)
+    if household_id is not None:
+        query = query.where(Transaction.household_id == household_id, Transaction.user_id == user_id)
+    for row in db.execute(query).yield_per(10000):
+        forecaster.observe(row.household_id, row.user_id, row.amount, row.type, row.date)
+
+# Subscriptions and other repeating charges, detected over full history once and then incrementally
+recurring_detector = RecurringDetector()
+
+def _history_rows():
+    columns = ["id", "household_id", "user_id", "description", "amount", "type", "date"]
+    for shard in shard_router.shards():
+        # Archived months first so each user's rows arrive roughly in date order
+        yield from cold_archive.iter_rows(shard, columns)
+        with shard_router.session_for_shard(shard) as db:
+            yield from db.execute(
+                select(Transaction.id, Transaction.household_id, Transaction.user_id, Transaction.description,
+                       Transaction.amount, Transaction.type, Transaction.date).where(Transaction.deleted.is_(False))
+            ).yield_per(10000)
+
+for shard in shard_router.shards():
+    with shard_router.session_for_shard(shard) as db:
+        for budget in db.execute(select(Budget)).scalars():
+            forecaster.set_budget(budget.household_id, budget.user_id, budget.monthly_limit)
+        replay_history(db)
+recurring_detector.rebuild(_history_rows())
+
+# Each active user's last RECENT_DAYS days, kept columnar in memory and updated on every write
+recent_cache = RecentTransactionCache()
+
+def _recent_row(transaction: Transaction):
+    return (transaction.id, transaction.description, transaction.amount, transaction.type, transaction.category,
+            transaction.date, transaction.currency)
+
+def track_new_transactions(transactions: list[Transaction]):
+    by_user = {}
+    for transaction in transactions:
+        by_user.setdefault((transaction.household_id, transaction.user_id), []).append(_recent_row(transaction))
+    for (household, user_id), rows in by_user.items():
+        recent_cache.add(household, user_id, rows)
+    for transaction in transactions:
+        alert = forecaster.observe(transaction.household_id, transaction.user_id, transaction.amount,
+                                   transaction.type, transaction.date)
+        if alert is not None:
+            change_feed.publish(alert, topic=transaction.household_id)
+        recurring_detector.observe(transaction.id, transaction.household_id, transaction.user_id,
+                                   transaction.description, transaction.amount, transaction.type, transaction.date)
+
+# Heavy work goes to worker processes (`python jobs.py work`); handlers only enqueue it
+job_queue = JobQueue()
+
+def _job_response(job: Job) -> JobResponse:
+    def timestamp(seconds):
+        return datetime.fromtimestamp(seconds, timezone.utc) if seconds is not None else None
+    return JobResponse(id=job.id, kind=job.kind, status=job.status, priority=job.priority, attempts=job.attempts,
+                       max_attempts=job.max_attempts, progress=job.progress, message=job.message, error=job.error,
+                       result=json.loads(job.result) if job.result else None, created=timestamp(job.created),
+                       started=timestamp(job.started), finished=timestamp(job.finished))
+
+# Imports queued by this process whose rows have not reached the forecaster, detector and cache yet
+pending_imports: set[tuple[int, str]] = set()
+_import_watcher: asyncio.Task | None = None
+
+def _watch_import(job_id: int, household: str):
+    global _import_watcher
+    pending_imports.add((job_id, household))
+    if _import_watcher is None or _import_watcher.done():
+        _import_watcher = asyncio.get_running_loop().create_task(_apply_finished_imports())
+
+async def _apply_finished_imports(poll_seconds: float = 0.5):
+    while pending_imports:
+        await asyncio.sleep(poll_seconds)
+        for job_id, household in list(pending_imports):
+            job = job_queue.get(job_id)
+            if job is not None and job.status in ("queued", "running"):
+                continue
+            pending_imports.discard((job_id, household))
+            if job is None:
+                continue
+            with shard_router.session(household) as db:
+                # Failed imports may still have committed some batches; those are applied too
+                saved = db.get(ImportCheckpoint, job_id)
+                batches = json.loads(saved.batches) if saved is not None else []
+                if not batches:
+                    continue
+                rows = db.execute(
+                    select(Transaction).where(
+                        Transaction.household_id == household, Transaction.deleted.is_(False),
+                        or_(*(Transaction.version.between(first, last) for first, last in batches)))
+                    .order_by(Transaction.version)
+                ).scalars().all()
+                track_new_transactions(rows)
+            # Clients pull the rows through /sync rather than receiving thousands in one event
+            change_feed.publish({"type": "transactions.imported", "job_id": job_id, "status": job.status,
+                                 "count": len(rows), "version": batches[-1][1]}, topic=household)
+
+def categorize(transactions: list[Transaction]):
+    """Fill in missing categories for a batch with a single model call."""
+    uncategorized = [t for t in transactions if not t.category]
+    model = get_categorizer()
+    if model is None or not uncategorized:
+        return
+    for transaction, category in zip(uncategorized, model.predict([t.description for t in uncategorized])):
+        transaction.category = category
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to your Personal Financial AI Assistant!"}
 
-@app.post("/transactions/", response_model=TransactionResponse)
-async def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
-    db_transaction = Transaction(**transaction.model_dump())
+@app.post("/transactions/", response_model=TransactionResponse, dependencies=[Depends(admit_writes)])
+async def create_transaction(transaction: TransactionCreate, household: str = Depends(get_household),
+                             db: Session = Depends(get_db)):
+    db_transaction = Transaction(**transaction.model_dump(), household_id=household)
+    categorize([db_transaction])
+    db_transaction.version = allocate_versions(db)
     db.add(db_transaction)
     db.commit()
     db.refresh(db_transaction)
+    change_feed.publish({
+        "type": "transaction.created",
+        "transactions": [TransactionResponse.model_validate(db_transaction).model_dump(mode="json")]
+    }, topic=household)
+    track_new_transactions([db_transaction])
+    return db_transaction
+
+@app.post("/transactions/bulk/", response_model=list[TransactionResponse], dependencies=[Depends(admit_writes)])
+async def create_transactions_bulk(transactions: list[TransactionCreate], household: str = Depends(get_household),
+                                   db: Session = Depends(get_db)):
+    first_version = allocate_versions(db, len(transactions))
+    db_transactions = [
+        Transaction(**transaction.model_dump(), household_id=household, version=first_version + i)
+        for i, transaction in enumerate(transactions)
+    ]
+    categorize(db_transactions)
+    db.add_all(db_transactions)
+    db.commit()
+    for db_transaction in db_transactions:
+        db.refresh(db_transaction)
+    # One event for the whole batch rather than one per row
+    change_feed.publish({
+        "type": "transaction.created",
+        "transactions": [TransactionResponse.model_validate(t).model_dump(mode="json") for t in db_transactions]
+    }, topic=household)
+    track_new_transactions(db_transactions)
+    return db_transactions
+
+@app.post("/transactions/import", response_model=JobResponse, status_code=202,
+          dependencies=[Depends(admit_writes)])
+async def import_transactions(transactions: list[TransactionCreate], priority: int = 0,
+                              household: str = Depends(get_household)):
+    # Large imports run in a worker; poll GET /jobs/{id} or wait for transactions.imported on the stream
+    job = job_queue.enqueue("import", {"transactions": [t.model_dump() for t in transactions]}, household,
+                            priority=priority)
+    _watch_import(job.id, household)
+    return _job_response(job)
+
+@app.get("/transactions/stream")
+async def stream_transactions(household: str = Depends(get_household)):
+    return StreamingResponse(
+        event_stream(change_feed, topic=household),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/transactions/", response_model=list[TransactionResponse], dependencies=[Depends(admit_reads)])
+async def read_transactions(skip: int = 0, limit: int = 100, start: datetime | None = None,
+                            end: datetime | None = None, household: str = Depends(get_household),
+                            db: Session = Depends(get_db)):
+    # Archived rows are older than every hot row, so a page is the archived part followed by the hot part
+    shard = shard_router.shard_for(household)
+    archived = []
+    horizon = cold_archive.horizon(shard)
+    if horizon is not None and (start is None or start < horizon):
+        if start is None and end is None:
+            archived_count = cold_archive.count(shard, household)  # from the manifest
+        else:
+            archived_count = cold_archive.read(shard, household, start, end, columns=["id"]).num_rows
+        if skip < archived_count:
+            archived = cold_archive.read(shard, household, start, end, columns=ARCHIVE_COLUMNS,
+                                         skip=skip, limit=limit).to_pylist()
+        skip, limit = max(0, skip - archived_count), limit - len(archived)
+    if limit <= 0:
+        return archived
+
+    query = db.query(Transaction).filter(Transaction.household_id == household, Transaction.deleted.is_(False))
+    if start is not None:
+        query = query.filter(Transaction.date >= start)
+    if end is not None:
+        query = query.filter(Transaction.date < end)
+    return archived + query.order_by(Transaction.date, Transaction.id).offset(skip).limit(limit).all()
+
+@app.get("/transactions/recent", response_model=list[TransactionResponse], dependencies=[Depends(admit_reads)])
+async def read_recent_transactions(user_id: str = "default", days: int = RECENT_DAYS,
+                                   household: str = Depends(get_household), db: Session = Depends(get_db)):
+    if not 0 < days <= recent_cache.days:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {recent_cache.days}")
+
+    def load(since: datetime):
+        return db.execute(
+            select(Transaction.id, Transaction.description, Transaction.amount, Transaction.type,
+                   Transaction.category, Transaction.date, Transaction.currency)
+            .where(Transaction.household_id == household, Transaction.user_id == user_id,
+                   Transaction.deleted.is_(False), Transaction.date >= since)
+            .order_by(Transaction.date, Transaction.id)
+        ).all()
+
+    return recent_cache.get(household, user_id, days, datetime.now(timezone.utc), load)
+
+@app.get("/transactions/summary", response_model=list[SummaryRow], dependencies=[Depends(admit_reads)])
+async def summarize_transactions(group_by: str = "month", start: datetime | None = None, end: datetime | None = None,
+                                 currency: str = DEFAULT_CURRENCY, household: str = Depends(get_household),
+                                 db: Session = Depends(get_db)):
+    if group_by not in ("month", "category", "type", "user_id"):
+        raise HTTPException(status_code=400, detail="group_by must be one of month, category, type, user_id")
+    currency = currency.upper()
+    shard = shard_router.shard_for(household)
+    totals = {}
+    try:
+        horizon = cold_archive.horizon(shard)
+        if horizon is not None and (start is None or start < horizon):
+            # Columnar scan over the segments the manifest cannot rule out
+            totals = cold_archive.summarize(shard, household, group_by, start, end, currency=currency, fx=fx_rates)
+
+        key = func.strftime("%Y-%m", Transaction.date) if group_by == "month" else getattr(Transaction, group_by)
+        day = func.date(Transaction.date)
+        live = [Transaction.household_id == household, Transaction.deleted.is_(False)]
+        if start is not None:
+            live.append(Transaction.date >= start)
+        if end is not None:
+            live.append(Transaction.date < end)
+        # Rows already in the requested currency are added up as they are
+        for group, count, total in db.execute(
+                select(key, func.count(), func.sum(Transaction.amount))
+                .where(*live, Transaction.currency == currency).group_by(key)):
+            subtotal_count, subtotal = totals.get(group, (0, 0.0))
+            totals[group] = (subtotal_count + count, subtotal + (total or 0.0))
+        # A rate holds for a whole day, so SQLite adds up the other rows per group, currency and day and
+        # only those subtotals are converted, as columns
+        subtotals = db.execute(
+            select(key, Transaction.currency, day, func.count(), func.sum(Transaction.amount))
+            .where(*live, Transaction.currency != currency).group_by(key, Transaction.currency, day)).all()
+        if subtotals:
+            groups, currencies, days, counts, sums = zip(*subtotals)
+            converted = fx_rates.convert(np.array([total or 0.0 for total in sums]), np.array(currencies),
+                                         np.array(days, dtype="datetime64[D]"), currency)
+            for group, count, total in zip(groups, counts, converted.tolist()):
+                subtotal_count, subtotal = totals.get(group, (0, 0.0))
+                totals[group] = (subtotal_count + count, subtotal + total)
+    except MissingRate as exc:
+        raise HTTPException(status_code=422, detail=f"Cannot convert to {currency}: {exc}")
+    return [SummaryRow(key=group, count=count, total=round(total, 2), currency=currency)
+            for group, (count, total) in sorted(totals.items(), key=lambda item: (item[0] is None, item[0] or ""))]
+
+@app.delete("/transactions/{transaction_id}", status_code=204, dependencies=[Depends(admit_writes)])
+async def delete_transaction(transaction_id: int, household: str = Depends(get_household),
+                             db: Session = Depends(get_db)):
+    db_transaction = db.get(Transaction, transaction_id)
+    if db_transaction is None or db_transaction.deleted or db_transaction.household_id != household:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    # Keep the row as a tombstone so syncing clients learn about the delete
+    db_transaction.deleted = True
+    db_transaction.version = allocate_versions(db)
+    db.commit()
+    change_feed.publish({"type": "transaction.deleted", "id": transaction_id}, topic=household)
+    # Running averages cannot subtract a past day exactly, so rebuild this user's state
+    forecaster.reset(household, db_transaction.user_id)
+    replay_history(db, household, db_transaction.user_id)
+    recurring_detector.remove(transaction_id, household, db_transaction.user_id, db_transaction.description,
+                              db_transaction.type)
+    recent_cache.remove(household, db_transaction.user_id, transaction_id)
+
+@app.put("/transactions/{transaction_id}/category", response_model=TransactionResponse,
+          dependencies=[Depends(admit_writes)])
+async def correct_category(transaction_id: int, update: CategoryUpdate, household: str = Depends(get_household),
+                           db: Session = Depends(get_db)):
+    db_transaction = db.get(Transaction, transaction_id)
+    if db_transaction is None or db_transaction.deleted or db_transaction.household_id != household:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    db_transaction.category = update.category
+    db_transaction.version = allocate_versions(db)
+    db.add(CategoryCorrection(transaction_id=transaction_id, description=db_transaction.description,
+                              category=update.category))
+    db.commit()
+    db.refresh(db_transaction)
+    recent_cache.set_category(household, db_transaction.user_id, transaction_id, update.category)
+    # Learn from the correction right away in this worker; retrain persists it for the rest
+    model = get_categorizer()
+    if model is not None:
+        model.partial_fit([db_transaction.description], [update.category])
+    change_feed.publish({
+        "type": "transaction.updated",
+        "transactions": [TransactionResponse.model_validate(db_transaction).model_dump(mode="json")]
+    }, topic=household)
     return db_transaction
 
-@app.get("/transactions/", response_model=list[TransactionResponse])
-async def read_transactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    transactions = db.query(Transaction).offset(skip).limit(limit).all()
-    return transactions
+@app.put("/budgets/{user_id}", response_model=BudgetUpdate)
+async def set_budget(user_id: str, budget: BudgetUpdate, household: str = Depends(get_household),
+                     db: Session = Depends(get_db)):
+    db.merge(Budget(household_id=household, user_id=user_id, monthly_limit=budget.monthly_limit))
+    db.commit()
+    forecaster.set_budget(household, user_id, budget.monthly_limit)
+    return budget
+
+@app.get("/forecast/{user_id}", response_model=Forecast)
+async def read_forecast(user_id: str, household: str = Depends(get_household)):
+    forecast = forecaster.forecast(household, user_id, datetime.now(timezone.utc))
+    if forecast is None:
+        raise HTTPException(status_code=404, detail="No transactions for this user")
+    return forecast
+
+@app.get("/recurring/{user_id}", response_model=list[RecurringSeriesResponse])
+async def read_recurring(user_id: str, active_only: bool = True, household: str = Depends(get_household)):
+    series = recurring_detector.for_user(household, user_id)
+    if active_only:
+        # A series is still running until a payment is more than one period overdue
+        today = datetime.now(timezone.utc).date().toordinal()
+        series = [s for s in series if s.next_expected.toordinal() + s.interval_days >= today]
+    return series
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobCreate, household: str = Depends(get_household)):
+    if request.kind not in JOB_HANDLERS or request.kind == "import":
+        raise HTTPException(status_code=400, detail=f"kind must be one of "
+                            f"{', '.join(sorted(k for k in JOB_HANDLERS if k != 'import'))}")
+    return _job_response(job_queue.enqueue(request.kind, request.payload, household, priority=request.priority))
+
+@app.get("/jobs", response_model=list[JobResponse])
+async def list_jobs(status: str | None = None, limit: int = 100, household: str = Depends(get_household)):
+    return [_job_response(job) for job in job_queue.list(household, status, limit)]
+
+@app.get("/jobs/metrics")
+async def job_metrics():
+    return job_queue.metrics()
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def read_job(job_id: int, household: str = Depends(get_household)):
+    job = job_queue.get(job_id)
+    if job is None or job.household_id != household:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.get("/admission")
+async def admission_stats():
+    return {"routes": {name: limiter.stats() for name, limiter in route_limiters.items()},
+            "rust_breaker": rust_breaker.stats()}
+
+def _render_profile(profile_id: str, name: str, profiler: SamplingProfiler, format: str):
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}")
+    headers = {"X-Profile-Id": profile_id}
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed(), headers=headers)
+    body = profiler.render(format, name)
+    return JSONResponse(dict(body, id=profile_id) if format == "summary" else body, headers=headers)
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_window(seconds: float = 10.0, interval_ms: float = 5.0, format: str = "summary",
+                         include_idle: bool = False):
+    """Sample every thread for `seconds` while traffic keeps flowing, then return the profile."""
+    if not 0 < seconds <= 120 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 120] and interval_ms in [1, 1000]")
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}")
+    profiler = SamplingProfiler(interval_ms / 1000, include_idle=include_idle)
+    try:
+        profiler.start()
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    name = f"{seconds:g}s window"
+    return _render_profile(profiles.add(name, profiler), name, profiler, format)
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def read_profile(profile_id: str, format: str = "summary"):
+    found = profiles.get(profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    name, profiler = found
+    return _render_profile(profile_id, name, profiler, format)
+
+@app.get("/sync", response_model=SyncResponse, dependencies=[Depends(admit_reads)])
+async def sync_transactions(since: int = 0, limit: int = Query(500, ge=1, le=5000),
+                            household: str = Depends(get_household), db: Session = Depends(get_db)):
+    shard = shard_router.shard_for(household)
+    current = db.get(SyncState, 1).version
+    moved = db.get(HouseholdMove, household)
+    purged = db.get(TombstonePurge, household)
+    # Pages of a sync from 0 hand back a negative position: such a client holds no deleted rows, so a
+    # dropped tombstone above it does not send it back to the start
+    full, since = since < 0, abs(since)
+    # A copy taken before the household last moved here (move_household starts it above every older
+    # version) holds ids that no longer exist, and one taken before archiving dropped a tombstone still
+    # holds the deleted row; deltas cannot fix either, so the client starts over from 0
+    resync = since > 0 and (since > current or (moved is not None and since < moved.version)
+                            or (not full and purged is not None and since < purged.version))
+    if resync:
+        since = 0
+    full = full or since == 0
+    if since >= current:
+        # Nothing changed: one primary-key lookup, no scan
+        return SyncResponse(changes=[], version=current, has_more=False, shard=shard, resync=resync)
+
+    # Range scan on the version index, so cost follows the number of changes, not history
+    rows = db.execute(
+        select(Transaction).where(Transaction.version > since, Transaction.household_id == household)
+        .order_by(Transaction.version).limit(limit + 1)
+    ).scalars().all()
+    changes = [
+        TransactionChange(id=row.id, version=row.version, deleted=True) if row.deleted
+        else TransactionChange(id=row.id, version=row.version, deleted=False, user_id=row.user_id,
+                               description=row.description, amount=row.amount, currency=row.currency,
+                               type=row.type, category=row.category, date=row.date)
+        for row in rows
+    ]
+    # Archived rows kept their versions; segments whose versions are all at or below `since` stay unopened
+    archived = cold_archive.changes(shard, household, since, limit + 1).to_pylist()
+    if archived:
+        changes = sorted(changes + [TransactionChange(deleted=False, **row) for row in archived],
+                         key=lambda change: change.version)[:limit + 1]
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    version = current
+    if has_more:
+        version = -changes[-1].version if full else changes[-1].version
+    return SyncResponse(changes=changes, version=version, has_more=has_more, shard=shard, resync=resync)
 
-@app.post("/calculate-sum/", response_model=SumResult)
+async def _call_rust(path: str, payload: dict) -> dict:
+    # While the engine is failing, answer at once instead of holding a slot for the full timeout
+    try:
+        rust_breaker.before_call()
+    except Overloaded as exc:
+        raise _overloaded(exc)
+    try:
+        response = await rust_client().post(path, json=payload)
+        response.raise_for_status() # Raise an exception for 4xx/5xx responses
+    except httpx.RequestError as exc:
+        rust_breaker.record_failure()
+        raise HTTPException(status_code=500, detail=f"An error occurred while requesting Rust engine: {exc}")
+    except httpx.HTTPStatusError as exc:
+        # Only server errors say the engine is unhealthy; a rejected payload does not
+        if exc.response.status_code >= 500:
+            rust_breaker.record_failure()
+        else:
+            rust_breaker.record_success()
+        raise HTTPException(status_code=exc.response.status_code, detail=f"Rust engine returned an error: {exc.response.text}")
+    except BaseException:
+        rust_breaker.record_failure()  # cancelled mid-call; never leave a half-open trial hanging
+        raise
+    rust_breaker.record_success()
+    return response.json()
+
+@app.post("/calculate-sum/", response_model=SumResult, dependencies=[Depends(admit_rust)])
 async def calculate_sum_with_rust(numbers: NumbersToSum):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post("http://localhost:8001/sum", json=numbers.model_dump())
-            response.raise_for_status() # Raise an exception for 4xx/5xx responses
-            return response.json()
-        except httpx.RequestError as exc:
-            raise HTTPException(status_code=500, detail=f"An error occurred while requesting Rust engine: {exc}")
-        except httpx.HTTPStatusError as exc:
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Rust engine returned an error: {exc.response.text}")
+    return await _call_rust("/sum", numbers.model_dump())
+
+@app.post("/analytics", response_model=AnalyticsResponse, dependencies=[Depends(admit_rust)])
+async def batch_analytics(request: AnalyticsRequest):
+    """Several operations over several series in one engine round trip; see analytics.py."""
+    started = time.perf_counter()
+    result = await _call_rust("/analytics", request.model_dump())
+    result["round_trip_us"] = (time.perf_counter() - started) * 1e6
+    return result
@@ -0,0 +1,257 @@
+from sqlalchemy import (Column, Index, Integer, String, Float, DateTime, Boolean, Text, delete, func, inspect, select,
+                        text, update)
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+import os
+
+# Currency of rows written before amounts carried one, and of new rows that name none
+DEFAULT_CURRENCY = os.environ.get("DEFAULT_CURRENCY", "USD")
+
+# Tables shared by every household shard
+Base = declarative_base()
+
+class Transaction(Base):
+    __tablename__ = "transactions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    household_id = Column(String, index=True, default="default")
+    user_id = Column(String, index=True, default="default")
+    description = Column(String, index=True)
+    amount = Column(Float)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)  # ISO 4217
+    type = Column(String) # e.g., 'income', 'expense'
+    category = Column(String, nullable=True, index=True) # e.g., 'groceries'; predicted when not given
+    date = Column(DateTime, index=True, default=lambda: datetime.now(timezone.utc))
+    # Every write stamps the row with the next change version; deletes leave a tombstone
+    version = Column(Integer, index=True, unique=True)
+    deleted = Column(Boolean, default=False, nullable=False)
+
+    # "Recent rows for this user" is a range scan on one index instead of a walk over the household.
+    # AUTOINCREMENT keeps ids of archived rows from being handed out again once the table empties
+    __table_args__ = (Index("ix_transactions_household_user_date", "household_id", "user_id", "date"),
+                      {"sqlite_autoincrement": True})
+
+# User fixes to predicted categories, folded into the model by `python categorizer.py retrain`
+class CategoryCorrection(Base):
+    __tablename__ = "category_corrections"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(Integer, index=True)
+    description = Column(String)
+    category = Column(String)
+    created = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+class Budget(Base):
+    __tablename__ = "budgets"
+
+    # User ids are only unique within a household, and hashed shards hold several households
+    household_id = Column(String, primary_key=True, default="default")
+    user_id = Column(String, primary_key=True)
+    monthly_limit = Column(Float, nullable=False)
+
+# Progress of a background import job (jobs.py), committed in the same transaction as each batch it
+# inserts, so a retried job resumes after the last committed batch instead of inserting it again
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    job_id = Column(Integer, primary_key=True)
+    offset = Column(Integer, nullable=False, default=0)
+    batches = Column(Text, nullable=False, default="[]")  # JSON [first_version, last_version] per batch
+
+# First version handed out on this shard after a household moved onto it; a client that synced
+# before that still holds the old shard's ids and versions, so /sync tells it to start over.
+# first_id..last_id are the ids of the copied rows, which a repeated move replaces
+class HouseholdMove(Base):
+    __tablename__ = "household_moves"
+
+    household_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    first_id = Column(Integer, nullable=True)
+    last_id = Column(Integer, nullable=True)
+
+# Highest version of a household's tombstones dropped by `python archive.py run`; a client that synced
+# before that version never saw those deletes, so /sync tells it to start over
+class TombstonePurge(Base):
+    __tablename__ = "tombstone_purges"
+
+    household_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+
+# Single-row counter holding the latest change version handed out
+class SyncState(Base):
+    __tablename__ = "sync_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+def _add_missing_columns(engine: Engine):
+    # create_all skips tables that exist, so columns added since a shard was created are added here;
+    # the server default, or else a constant Python default, fills them in on existing rows (rows of
+    # the single pre-shard database get household "default" and user "default")
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                connection.exec_driver_sql(ddl)
+                if column.server_default is None and column.default is not None and column.default.is_scalar:
+                    connection.execute(table.update().values({column.name: column.default.arg}))
+
+def _version_unversioned_rows(engine: Engine):
+    # Rows written before versions existed are numbered in id order, so /sync returns them
+    with Session(engine) as db:
+        unversioned = db.execute(select(func.count()).where(Transaction.version.is_(None))).scalar_one()
+        if not unversioned:
+            return
+        first_version = allocate_versions(db, unversioned)
+        db.execute(text(
+            "UPDATE transactions SET version = :offset + numbered.n FROM "
+            "(SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM transactions WHERE version IS NULL) AS numbered "
+            "WHERE transactions.id = numbered.id"
+        ), {"offset": first_version - 1})
+        db.commit()
+
+def _rekey_budgets(engine: Engine):
+    # Budgets were keyed on user_id alone; the primary key cannot be altered in place, so the table is
+    # rebuilt and each limit goes to every household that user has rows in (the default one otherwise)
+    with engine.begin() as connection:
+        if "budgets" not in inspect(connection).get_table_names():
+            return
+        if "household_id" in {column["name"] for column in inspect(connection).get_columns("budgets")}:
+            return
+        connection.exec_driver_sql("ALTER TABLE budgets RENAME TO budgets_by_user")
+        Budget.__table__.create(bind=connection)
+        connection.exec_driver_sql(
+            "INSERT INTO budgets (household_id, user_id, monthly_limit) "
+            "SELECT DISTINCT COALESCE(t.household_id, 'default'), b.user_id, b.monthly_limit "
+            "FROM budgets_by_user b LEFT JOIN transactions t ON t.user_id = b.user_id"
+        )
+        connection.exec_driver_sql("DROP TABLE budgets_by_user")
+
+def _autoincrement_transactions(engine: Engine):
+    # Shards created before ids were AUTOINCREMENT reuse the ids of deleted rows; SQLite cannot add it
+    # to an existing table, so the table is rebuilt (the copied ids seed the sequence)
+    with engine.begin() as connection:
+        ddl = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transactions'").scalar()
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            return
+        connection.exec_driver_sql("ALTER TABLE transactions RENAME TO transactions_rowid")
+        for index in inspect(connection).get_indexes("transactions_rowid"):
+            if not index["name"].startswith("sqlite_autoindex"):  # named indexes move with the new table
+                connection.exec_driver_sql(f"DROP INDEX {index['name']}")
+        Transaction.__table__.create(bind=connection)
+        columns = ", ".join(column.name for column in Transaction.__table__.columns)
+        connection.exec_driver_sql(f"INSERT INTO transactions ({columns}) SELECT {columns} FROM transactions_rowid")
+        connection.exec_driver_sql("DROP TABLE transactions_rowid")
+
+def init_schema(engine: Engine):
+    Base.metadata.create_all(bind=engine)
+    _rekey_budgets(engine)  # before columns are added, which would add household_id but leave the key alone
+    _add_missing_columns(engine)
+    _autoincrement_transactions(engine)  # after columns are added, so every column is copied
+    # create_all skips tables that exist, so indexes added since a shard was created are made here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with Session(engine) as db:
+        if db.get(SyncState, 1) is None:
+            db.add(SyncState(id=1, version=0))
+            db.commit()
+    _version_unversioned_rows(engine)
+
+def allocate_versions(db: Session, count: int = 1) -> int:
+    # Bump the counter before reading it so the write lock is held and versions never collide
+    db.execute(update(SyncState).where(SyncState.id == 1).values(version=SyncState.version + count))
+    last = db.execute(select(SyncState.version).where(SyncState.id == 1)).scalar_one()
+    return last - count + 1
+
+def _sequence(db: Session):
+    # sqlite_sequence gets a row for the table on its first insert; one is made for an empty table
+    db.execute(text(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        "SELECT 'transactions', (SELECT COALESCE(MAX(id), 0) FROM transactions) "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'transactions')"
+    ))
+
+def reserve_ids(db: Session, count: int) -> int:
+    """Set aside `count` transaction ids that inserts will never hand out; returns the first."""
+    _sequence(db)
+    db.execute(text("UPDATE sqlite_sequence SET seq = seq + :count WHERE name = 'transactions'"), {"count": count})
+    return db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'")).scalar_one() - count + 1
+
+def raise_id_floor(db: Session, floor: int):
+    """Make sure new transaction ids start above `floor`."""
+    _sequence(db)
+    db.execute(text("UPDATE sqlite_sequence SET seq = MAX(seq, :floor) WHERE name = 'transactions'"), {"floor": floor})
+
+def move_household(source: Session, destination: Session, household_id: str,
+                   archived: int = 0) -> tuple[int, int, int]:
+    """Copy a household's live rows to another shard, then remove them from the source.
+
+    Ids and versions belong to the shard, so the copies get new ones; the move is recorded on the
+    destination so that /sync can send the household's clients a full resync instead of deltas.
+    A move that crashed after committing its copy left the household on both shards; running it
+    again replaces that copy instead of adding a second one. `archived` more versions and ids are
+    set aside for the household's archived rows, which move after this
+    (archive.ColdArchive.move_household). Returns the rows copied and the first version and first
+    id set aside.
+    """
+    rows = source.execute(
+        select(Transaction).where(Transaction.household_id == household_id, Transaction.deleted.is_(False))
+        .order_by(Transaction.version)
+    ).scalars().all()
+    previous = destination.get(HouseholdMove, household_id)
+    if rows and previous is not None and previous.first_id is not None:
+        stale = (Transaction.household_id == household_id) & Transaction.id.between(previous.first_id, previous.last_id)
+        destination.execute(delete(CategoryCorrection).where(
+            CategoryCorrection.transaction_id.in_(select(Transaction.id).where(stale))))
+        destination.execute(delete(Transaction).where(stale))
+    # Start above every version either shard has handed out, so any position a client holds for this
+    # household, from either shard, sorts below the move; at least one version even for an empty household
+    source_version = source.execute(select(SyncState.version).where(SyncState.id == 1)).scalar_one()
+    destination.execute(update(SyncState).where(SyncState.id == 1, SyncState.version < source_version)
+                        .values(version=source_version))
+    first_version = allocate_versions(destination, max(len(rows) + archived, 1))
+    first_id = reserve_ids(destination, len(rows) + archived)
+    copies = {}
+    for i, row in enumerate(rows):
+        copies[row.id] = Transaction(id=first_id + i, household_id=household_id, user_id=row.user_id,
+                                     description=row.description, amount=row.amount, currency=row.currency,
+                                     type=row.type, category=row.category, date=row.date, version=first_version + i)
+    destination.add_all(copies.values())
+    destination.flush()
+
+    corrections = source.execute(
+        select(CategoryCorrection).where(CategoryCorrection.transaction_id.in_(list(copies)))
+    ).scalars().all() if copies else []
+    for correction in corrections:
+        destination.add(CategoryCorrection(transaction_id=copies[correction.transaction_id].id,
+                                           description=correction.description, category=correction.category,
+                                           created=correction.created))
+    for budget in source.execute(select(Budget).where(Budget.household_id == household_id)).scalars():
+        destination.merge(Budget(household_id=household_id, user_id=budget.user_id,
+                                 monthly_limit=budget.monthly_limit))
+    # Every row of the household here must sort at or above the move, so a move that only re-homes
+    # archived rows after the copy went earlier keeps that copy's position
+    if rows or previous is None:
+        destination.merge(HouseholdMove(household_id=household_id, version=first_version, first_id=first_id,
+                                        last_id=first_id + len(rows) - 1))
+    # Commit the copy before deleting, so a crash in between leaves a copy to replace rather than a gap
+    destination.commit()
+
+    source.execute(delete(CategoryCorrection).where(CategoryCorrection.transaction_id.in_(list(copies))))
+    source.execute(delete(Transaction).where(Transaction.household_id == household_id))
+    source.execute(delete(Budget).where(Budget.household_id == household_id))
+    source.execute(delete(HouseholdMove).where(HouseholdMove.household_id == household_id))
+    source.execute(delete(TombstonePurge).where(TombstonePurge.household_id == household_id))
+    source.commit()
+    return len(rows), first_version + len(rows), first_id + len(rows)
@@ -0,0 +1,259 @@
+"""On-demand sampling profiler with SQL timings, for a live API process.
+
+A SamplingProfiler runs a daemon thread that wakes every `interval` seconds. On each wake it
+reads the current stack of each watched thread from sys._current_frames() and adds one
+sample to that stack. Watched threads are every thread, or only the ones named. The profiled
+code is not instrumented, so its cost is one stack walk per thread per interval. While a
+profile runs, SQLAlchemy cursor events time every statement. A sample taken while a thread
+waits on SQLite gets an extra leaf frame naming the statement, so queries show up in the
+flame graph.
+
+Nothing is installed while no profile runs. There is no sampler thread and there are no
+event listeners. The request middleware costs one header lookup per request.
+
+Output is collapsed stacks (`frame;frame;frame count` lines, for flamegraph.pl or
+speedscope), a speedscope JSON document, or a JSON summary with the hottest frames and
+per-statement SQL timings.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+FORMATS = ("summary", "collapsed", "speedscope")
+# Leaf frames of a thread that is only waiting, dropped so idle time does not drown the profile
+_IDLE = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+Frame = tuple[str, str, int]  # (function, file, line)
+
+
+def _short_path(path: str) -> str:
+    if path.startswith(_ROOT):
+        return os.path.relpath(path, _ROOT)
+    head, marker, tail = path.rpartition("site-packages" + os.sep)
+    return tail if marker else os.path.basename(path)
+
+
+def _label(frame: Frame) -> str:
+    function, file, line = frame
+    # ';' separates frames in the collapsed format
+    return (f"{function} ({file}:{line})" if line else function).replace(";", ",")
+
+
+class SamplingProfiler:
+    _active_lock = threading.Lock()  # SQL listeners are process-wide, so one profile at a time
+
+    def __init__(self, interval: float = 0.005, thread_ids: set[int] | None = None, include_idle: bool = False,
+                 max_depth: int = 200):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self.samples: Counter[tuple[Frame, ...]] = Counter()
+        self.sample_count = 0
+        self.sql: dict[str, list] = {}  # statement -> [count, total seconds, max seconds]
+        self.started: float | None = None
+        self.stopped: float | None = None
+        self._running_sql: dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "SamplingProfiler":
+        if not SamplingProfiler._active_lock.acquire(blocking=False):
+            raise RuntimeError("Another profile is already running")
+        event.listen(Engine, "before_cursor_execute", self._before_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_execute)
+        event.listen(Engine, "handle_error", self._on_error)
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        if self._thread is None or self.stopped is not None:
+            return self
+        self._stop.set()
+        self._thread.join()
+        event.remove(Engine, "before_cursor_execute", self._before_execute)
+        event.remove(Engine, "after_cursor_execute", self._after_execute)
+        event.remove(Engine, "handle_error", self._on_error)
+        self.stopped = time.time()
+        SamplingProfiler._active_lock.release()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # SQL timing, installed only between start() and stop()
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+        self._running_sql[threading.get_ident()] = statement
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("profile_started")
+        if not started:
+            return  # the statement began before the profile did
+        self._record(statement, time.perf_counter() - started.pop())
+
+    def _on_error(self, context):
+        started = context.connection.info.get("profile_started") if context.connection is not None else None
+        if started:
+            self._record(context.statement or "?", time.perf_counter() - started.pop())
+
+    def _record(self, statement: str, seconds: float):
+        self._running_sql.pop(threading.get_ident(), None)
+        key = " ".join(statement.split())[:300]
+        stats = self.sql.setdefault(key, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+    # Sampling
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                if not self.include_idle and (os.path.basename(frame.f_code.co_filename),
+                                              frame.f_code.co_name) in _IDLE:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_name, _short_path(code.co_filename), frame.f_lineno))
+                    frame = frame.f_back
+                stack.reverse()
+                statement = self._running_sql.get(thread_id)
+                if statement is not None:
+                    stack.append(("SQL " + " ".join(statement.split())[:120], "", 0))
+                self.samples[tuple(stack)] += 1
+                self.sample_count += 1
+
+    # Output
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{';'.join(map(_label, stack))} {count}" for stack, count in self.samples.most_common())
+
+    def speedscope(self, name: str = "profile") -> dict:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    function, file, line = frame
+                    frames.append({"name": function, "file": file, "line": line} if line else {"name": function})
+                indices.append(index[frame])
+            samples.append(indices)
+            weights.append(count * self.interval * 1000)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{"type": "sampled", "name": name, "unit": "milliseconds", "startValue": 0,
+                          "endValue": sum(weights), "samples": samples, "weights": weights}],
+            "name": name,
+            "exporter": "apps/backend/profiler.py",
+        }
+
+    def summary(self, top: int = 30) -> dict:
+        own, total = Counter(), Counter()
+        for stack, count in self.samples.items():
+            own[_label(stack[-1])] += count
+            # Inclusive time per function rather than per line, counted once per stack even when recursive
+            for label in {f"{function} ({file})" if line else function for function, file, line in stack}:
+                total[label] += count
+        ms = self.interval * 1000
+        return {
+            "seconds": round((self.stopped or time.time()) - self.started, 3) if self.started else 0.0,
+            "interval_ms": ms,
+            "samples": self.sample_count,
+            "self": [{"frame": label, "samples": n, "ms": round(n * ms, 1)} for label, n in own.most_common(top)],
+            "total": [{"frame": label, "samples": n, "ms": round(n * ms, 1)} for label, n in total.most_common(top)],
+            "sql": [{"statement": statement, "count": count, "total_ms": round(seconds * 1000, 3),
+                     "max_ms": round(longest * 1000, 3)}
+                    for statement, (count, seconds, longest) in
+                    sorted(self.sql.items(), key=lambda item: item[1][1], reverse=True)],
+        }
+
+    def render(self, format: str, name: str = "profile"):
+        if format == "collapsed":
+            return self.collapsed()
+        if format == "speedscope":
+            return self.speedscope(name)
+        return self.summary()
+
+
+class ProfileStore:
+    """The last few finished profiles, fetched by id after the request that made them."""
+
+    def __init__(self, keep: int = 16):
+        self.keep = keep
+        self._profiles: OrderedDict[str, tuple[str, SamplingProfiler]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, profiler: SamplingProfiler) -> str:
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._profiles[profile_id] = (name, profiler)
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> tuple[str, SamplingProfiler] | None:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+class ProfileRequestMiddleware:
+    """Profile one request when it carries `X-Profile` and an admin token `authorize` accepts.
+
+    Only the thread running the event loop is sampled, so other requests interleaved on the same
+    loop can show up in the profile. The response gets an `X-Profile-Id` header; the profile is
+    then read from the store.
+    """
+
+    def __init__(self, app, store: ProfileStore, authorize: Callable[[str | None], bool], interval: float = 0.001):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if b"x-profile" not in headers:
+            return await self.app(scope, receive, send)
+        token = headers.get(b"x-admin-token")
+        if not self.authorize(token.decode("latin-1") if token is not None else None):
+            return await self.app(scope, receive, send)
+        try:
+            profiler = SamplingProfiler(self.interval, thread_ids={threading.get_ident()}).start()
+        except RuntimeError:
+            return await self.app(scope, receive, send)  # a window profile is already sampling this thread
+        profile_id = self.store.add(f"{scope['method']} {scope['path']}", profiler)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=[*message.get("headers", []),
+                                                 (b"x-profile-id", profile_id.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
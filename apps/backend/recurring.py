@@ -0,0 +1,265 @@
+"""Recurring charge and subscription detection.
+
+Descriptions are normalized to a merchant name and hashed together with the household, user and
+transaction type into a 64-bit key. Rows are sorted once by (key, amount); a new amount group starts wherever
+the next amount is more than AMOUNT_TOLERANCE above the previous one, so every group sits within
+the tolerance of its neighbours. Each group is then sorted by date, and NumPy differences test
+whether the intervals cluster around a weekly, monthly, ... period. Over the whole history this
+is a couple of sorts, never a pairwise comparison.
+
+After the initial scan, new rows either extend a known series in O(1) or join a small per-key
+pending list that is re-checked on its own.
+"""
+import hashlib
+import re
+from datetime import date, datetime
+
+import numpy as np
+
+AMOUNT_TOLERANCE = 0.05  # relative gap between neighbouring amounts in one series
+MAX_AMOUNT_SPREAD = 1.25  # largest/smallest amount in one series; stops chains of varied purchases
+MIN_OCCURRENCES = 3
+MIN_REGULAR_SHARE = 0.75  # share of intervals that must fit the period
+MAX_PENDING = 48  # unmatched rows kept per merchant key for incremental detection
+
+# name, nominal interval in days, allowed deviation in days
+PERIODS = [
+    ("weekly", 7.0, 1.0),
+    ("biweekly", 14.0, 2.0),
+    ("monthly", 30.44, 3.5),
+    ("quarterly", 91.31, 7.0),
+    ("yearly", 365.25, 10.0),
+]
+_PERIOD_DAYS = np.array([p[1] for p in PERIODS])
+_PERIOD_SLACK = np.array([p[2] for p in PERIODS])
+
+_NOISE_PREFIXES = re.compile(
+    r"^(?:(?:pos|debit card purchase|purchase authorized on|recurring payment|ach debit|ach credit|"
+    r"sq \*|tst\* ?|pp\*|paypal \*)\s*)+"
+)
+# Up to three leading words; a word with a digit or '#' (store numbers, phones, dates) ends the name
+_MERCHANT = re.compile(r"(?:[^\s\d#]+(?:\s+|$)){1,3}")
+_NOT_NAME = re.compile(r"[^a-z&'. ]")
+
+
+def normalize_description(description: str) -> str:
+    """Merchant name without card prefixes, reference numbers, dates and locations."""
+    text = _NOISE_PREFIXES.sub("", (description or "").lower().strip())
+    match = _MERCHANT.match(text)
+    return " ".join(_NOT_NAME.sub("", match.group()).split()) if match else ""
+
+
+def merchant_key(household_id: str, user_id: str, type: str, merchant: str) -> int:
+    digest = hashlib.blake2b(f"{household_id}\0{user_id}\0{type}\0{merchant}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1  # fits in int64 for NumPy
+
+
+def detect_series(keys: np.ndarray, amounts: np.ndarray, days: np.ndarray) -> list[tuple[np.ndarray, int, float]]:
+    """Find recurring series among rows.
+
+    keys are merchant keys, amounts are absolute amounts and days are date ordinals. Returns
+    (row indices in date order, PERIODS index, median interval) for every series found.
+    """
+    if len(keys) < MIN_OCCURRENCES:
+        return []
+    by_amount = np.lexsort((amounts, keys))
+    k, a = keys[by_amount], amounts[by_amount]
+    breaks = np.empty(len(k), dtype=bool)
+    breaks[0] = True
+    breaks[1:] = (k[1:] != k[:-1]) | (a[1:] > a[:-1] * (1 + AMOUNT_TOLERANCE) + 0.01)
+    group = np.cumsum(breaks) - 1
+    sizes = np.bincount(group)
+    starts = np.flatnonzero(breaks)
+    spread = a[starts + sizes - 1] / np.maximum(a[starts], 0.01)
+
+    # Drop groups too small or too varied to be a series before the second sort
+    keep = ((sizes >= MIN_OCCURRENCES) & (spread <= MAX_AMOUNT_SPREAD))[group]
+    rows, group = by_amount[keep], group[keep]
+    if not len(rows):
+        return []
+    by_date = np.lexsort((days[rows], group))
+    rows, group = rows[by_date], group[by_date]
+    d = days[rows]
+
+    same = group[1:] == group[:-1]
+    intervals = (d[1:] - d[:-1])[same].astype(np.float64)
+    interval_group = group[1:][same]
+    groups, interval_group = np.unique(interval_group, return_inverse=True)
+    counts = np.bincount(interval_group)
+
+    # Median interval per group: sort intervals within each group and pick the middle one
+    order = np.lexsort((intervals, interval_group))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    median = intervals[order][starts + counts // 2]
+
+    period = np.abs(median[:, None] - _PERIOD_DAYS[None, :]).argmin(axis=1)
+    fits_period = np.abs(median - _PERIOD_DAYS[period]) <= _PERIOD_SLACK[period]
+    on_schedule = np.abs(intervals - _PERIOD_DAYS[period][interval_group]) <= _PERIOD_SLACK[period][interval_group]
+    regular_share = np.bincount(interval_group, weights=on_schedule) / counts
+    found = np.flatnonzero(fits_period & (regular_share >= MIN_REGULAR_SHARE))
+
+    bounds = np.searchsorted(group, np.stack([groups[found], groups[found] + 1]))
+    return [(rows[bounds[0, i]:bounds[1, i]], int(period[g]), float(median[g])) for i, g in enumerate(found)]
+
+
+class RecurringSeries:
+    __slots__ = ("user_id", "merchant", "type", "period", "interval_days", "amount",
+                 "first_date", "last_date", "transaction_ids")
+
+    def __init__(self, user_id: str, merchant: str, type: str, period: int, interval_days: float,
+                 amount: float, first_day: int, last_day: int, transaction_ids: list[int]):
+        self.user_id = user_id
+        self.merchant = merchant
+        self.type = type
+        self.period = PERIODS[period][0]
+        self.interval_days = interval_days
+        self.amount = amount  # latest charge; price changes follow the series
+        self.first_date = date.fromordinal(first_day)
+        self.last_date = date.fromordinal(last_day)
+        self.transaction_ids = transaction_ids
+
+    @property
+    def occurrences(self) -> int:
+        return len(self.transaction_ids)
+
+    @property
+    def slack(self) -> float:
+        return next(p[2] for p in PERIODS if p[0] == self.period)
+
+    @property
+    def next_expected(self) -> date:
+        return date.fromordinal(self.last_date.toordinal() + round(self.interval_days))
+
+    def matches_amount(self, amount: float) -> bool:
+        return abs(amount - self.amount) <= self.amount * AMOUNT_TOLERANCE + 0.01
+
+    def matches(self, amount: float, day: int) -> bool:
+        if not self.matches_amount(amount):
+            return False
+        return abs(day - self.last_date.toordinal() - self.interval_days) <= self.slack
+
+    def extend(self, transaction_id: int, amount: float, day: int):
+        self.transaction_ids.append(transaction_id)
+        self.amount = amount
+        self.last_date = date.fromordinal(day)
+
+
+class RecurringDetector:
+    def __init__(self):
+        self.series: dict[int, list[RecurringSeries]] = {}
+        self.pending: dict[int, list[tuple[int, float, int]]] = {}  # key -> (id, amount, day)
+        self.keys_by_user: dict[tuple[str, str], set[int]] = {}  # (household_id, user_id) -> keys
+        self._keys: dict[tuple[str, str, str, str], int] = {}  # (household_id, user_id, type, merchant) -> key
+        self._merchants: dict[int, tuple[str, str, str, str]] = {}  # key -> (household_id, user_id, type, merchant)
+
+    def _key(self, household_id: str, user_id: str, description: str, type: str) -> int:
+        name = (household_id, user_id, type, normalize_description(description))
+        key = self._keys.get(name)
+        if key is None:
+            key = self._keys[name] = merchant_key(*name)
+            self._merchants[key] = name
+            self.keys_by_user.setdefault((household_id, user_id), set()).add(key)
+        return key
+
+    def _new_series(self, key: int, ids, amounts, days, period: int, interval: float) -> RecurringSeries:
+        for series in self.series.get(key, ()):
+            if series.period == PERIODS[period][0] and series.matches_amount(float(amounts[0])):
+                # Same charge resuming after a missed or shifted payment: continue the series
+                series.transaction_ids.extend(int(i) for i in ids)
+                series.amount = float(amounts[-1])
+                series.last_date = max(series.last_date, date.fromordinal(int(days[-1])))
+                return series
+        _, user_id, type, merchant = self._merchants[key]
+        series = RecurringSeries(user_id, merchant, type, period, interval, float(amounts[-1]),
+                                 int(days[0]), int(days[-1]), [int(i) for i in ids])
+        self.series.setdefault(key, []).append(series)
+        return series
+
+    def rebuild(self, rows):
+        """Full detection over (id, household_id, user_id, description, amount, type, date) rows."""
+        self.series, self.pending = {}, {}
+        ids, keys, amounts, days = [], [], [], []
+        for transaction_id, household_id, user_id, description, amount, type, when in rows:
+            ids.append(transaction_id)
+            keys.append(self._key(household_id, user_id, description, type))
+            amounts.append(abs(amount))
+            days.append(when.toordinal())
+        if not ids:
+            return
+        ids, keys = np.array(ids, dtype=np.int64), np.array(keys, dtype=np.int64)
+        amounts, days = np.array(amounts, dtype=np.float64), np.array(days, dtype=np.int64)
+
+        matched = np.zeros(len(ids), dtype=bool)
+        for rows_in_series, period, interval in detect_series(keys, amounts, days):
+            matched[rows_in_series] = True
+            self._new_series(int(keys[rows_in_series[0]]), ids[rows_in_series], amounts[rows_in_series],
+                             days[rows_in_series], period, interval)
+
+        # Keep the latest unmatched rows per key so series can still form incrementally
+        rest = np.flatnonzero(~matched)
+        rest = rest[np.lexsort((days[rest], keys[rest]))]
+        for key, start, end in _runs(keys[rest]):
+            tail = rest[max(start, end - MAX_PENDING):end]
+            self.pending[key] = list(zip(ids[tail].tolist(), amounts[tail].tolist(), days[tail].tolist()))
+
+    def observe(self, transaction_id: int, household_id: str, user_id: str, description: str, amount: float,
+                type: str, when: datetime | date) -> RecurringSeries | None:
+        """Add one new row; returns the series it extended or started, if any."""
+        key = self._key(household_id, user_id, description, type)
+        amount, day = abs(amount), when.toordinal()
+        for series in self.series.get(key, ()):
+            if series.matches(amount, day):
+                series.extend(transaction_id, amount, day)
+                return series
+
+        pending = self.pending.setdefault(key, [])
+        pending.append((transaction_id, amount, day))
+        del pending[:-MAX_PENDING]
+        # A new series has to end with this row, so it needs earlier rows at a similar amount and
+        # the closest of them one period back; everyday purchases stop here without touching NumPy
+        candidates = [row for row in pending if abs(row[1] - amount) <= amount * (MAX_AMOUNT_SPREAD - 1) + 0.01]
+        if len(candidates) < MIN_OCCURRENCES:
+            return None
+        gap = day - max((row[2] for row in candidates if row[2] < day), default=day)
+        if not any(abs(gap - nominal) <= slack for _, nominal, slack in PERIODS):
+            return None
+        ids, amounts, days = (np.array(column) for column in zip(*candidates))
+        found = None
+        used = set()
+        for rows_in_series, period, interval in detect_series(np.full(len(ids), key, dtype=np.int64), amounts, days):
+            series = self._new_series(key, ids[rows_in_series], amounts[rows_in_series], days[rows_in_series],
+                                      period, interval)
+            used.update(series.transaction_ids)
+            if transaction_id in used:
+                found = series
+        if used:
+            self.pending[key] = [row for row in pending if row[0] not in used]
+        return found
+
+    def remove(self, transaction_id: int, household_id: str, user_id: str, description: str, type: str):
+        key = self._key(household_id, user_id, description, type)
+        pending = self.pending.get(key)
+        if pending:
+            self.pending[key] = [row for row in pending if row[0] != transaction_id]
+        series_list = self.series.get(key, [])
+        for series in series_list:
+            if transaction_id in series.transaction_ids:
+                series.transaction_ids.remove(transaction_id)
+                if series.occurrences < MIN_OCCURRENCES:
+                    series_list.remove(series)
+                return
+
+    def for_user(self, household_id: str, user_id: str) -> list[RecurringSeries]:
+        found = [s for key in self.keys_by_user.get((household_id, user_id), ()) for s in self.series.get(key, ())]
+        return sorted(found, key=lambda s: s.next_expected)
+
+
+def _runs(values: np.ndarray):
+    """(value, start, end) for each run of equal values in a sorted array."""
+    if not len(values):
+        return
+    edges = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate(([0], edges))
+    ends = np.concatenate((edges, [len(values)]))
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        yield int(values[start]), start, end
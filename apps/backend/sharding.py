@@ -0,0 +1,219 @@
+"""Household-partitioned SQLite storage.
+
+Every household's rows live in one shard file under the data directory, so one household's bulk
+import only holds the write lock on its own file. In "household" mode each household gets a
+file of its own; in "hashed" mode households are spread over a fixed number of files. Pinned
+households (shard_map.json, written by the rebalance command) override either rule.
+
+Engines are opened on first use and kept in an LRU; the least recently used engine is disposed
+once more than `max_open` are open or when it has been idle for `idle_seconds`.
+
+The single database from before sharding (sql_app.db in the data directory) is opened like any
+other shard. Its rows are assigned to the default household when the schema is upgraded, and
+`rebalance` moves them onto that household's shard.
+
+    python sharding.py status
+    python sharding.py rebalance            # move households whose shard changed
+    python sharding.py rebalance --pin family-42 hot-1
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from models import init_schema, move_household
+
+SHARD_DIR = os.environ.get("SHARD_DIR", "./data")
+SHARD_MODE = os.environ.get("SHARD_MODE", "household")  # "household" or "hashed"
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", "16"))
+DEFAULT_HOUSEHOLD = "default"
+
+_VALID_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    # WAL lets readers of a shard continue while one writer commits
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class ShardRouter:
+    def __init__(self, data_dir: str = SHARD_DIR, mode: str = SHARD_MODE, shard_count: int = SHARD_COUNT,
+                 init_schema: Callable[[Engine], None] | None = None, max_open: int = 64,
+                 idle_seconds: float = 300.0):
+        if mode not in ("household", "hashed"):
+            raise ValueError(f"Unknown shard mode: {mode}")
+        self.data_dir = data_dir
+        self.mode = mode
+        self.shard_count = shard_count
+        self.init_schema = init_schema
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self.pins: dict[str, str] = self._load_pins()
+        self._engines: OrderedDict[str, tuple[Engine, sessionmaker]] = OrderedDict()
+        self._last_used: dict[str, float] = {}
+        self._initialized: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def _pins_path(self) -> str:
+        return os.path.join(self.data_dir, "shard_map.json")
+
+    def _load_pins(self) -> dict[str, str]:
+        try:
+            with open(self._pins_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save_pins(self):
+        tmp = self._pins_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.pins, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._pins_path)
+
+    def shard_for(self, household_id: str) -> str:
+        if not _VALID_ID.match(household_id):
+            raise ValueError(f"Invalid household id: {household_id!r}")
+        if household_id in self.pins:
+            return self.pins[household_id]
+        if self.mode == "household":
+            return f"household-{household_id}"
+        digest = hashlib.blake2b(household_id.encode(), digest_size=8).digest()
+        return f"shard-{int.from_bytes(digest, 'little') % self.shard_count:03d}"
+
+    def path_for(self, shard: str) -> str:
+        return os.path.join(self.data_dir, f"{shard}.db")
+
+    def shards(self) -> list[str]:
+        """Every shard that exists on disk."""
+        if not os.path.isdir(self.data_dir):
+            return []
+        return sorted(name[:-3] for name in os.listdir(self.data_dir) if name.endswith(".db"))
+
+    def engine(self, shard: str) -> Engine:
+        return self._open(shard)[0]
+
+    def _open(self, shard: str) -> tuple[Engine, sessionmaker]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._engines.get(shard)
+            if entry is not None:
+                self._engines.move_to_end(shard)
+            else:
+                os.makedirs(self.data_dir, exist_ok=True)
+                engine = create_engine(f"sqlite:///{self.path_for(shard)}", connect_args={"check_same_thread": False})
+                event.listen(engine, "connect", _enable_wal)
+                entry = (engine, sessionmaker(autocommit=False, autoflush=False, bind=engine))
+                self._engines[shard] = entry
+                if shard not in self._initialized and self.init_schema is not None:
+                    self.init_schema(engine)
+                    self._initialized.add(shard)
+            self._last_used[shard] = now
+            self._evict(now)
+        return entry
+
+    def _evict(self, now: float):
+        # Oldest first: drop engines past the open limit or idle too long, never the newest one
+        while len(self._engines) > 1:
+            shard = next(iter(self._engines))
+            if len(self._engines) <= self.max_open and now - self._last_used[shard] < self.idle_seconds:
+                break
+            engine, _ = self._engines.pop(shard)
+            self._last_used.pop(shard, None)
+            engine.dispose()  # closes pooled idle connections; checked-out ones finish normally
+
+    def session(self, household_id: str) -> Session:
+        return self.session_for_shard(self.shard_for(household_id))
+
+    def session_for_shard(self, shard: str) -> Session:
+        return self._open(shard)[1]()
+
+    def dispose(self):
+        with self._lock:
+            for engine, _ in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._last_used.clear()
+
+
+_HOUSEHOLDS_QUERY = text("SELECT DISTINCT household_id FROM transactions")
+
+
+def rebalance(router: ShardRouter, archive=None, dry_run: bool = False) -> list[tuple[str, str, str, int]]:
+    """Move every household that is not stored on the shard the router now assigns it to.
+
+    With `archive` (an archive.ColdArchive), archived rows move along with the hot ones.
+    """
+    moved = []
+    for shard in router.shards():
+        with router.session_for_shard(shard) as source:
+            hot = [row[0] for row in source.execute(_HOUSEHOLDS_QUERY)]
+        households = list(hot)
+        if archive is not None:
+            # Households with only archived rows here, including ones whose hot rows already moved
+            households += sorted(archive.households(shard) - set(hot))
+        for household_id in households:
+            target = router.shard_for(household_id)
+            if target == shard:
+                continue
+            rows = 0
+            if not dry_run:
+                archived = archive.count(shard, household_id) if archive is not None else 0
+                with router.session_for_shard(shard) as source, router.session_for_shard(target) as destination:
+                    rows, first_version, first_id = move_household(source, destination, household_id, archived)
+                if archived:
+                    rows += archive.move_household(shard, target, household_id, first_version, first_id)
+            moved.append((household_id, shard, target, rows))
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and rebalance household shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list shard files with sizes and household counts")
+    move = commands.add_parser("rebalance", help="move households onto the shard the router assigns them")
+    move.add_argument("--pin", nargs=2, action="append", metavar=("HOUSEHOLD", "SHARD"), default=[],
+                      help="pin a household to a named shard before rebalancing")
+    move.add_argument("--unpin", action="append", default=[], metavar="HOUSEHOLD")
+    move.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    router = ShardRouter(init_schema=init_schema)
+    if args.command == "status":
+        print(f"mode: {router.mode}, shard count: {router.shard_count}, pinned: {len(router.pins)}")
+        for shard in router.shards():
+            with router.session_for_shard(shard) as db:
+                households = len(db.execute(_HOUSEHOLDS_QUERY).all())
+            size = os.path.getsize(router.path_for(shard)) / 1024 / 1024
+            print(f"  {shard:<32} {size:>9.1f} MB {households:>6} households")
+        return
+
+    for household_id, shard in args.pin:
+        if not _VALID_ID.match(household_id) or not _VALID_ID.match(shard):
+            parser.error(f"household and shard names must match {_VALID_ID.pattern}")
+        router.pins[household_id] = shard
+    for household_id in args.unpin:
+        router.pins.pop(household_id, None)
+    if (args.pin or args.unpin) and not args.dry_run:
+        router.save_pins()
+    from archive import ColdArchive  # archive imports this module
+    for household_id, source, target, rows in rebalance(router, ColdArchive(), dry_run=args.dry_run):
+        print(f"{'would move' if args.dry_run else 'moved'} {household_id}: {source} -> {target}"
+              + ("" if args.dry_run else f" ({rows} rows)"))
+    print("Clients of moved households are told to resync from version 0 on their next /sync")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 use actix_web::{get, post, web, App, HttpResponse, HttpServer, Responder};
 use serde::{Deserialize, Serialize};
+use serde_json::{json, Value};
+use std::collections::{BTreeMap, HashMap};
+use std::time::Instant;
+
+// Upper bound on histogram bins; the edges and counts are allocated before any value is read
+const MAX_BINS: usize = 10_000;
 
 #[derive(Deserialize)]
 struct Numbers {
@@ -17,6 +23,182 @@ async fn calculate_sum(numbers: web::Json<Numbers>) -> impl Responder {
     HttpResponse::Ok().json(SumResult { sum })
 }
 
+// Several named series and several operations in one round trip. The Python reference in
+// apps/backend/analytics.py has the same semantics down to summation order; keep them in step.
+#[derive(Deserialize)]
+struct AnalyticsRequest {
+    #[serde(default)]
+    series: HashMap<String, Vec<f64>>,
+    #[serde(default)]
+    keys: HashMap<String, Vec<String>>,
+    operations: Vec<Operation>,
+}
+
+#[derive(Deserialize)]
+struct Operation {
+    id: String,
+    op: String,
+    series: String,
+    #[serde(default)]
+    q: Vec<f64>,
+    bins: Option<usize>,
+    range: Option<[f64; 2]>,
+    by: Option<String>,
+}
+
+#[derive(Serialize)]
+struct OperationResult {
+    id: String,
+    op: String,
+    value: Value,
+    error: Option<String>,
+    elapsed_us: f64,
+}
+
+#[derive(Serialize)]
+struct AnalyticsResponse {
+    results: Vec<OperationResult>,
+    elapsed_us: f64,
+}
+
+fn total(values: &[f64]) -> f64 {
+    values.iter().fold(0.0, |acc, x| acc + x)
+}
+
+fn mean(values: &[f64]) -> Option<f64> {
+    if values.is_empty() {
+        None
+    } else {
+        Some(total(values) / values.len() as f64)
+    }
+}
+
+fn percentile(sorted: &[f64], q: f64) -> f64 {
+    // Linear interpolation between closest ranks
+    let position = q * (sorted.len() - 1) as f64;
+    let lower = position.floor() as usize;
+    let upper = position.ceil() as usize;
+    sorted[lower] + (sorted[upper] - sorted[lower]) * (position - lower as f64)
+}
+
+fn run_operation(
+    operation: &Operation,
+    request: &AnalyticsRequest,
+    sorted: &mut HashMap<String, Vec<f64>>,
+) -> Result<Value, String> {
+    let values = request
+        .series
+        .get(&operation.series)
+        .ok_or_else(|| format!("unknown series '{}'", operation.series))?;
+    match operation.op.as_str() {
+        "sum" => Ok(json!(total(values))),
+        "count" => Ok(json!(values.len())),
+        "mean" => Ok(json!(mean(values))),
+        "min" => Ok(json!(values.iter().copied().reduce(f64::min))),
+        "max" => Ok(json!(values.iter().copied().reduce(f64::max))),
+        "std" => Ok(json!(mean(values).map(|m| {
+            let squares = values.iter().fold(0.0, |acc, x| acc + (x - m) * (x - m));
+            (squares / values.len() as f64).sqrt()
+        }))),
+        "percentiles" => {
+            if operation.q.is_empty() || operation.q.iter().any(|q| !(0.0..=1.0).contains(q)) {
+                return Err("q must be a non-empty list of fractions in [0, 1]".to_string());
+            }
+            if values.is_empty() {
+                return Ok(json!(operation.q.iter().map(|_| None::<f64>).collect::<Vec<_>>()));
+            }
+            // Sorted once per series and shared by every percentile operation on it
+            let ordered: &[f64] = sorted.entry(operation.series.clone()).or_insert_with(|| {
+                let mut copy = values.clone();
+                copy.sort_by(|a, b| a.total_cmp(b));
+                copy
+            });
+            Ok(json!(operation.q.iter().map(|&q| percentile(ordered, q)).collect::<Vec<_>>()))
+        }
+        "histogram" => {
+            let bins = operation.bins.unwrap_or(10);
+            if bins == 0 || bins > MAX_BINS {
+                return Err(format!("bins must be between 1 and {}", MAX_BINS));
+            }
+            let (mut lower, mut upper) = match operation.range {
+                Some([lower, upper]) => (lower, upper),
+                None if values.is_empty() => (0.0, 1.0),
+                None => (
+                    values.iter().copied().fold(f64::INFINITY, f64::min),
+                    values.iter().copied().fold(f64::NEG_INFINITY, f64::max),
+                ),
+            };
+            if upper < lower {
+                return Err("range must be [low, high]".to_string());
+            }
+            if lower == upper {
+                lower -= 0.5;
+                upper += 0.5;
+            }
+            let width = (upper - lower) / bins as f64;
+            let mut edges: Vec<f64> = (0..bins).map(|i| lower + i as f64 * width).collect();
+            edges.push(upper);
+            let mut counts = vec![0u64; bins];
+            for &x in values {
+                if !(x >= lower && x <= upper) {
+                    continue; // outside the range, or NaN
+                }
+                // The last bin is closed on the right
+                let index = (((x - lower) / (upper - lower) * bins as f64).floor() as usize).min(bins - 1);
+                counts[index] += 1;
+            }
+            Ok(json!({"edges": edges, "counts": counts}))
+        }
+        "bucket_sum" => {
+            let by = operation.by.as_ref().ok_or("bucket_sum needs 'by', a keys series")?;
+            let keys = request.keys.get(by).ok_or_else(|| format!("unknown keys '{}'", by))?;
+            if keys.len() != values.len() {
+                return Err(format!("keys '{}' and series '{}' differ in length", by, operation.series));
+            }
+            let mut buckets: BTreeMap<&str, (u64, f64)> = BTreeMap::new();
+            for (key, &x) in keys.iter().zip(values) {
+                let bucket = buckets.entry(key.as_str()).or_insert((0, 0.0));
+                bucket.0 += 1;
+                bucket.1 += x;
+            }
+            Ok(json!(buckets
+                .into_iter()
+                .map(|(key, (count, sum))| json!({"key": key, "count": count, "sum": sum}))
+                .collect::<Vec<_>>()))
+        }
+        other => Err(format!("unknown operation '{}'", other)),
+    }
+}
+
+#[post("/analytics")]
+async fn analytics(request: web::Json<AnalyticsRequest>) -> impl Responder {
+    let started = Instant::now();
+    let mut sorted = HashMap::new();
+    let results = request
+        .operations
+        .iter()
+        .map(|operation| {
+            let operation_started = Instant::now();
+            // One bad operation reports its own error; the rest of the batch still runs
+            let (value, error) = match run_operation(operation, &request, &mut sorted) {
+                Ok(value) => (value, None),
+                Err(error) => (Value::Null, Some(error)),
+            };
+            OperationResult {
+                id: operation.id.clone(),
+                op: operation.op.clone(),
+                value,
+                error,
+                elapsed_us: operation_started.elapsed().as_secs_f64() * 1e6,
+            }
+        })
+        .collect();
+    HttpResponse::Ok().json(AnalyticsResponse {
+        results,
+        elapsed_us: started.elapsed().as_secs_f64() * 1e6,
+    })
+}
+
 #[get("/health")]
 async fn health_check() -> impl Responder {
     HttpResponse::Ok().body("Rust Financial Engine is healthy!")
@@ -26,10 +208,13 @@ async fn health_check() -> impl Responder {
 async fn main() -> std::io::Result<()> {
     HttpServer::new(|| {
         App::new()
+            // Analytics batches carry whole series; the default 32 KB JSON limit is too small
+            .app_data(web::JsonConfig::default().limit(64 * 1024 * 1024))
             .service(calculate_sum)
+            .service(analytics)
             .service(health_check)
     })
     .bind(("0.0.0.0", 8001))?
     .run()
     .await
-}
\ No newline at end of file
+}
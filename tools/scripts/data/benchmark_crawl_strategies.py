@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BFS vs relevance-scored best-first crawling on the offline fixture site
+Runs the gap study's real deep crawl (build_deep_crawl_strategy through StudyCrawler) against
+fixture sites whose URL slugs are only a noisy hint of page content, and counts as relevant
+only pages whose fetched content the study finds evidence in, which the URL scorer never sees
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+from typing import Dict, List
+
+from crawl_engine import FETCHERS, StudyCrawler, crawl_scope, load_studies
+from crawl_strategy import CRAWL_STRATEGIES
+from fixture_site import FixtureServer, FixtureSite
+
+STUDY = "architecture_gaps"
+
+async def crawl_site(server: FixtureServer, strategy: str, fetcher: str, max_depth: int, max_pages: int,
+                     min_relevance: float) -> Dict[str, int]:
+    """Crawl one fixture site with the study's own crawler; returns fetches and content-relevant pages"""
+
+    study = load_studies(names=[STUDY])[0]
+    study.seeds = [f"{server.base_url}/"]
+    study.max_depth = max_depth
+    study.max_pages = max_pages
+    with tempfile.TemporaryDirectory() as workdir:
+        crawler = StudyCrawler([study], os.path.join(workdir, "checkpoint.jsonl"), crawl_strategy=strategy,
+                               min_relevance=min_relevance if strategy == "best-first" else 0.0, fetcher=fetcher)
+        # Same deep crawl config, minus crawl4ai's per-URL log lines
+        crawl_config = crawler.crawl_config
+        crawler.crawl_config = lambda studies: crawl_config(studies).clone(verbose=False)
+        fetched_before = server.page_requests
+        with contextlib.redirect_stdout(io.StringIO()):
+            await crawler.crawl()
+        # A page is relevant when the study found evidence in its fetched content
+        relevant = sum(1 for _ in study.iter_results(crawler.checkpoint))
+        crawler.close()
+    # The seed (the site index) is fetched by every strategy and never holds evidence
+    return {"fetches": server.page_requests - fetched_before - 1, "relevant": relevant}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare BFS and best-first crawling on offline fixture sites")
+    parser.add_argument("--pages", type=int, default=2000, help="Pages in each fixture site")
+    parser.add_argument("--fan-out", type=int, default=8, help="Links per page")
+    parser.add_argument("--page-bytes", type=int, default=2000)
+    parser.add_argument("--relevant-share", type=float, default=0.15, help="Fraction of on-topic pages")
+    parser.add_argument("--homophily", type=float, default=0.7, help="Chance a link stays on the same topic")
+    parser.add_argument("--slug-accuracy", type=float, default=0.8,
+                        help="Chance a page's URL slug matches its content topic (1.0 makes the URL a perfect hint)")
+    parser.add_argument("--max-depth", type=int, default=3)
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--min-relevance", type=float, default=0.01)
+    parser.add_argument("--sites", type=int, default=5, help="Number of generated sites to average over")
+    parser.add_argument("--fetcher", choices=FETCHERS, default="http",
+                        help="browser renders pages in headless Chromium; http fetches raw HTML")
+    args = parser.parse_args()
+
+    # URL slugs are built from the same keywords the study hands its scorer; page content carries
+    # the study's indicator phrases, which is what its analysis looks for
+    study = load_studies(names=[STUDY])[0]
+    _, keywords = crawl_scope([study])
+    topic_words = [keyword for keyword in keywords if "-" not in keyword]
+    topic_phrases = [term for terms in study.indicators.values() for term in terms]
+
+    totals: Dict[str, List[int]] = {strategy: [0, 0] for strategy in CRAWL_STRATEGIES}
+    for seed in range(args.sites):
+        site = FixtureSite.generate(topic_words, topic_phrases, pages=args.pages, fan_out=args.fan_out,
+                                    page_bytes=args.page_bytes, relevant_share=args.relevant_share,
+                                    homophily=args.homophily, slug_accuracy=args.slug_accuracy, seed=seed)
+        with FixtureServer(site) as server:
+            for strategy in CRAWL_STRATEGIES:
+                result = await crawl_site(server, strategy, args.fetcher, args.max_depth, args.max_pages,
+                                          args.min_relevance)
+                totals[strategy][0] += result["fetches"]
+                totals[strategy][1] += result["relevant"]
+                print(f"site {seed}: {strategy:<10} {result['fetches']:>4} fetches, {result['relevant']:>4} relevant")
+
+    print(f"\nFixture: {args.sites} sites x {args.pages} pages, fan-out {args.fan_out}, "
+          f"{args.relevant_share:.0%} relevant, slug accuracy {args.slug_accuracy:.0%}, "
+          f"budget {args.max_pages} pages/site")
+    print(f"{'strategy':<12} {'fetches':>8} {'relevant':>9} {'relevant/fetch':>15}")
+    for strategy, (fetches, relevant) in totals.items():
+        print(f"{strategy:<12} {fetches:>8} {relevant:>9} {relevant / max(fetches, 1):>15.3f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: crawl throughput against the number of worker processes sharing a SQLite frontier
+Crawls the whole offline fixture site with both studies at each worker count, then once more killing a worker mid-crawl
+Speedup compares steady-state pages/s, between the 10th and 90th percentile page completions
+"""
+
+import argparse
+import os
+import resource
+import signal
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
+from crawl_engine import load_studies
+from crawl_frontier import FrontierCrawler
+from fixture_site import FixtureServer, FixtureSite
+
+def fixture_studies(base_url: str, pages: int):
+    """Both studies seeded at the fixture index with budgets large enough to reach every page"""
+
+    studies = load_studies()
+    for study in studies:
+        study.seeds = [f"{base_url}/"]
+        study.max_depth = 20
+        study.max_pages = pages + 1
+    return studies
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def kill_while_leasing(crawler: FrontierCrawler, victim, after_pages: int):
+    """SIGKILL a worker once the crawl is under way and the worker holds a lease"""
+
+    owner = f"%:{victim.pid}"
+    while victim.is_alive():
+        done = crawler.frontier.counts().get("done", 0)
+        held = crawler.frontier.conn.execute(
+            "SELECT COUNT(*) FROM frontier WHERE state = 'leased' AND lease_owner LIKE ?", (owner,)).fetchone()[0]
+        if done >= after_pages and held:
+            os.kill(victim.pid, signal.SIGKILL)
+            return
+        time.sleep(0.01)
+
+def run(server: FixtureServer, pages: int, workers: int, batch: int, lease_seconds: float,
+        kill_after: Optional[int] = None) -> Dict[str, Any]:
+    """Crawl the fixture once with a fresh frontier; optionally SIGKILL one worker after kill_after pages"""
+
+    with tempfile.TemporaryDirectory() as workdir:
+        crawler = FrontierCrawler(fixture_studies(server.base_url, pages), os.path.join(workdir, "frontier.sqlite"),
+                                  fetcher="http", workers=workers, batch=batch, lease_seconds=lease_seconds)
+        fetched_before, cpu_before = server.page_requests, children_cpu_seconds()
+        started = time.perf_counter()
+        processes = crawler.start()
+        if kill_after is not None:
+            kill_while_leasing(crawler, processes[0], kill_after)
+        exit_codes = crawler.join()
+        elapsed = time.perf_counter() - started
+
+        counts = crawler.frontier.counts()
+        completed = crawler.frontier.completion_times()
+        evidence = {study.name: crawler.compile(study)["total_evidence_sources"] for study in crawler.studies}
+        crawler.close()
+
+    done = counts.get("done", 0)
+    # Steady state leaves out worker startup (spawn, imports, crawler launch) and the drain at the end
+    first, last = completed[len(completed) // 10], completed[len(completed) * 9 // 10]
+    return {
+        "workers": workers,
+        "seconds": elapsed,
+        "pages": done,
+        "fetches": server.page_requests - fetched_before,
+        "pending": counts.get("queued", 0) + counts.get("leased", 0),
+        "failed": counts.get("failed", 0),
+        "reclaimed": counts["reclaimed"],
+        "pages_per_sec": done / elapsed,
+        "steady_pages_per_sec": (len(completed) * 8 // 10) / (last - first),
+        "cpu_ms_per_page": 1000 * (children_cpu_seconds() - cpu_before) / max(done, 1),
+        "evidence": evidence,
+        "exit_codes": exit_codes
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure crawl throughput against the number of frontier workers")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--page-bytes", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds of delay per fixture response")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch", type=int, default=1, help="URLs each worker fetches at a time")
+    parser.add_argument("--lease-seconds", type=float, default=3.0)
+    parser.add_argument("--kill-after", type=int, default=100,
+                        help="Pages into the crash run before a worker holding a lease is killed (0 skips the crash run)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    site = FixtureSite.generate(
+        topic_words=["vertical", "slice", "atomic", "hybrid", "modular", "monolith", "microservices"],
+        topic_phrases=["vertical slice architecture", "atomic components", "hybrid deployment",
+                       "modular monolith case study", "feature slice", "implementation pattern",
+                       "lessons learned", "migration tool", "self-contained", "end-to-end"],
+        pages=args.pages, fan_out=args.fan_out, page_bytes=args.page_bytes, seed=args.seed
+    )
+
+    results: List[Dict[str, Any]] = []
+    with FixtureServer(site, latency=args.latency) as server:
+        print(f"🌐 Fixture site with {len(site.paths)} pages at {server.base_url}, {args.latency * 1000:.0f} ms latency, "
+              f"{os.cpu_count()} CPUs")
+        for workers in args.workers:
+            print(f"\n⏱️  {workers} workers")
+            results.append(run(server, args.pages, workers, args.batch, args.lease_seconds))
+        crash = None
+        if args.kill_after:
+            workers = max(args.workers)
+            print(f"\n💥 {workers} workers, one killed after {args.kill_after} pages")
+            crash = run(server, args.pages, workers, args.batch, args.lease_seconds, kill_after=args.kill_after)
+
+    baseline = results[0]
+    print("\n" + "=" * 80)
+    print(f"{'workers':>7} {'pages':>6} {'fetches':>8} {'seconds':>8} {'pages/s':>8} {'steady pages/s':>15} "
+          f"{'speedup':>8} {'efficiency':>11} {'CPU ms/page':>12}")
+    for result in results:
+        speedup = result["steady_pages_per_sec"] / baseline["steady_pages_per_sec"]
+        print(f"{result['workers']:>7} {result['pages']:>6} {result['fetches']:>8} {result['seconds']:>8.1f} "
+              f"{result['pages_per_sec']:>8.1f} {result['steady_pages_per_sec']:>15.1f} {speedup:>7.2f}x "
+              f"{speedup / (result['workers'] / baseline['workers']):>10.0%} {result['cpu_ms_per_page']:>12.1f}")
+    if any(result["evidence"] != baseline["evidence"] for result in results):
+        print(f"⚠️  Evidence counts differ between runs: {[result['evidence'] for result in results]}")
+    else:
+        print(f"✅ Same pages and evidence at every worker count: {baseline['evidence']}")
+
+    if crash:
+        print(f"\n💥 Crash run: exit codes {crash['exit_codes']}, {crash['pages']} pages done, "
+              f"{crash['pending']} pending, {crash['failed']} failed, {crash['reclaimed']} re-leased, "
+              f"{crash['fetches']} fetches in {crash['seconds']:.1f} s")
+        ok = crash["pages"] == baseline["pages"] and not crash["pending"] and crash["evidence"] == baseline["evidence"]
+        print("✅ Every page completed after the crash" if ok else "❌ Crash run lost pages")
+
+if __name__ == "__main__":
+    main()
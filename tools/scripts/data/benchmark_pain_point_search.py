@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Pain Point GitHub searches against a local mock search API
+Measures end-to-end runtime of PainPointSolutionsResearcher without touching api.github.com
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from fixture_site import FixtureServer, FixtureSite
+from pain_points_solutions_deepcrawl import PainPointSolutionsResearcher, TokenBucketRateLimiter
+
+async def run_once(base_url: str, concurrency: int, rate: float) -> float:
+    """Run the full research against the mock API and return its reported runtime"""
+    researcher = PainPointSolutionsResearcher(
+        api_base_url=base_url,
+        rate_limiter=TokenBucketRateLimiter(rate=rate, capacity=concurrency),
+        max_concurrency=concurrency
+    )
+    results = await researcher.run_research()
+    return results["summary"]["runtime_seconds"]
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark pain point searches against a mock GitHub API")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock API response latency in seconds")
+    parser.add_argument("--rate", type=float, default=100.0, help="Rate limiter budget in requests/second")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent searches for the parallel run")
+    args = parser.parse_args()
+
+    # Only the mock search API is needed, so serve an empty site
+    server = FixtureServer(FixtureSite([], [], []), latency=args.latency).start()
+    base_url = server.base_url
+
+    # The researcher writes its reports to the working directory; keep them out of the repo
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            serial = await run_once(base_url, 1, args.rate)
+            parallel = await run_once(base_url, args.concurrency, args.rate)
+        finally:
+            os.chdir(original_cwd)
+            server.stop()
+
+    print(f"\nMock latency: {args.latency}s, rate budget: {args.rate} req/s")
+    print(f"Serial searches (concurrency 1):        {serial:.2f}s")
+    print(f"Parallel searches (concurrency {args.concurrency}): {parallel:.2f}s")
+    print(f"Speedup: {serial / parallel:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness: drive every researcher class against the offline fixture site
+Records pages/sec, analysis time per page, peak RSS and scoring output so runs can be compared
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any
+
+from fixture_site import FixtureServer, FixtureSite
+
+def time_calls(obj, method_name: str, stats: Dict[str, float]):
+    """Wrap an analysis method so every call adds to stats['calls'] and stats['seconds']"""
+
+    original = getattr(obj, method_name)
+
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            stats["calls"] += 1
+            stats["seconds"] += time.perf_counter() - started
+
+    setattr(obj, method_name, timed)
+
+async def run_atomic(base_url: str, options: Dict[str, Any], stats: Dict[str, float]) -> Dict[str, Any]:
+    from research_atomic_vertical_slice_hybrid import AtomicVerticalSliceResearcher
+
+    researcher = AtomicVerticalSliceResearcher(crawl_strategy=options["strategy"],
+                                               min_relevance=options["min_relevance"],
+                                               fetcher=options["fetcher"])
+    researcher.research_urls = [f"{base_url}/"]
+    time_calls(researcher.study, "analyze", stats)
+    findings = await researcher.research_atomic_vertical_slice_hybrid()
+    await researcher.save_research_results(findings)
+    return {
+        "total_evidence_sources": findings["total_evidence_sources"],
+        "atomic_patterns_found": findings["evidence_summary"]["atomic_patterns_found"],
+        "vertical_slice_patterns_found": findings["evidence_summary"]["vertical_slice_patterns_found"],
+        "hybrid_patterns_found": findings["evidence_summary"]["hybrid_patterns_found"],
+        "pages_deduplicated": findings["deduplication"]["pages_deduplicated"],
+        "overall_feasibility": findings["feasibility_analysis"]["overall_feasibility"]
+    }
+
+async def run_gaps(base_url: str, options: Dict[str, Any], stats: Dict[str, float]) -> Dict[str, Any]:
+    from research_gaps_deepcrawl import ArchitectureGapResearcher
+
+    researcher = ArchitectureGapResearcher(crawl_strategy=options["strategy"],
+                                           min_relevance=options["min_relevance"],
+                                           fetcher=options["fetcher"])
+    researcher.gap_research_urls = [f"{base_url}/"]
+    time_calls(researcher.study, "analyze", stats)
+    findings = await researcher.research_architecture_gaps()
+    await researcher.save_gap_research_results(findings)
+    gap_analysis = findings["gap_analysis"]
+    return {
+        "total_evidence_sources": findings["total_evidence_sources"],
+        "vertical_slice_evidence": gap_analysis["vertical_slice_evidence"],
+        "implementation_evidence": gap_analysis["implementation_evidence"],
+        "tooling_evidence": gap_analysis["tooling_evidence"],
+        "case_study_evidence": gap_analysis["case_study_evidence"],
+        "gap_filling_sources": len(gap_analysis["gap_filling_sources"]),
+        "pages_deduplicated": findings["deduplication"]["pages_deduplicated"],
+        "overall_gap_resolution": findings["gap_assessment"]["overall_gap_resolution"]
+    }
+
+async def run_studies(base_url: str, options: Dict[str, Any], stats: Dict[str, float]) -> Dict[str, Any]:
+    """Both architecture studies over one shared crawl, for comparison with atomic + gaps run separately"""
+
+    from crawl_engine import StudyCrawler, load_studies
+
+    studies = load_studies()
+    for study in studies:
+        study.seeds = [f"{base_url}/"]
+        time_calls(study, "analyze", stats)
+    engine = StudyCrawler(studies, "research_studies.checkpoint.jsonl", crawl_strategy=options["strategy"],
+                          min_relevance=options["min_relevance"], fetcher=options["fetcher"])
+    await engine.crawl()
+    scoring = {}
+    for study in studies:
+        findings = engine.compile(study)
+        engine.save_report(study, findings)
+        scoring[study.name] = {
+            "total_evidence_sources": findings["total_evidence_sources"],
+            **{key: value for key, value in findings[study.report["summary_key"]].items() if isinstance(value, int)}
+        }
+    engine.close()
+    return scoring
+
+async def run_pain_points(base_url: str, options: Dict[str, Any], stats: Dict[str, float]) -> Dict[str, Any]:
+    from pain_points_solutions_deepcrawl import PainPointSolutionsResearcher, TokenBucketRateLimiter
+
+    researcher = PainPointSolutionsResearcher(
+        api_base_url=base_url,
+        rate_limiter=TokenBucketRateLimiter(rate=100.0, capacity=10),
+        max_concurrency=10
+    )
+    time_calls(researcher, "analyze_solutions", stats)
+    results = await researcher.run_research()
+    return dict(results["summary"])
+
+RESEARCHERS = {
+    "atomic": run_atomic,
+    "gaps": run_gaps,
+    "studies": run_studies,
+    "pain_points": run_pain_points
+}
+
+def run_researcher(name: str, base_url: str, options: Dict[str, Any], queue):
+    """Child-process entry point so each researcher's peak RSS is measured in isolation"""
+
+    stats = {"calls": 0, "seconds": 0.0}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Researchers write reports and checkpoints to the working directory
+        os.chdir(workdir)
+        started = time.perf_counter()
+        try:
+            scoring = asyncio.run(RESEARCHERS[name](base_url, options, stats))
+        except Exception as e:
+            queue.put({"error": f"{type(e).__name__}: {e}"})
+            return
+        elapsed = time.perf_counter() - started
+
+    queue.put({
+        "wall_seconds": round(elapsed, 3),
+        "analysis_calls": stats["calls"],
+        "analysis_ms_per_call": round(1000 * stats["seconds"] / stats["calls"], 3) if stats["calls"] else None,
+        # ru_maxrss is reported in KiB on Linux; browser processes show up under children
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "scoring": scoring
+    })
+
+def benchmark(name: str, server: FixtureServer, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one researcher in a fresh process and combine its metrics with server-side counts"""
+
+    pages_before, api_before = server.page_requests, server.api_requests
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run_researcher, args=(name, server.base_url, options, queue))
+    process.start()
+    metrics = queue.get()
+    process.join()
+    if "error" in metrics:
+        print(f"❌ {name} failed: {metrics['error']}")
+        return metrics
+
+    metrics["pages_fetched"] = server.page_requests - pages_before
+    metrics["api_requests"] = server.api_requests - api_before
+    fetched = metrics["pages_fetched"] + metrics["api_requests"]
+    metrics["fetches_per_sec"] = round(fetched / metrics["wall_seconds"], 2) if metrics["wall_seconds"] else None
+    return metrics
+
+def print_comparison(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Show how each headline metric moved against a previous results file"""
+
+    print("\n📈 Change vs baseline")
+    for name, metrics in results["researchers"].items():
+        previous = baseline.get("researchers", {}).get(name)
+        if not previous or "error" in metrics or "error" in previous:
+            continue
+        for key in ("fetches_per_sec", "analysis_ms_per_call", "peak_rss_mb", "wall_seconds"):
+            old, new = previous.get(key), metrics.get(key)
+            if old and new is not None:
+                print(f"   {name:<12} {key:<22} {old:>10} → {new:<10} ({(new - old) / old:+.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research crawlers against an offline fixture site")
+    parser.add_argument("--researchers", nargs="+", choices=list(RESEARCHERS), default=list(RESEARCHERS))
+    parser.add_argument("--corpus", help="Recorded fixture site JSON (see fixture_site.py --record)")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--page-bytes", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of delay per fixture response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=["bfs", "best-first"], default="bfs")
+    parser.add_argument("--min-relevance", type=float, default=0.0)
+    parser.add_argument("--fetcher", choices=["browser", "http"], default="browser",
+                        help="http fetches raw HTML without a browser")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    if args.corpus:
+        site = FixtureSite.load(args.corpus)
+    else:
+        site = FixtureSite.generate(
+            topic_words=["vertical", "slice", "atomic", "hybrid", "modular", "monolith", "microservices"],
+            topic_phrases=["vertical slice architecture", "atomic components", "hybrid deployment",
+                           "modular monolith case study", "feature slice", "implementation pattern",
+                           "lessons learned", "migration tool", "self-contained", "end-to-end"],
+            pages=args.pages, fan_out=args.fan_out, page_bytes=args.page_bytes, seed=args.seed
+        )
+
+    options = {"strategy": args.strategy, "min_relevance": args.min_relevance, "fetcher": args.fetcher}
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(),
+        "fixture": {
+            "corpus": args.corpus,
+            "pages": len(site.paths),
+            "fan_out": args.fan_out,
+            "page_bytes": args.page_bytes,
+            "latency": args.latency,
+            "seed": args.seed
+        },
+        "options": options,
+        "researchers": {}
+    }
+
+    with FixtureServer(site, latency=args.latency) as server:
+        print(f"🌐 Fixture site with {len(site.paths)} pages at {server.base_url}")
+        for name in args.researchers:
+            print(f"\n⏱️  Benchmarking {name}")
+            results["researchers"][name] = benchmark(name, server, options)
+
+    print("\n" + "=" * 80)
+    print(f"{'researcher':<12} {'fetches/s':>10} {'pages':>6} {'analysis ms':>12} {'RSS MB':>8} {'child RSS MB':>13}")
+    for name, metrics in results["researchers"].items():
+        if "error" in metrics:
+            print(f"{name:<12} failed: {metrics['error']}")
+            continue
+        print(f"{name:<12} {metrics['fetches_per_sec'] or 0:>10} {metrics['pages_fetched']:>6} "
+              f"{metrics['analysis_ms_per_call'] or 0:>12} {metrics['peak_rss_mb']:>8} {metrics['peak_child_rss_mb']:>13}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+JSONL checkpointing for streaming deep crawls
+Each analyzed page is appended as one line so a crashed run can resume where it stopped
+"""
+
+import json
+import textwrap
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, Optional, Set
+
+
+class CrawlCheckpoint:
+    """Append-only JSONL record of analyzed pages and completed seeds"""
+
+    def __init__(self, path, resume: bool = False):
+        self.path = Path(path)
+        self.visited_urls: Set[str] = set()
+        self.completed_seeds: Set[str] = set()
+
+        if resume and self.path.exists():
+            self._drop_torn_line()
+            for record in self.iter_records():
+                if record.get('kind') in ('page', 'duplicate'):
+                    self.visited_urls.add(record['url'])
+                elif record.get('kind') == 'seed_complete':
+                    self.completed_seeds.add(record['seed'])
+        else:
+            # Fresh run - drop any checkpoint left over from a previous crawl
+            self.path.write_text('', encoding='utf-8')
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _drop_torn_line(self):
+        """Cut a partial last line left by a crash, so the next record starts on a line of its own"""
+
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, 2)
+            position = end
+            while position > 0:
+                step = min(position, 64 * 1024)
+                f.seek(position - step)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    position = position - step + newline + 1
+                    break
+                position -= step
+            if position < end:
+                f.truncate(position)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield every record in the checkpoint, tolerating a torn final line"""
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves at most one partial line at the end
+                    continue
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Yield the stored result of every page that produced evidence, in crawl order"""
+
+        for record in self.iter_records():
+            if record.get('kind') == 'page' and record.get('result') is not None:
+                yield record['result']
+
+    def is_visited(self, url: str) -> bool:
+        """Check whether a page was already analyzed in this or a previous run"""
+        return url in self.visited_urls
+
+    def is_seed_complete(self, seed: str) -> bool:
+        """Check whether every page reachable from a seed was already analyzed"""
+        return seed in self.completed_seeds
+
+    def record_page(self, url: str, result: Optional[Dict[str, Any]] = None,
+                    canonical_url: Optional[str] = None, fingerprint: Optional[int] = None):
+        """Append an analyzed page and flush it to disk
+
+        Pages without evidence are recorded with no result so a resume still skips them.
+        The canonical URL and fingerprint let a resume rebuild the duplicate index.
+        """
+
+        self._write({
+            'kind': 'page',
+            'url': url,
+            'canonical_url': canonical_url,
+            'fingerprint': fingerprint,
+            'result': result
+        })
+        self.visited_urls.add(url)
+
+    def record_duplicate(self, url: str, duplicate_of: str, reason: str):
+        """Append a page that was skipped as a duplicate of an already analyzed page"""
+
+        self._write({'kind': 'duplicate', 'url': url, 'duplicate_of': duplicate_of, 'reason': reason})
+        self.visited_urls.add(url)
+
+    def mark_seed_complete(self, seed: str):
+        """Record that the crawl from a seed finished so a resume can skip it"""
+
+        self._write({'kind': 'seed_complete', 'seed': seed})
+        self.completed_seeds.add(seed)
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        """Close the underlying checkpoint file"""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def save_report_with_results(findings: Dict[str, Any], output_path, results_key: str,
+                             results: Iterable[Dict[str, Any]]):
+    """Write a JSON report, streaming the detailed results list instead of holding it in memory"""
+
+    head = json.dumps(findings, indent=2, ensure_ascii=False)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        # Reopen the top-level object so the results list can be appended as its last key
+        f.write(head[:-2] + ',\n' if findings else '{\n')
+        f.write(f'  {json.dumps(results_key)}: [')
+
+        first = True
+        for result in results:
+            f.write('\n' if first else ',\n')
+            f.write(textwrap.indent(json.dumps(result, indent=2, ensure_ascii=False), '    '))
+            first = False
+
+        f.write('\n  ]\n}' if not first else ']\n}')
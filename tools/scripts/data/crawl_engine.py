@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Shared deep crawl engine for config-driven research studies
+Fetches each page once and runs every study that covers it over the same page stream
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+from crawl4ai.deep_crawling.filters import FilterChain, URLPatternFilter, ContentTypeFilter
+from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+
+from crawl_checkpoint import CrawlCheckpoint, save_report_with_results
+from page_dedup import DedupIndex, canonicalize_url, summarize_duplicates
+from crawl_strategy import RelevanceCutoff, build_deep_crawl_strategy, url_keywords
+
+STUDIES_FILE = Path(__file__).with_name("research_studies.json")
+
+# "browser" renders pages in headless Chromium; "http" fetches raw HTML without a browser
+FETCHERS = ("browser", "http")
+
+
+def make_crawler(fetcher: str = "browser") -> AsyncWebCrawler:
+    """Create the crawler for a fetcher name"""
+
+    if fetcher == "http":
+        return AsyncWebCrawler(crawler_strategy=AsyncHTTPCrawlerStrategy())
+    if fetcher == "browser":
+        return AsyncWebCrawler()
+    raise ValueError(f"Unknown fetcher: {fetcher} (expected one of {', '.join(FETCHERS)})")
+
+
+def find_snippets(content: str, terms: List[str], context: int) -> List[Dict[str, str]]:
+    """Text around the first occurrence of each term found in the content"""
+
+    snippets = []
+    for term in terms:
+        position = content.find(term)
+        if position < 0:
+            continue
+        start = max(0, position - context)
+        end = min(len(content), position + context)
+        snippets.append({'term': term, 'context': content[start:end].strip()})
+    return snippets
+
+
+def _unique(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+def analyze_page(studies: List["Study"], html: str) -> Dict[str, Dict[str, Any]]:
+    """Evidence of each study that found any on a page"""
+
+    # Lower-cased once per page, however many studies read it
+    content = html.lower()
+    evidence = {}
+    for study in studies:
+        found = study.analyze(content)
+        if found:
+            evidence[study.name] = found
+    return evidence
+
+
+class Study:
+    """One research question from the studies config: what to crawl, what to score and how to report it
+
+    Each indicator group scores one point per indicator found on a page and is stored as
+    `<group>_score`. A page is evidence when any group scores or a snippet is found.
+    """
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.config = config
+        self.title = config['title']
+        self.seeds: List[str] = list(config['seeds'])
+        self.terms: List[str] = list(config['terms'])
+        self.url_patterns: List[str] = list(config['url_patterns'])
+        self.max_depth = config['max_depth']
+        self.max_pages = config['max_pages']
+        self.evidence_key = config.get('evidence_key', 'evidence')
+        self.indicators: Dict[str, List[str]] = config['indicators']
+        self.snippets: Dict[str, Any] = config.get('snippets', {})
+        self.report: Dict[str, Any] = config['report']
+        self.rules: Dict[str, Any] = config.get('assessment', {})
+        self.url_filter = URLPatternFilter(patterns=self.url_patterns)
+
+    def as_config(self) -> Dict[str, Any]:
+        """The study's config, with any seeds or limits changed since it was loaded"""
+
+        return dict(self.config, seeds=self.seeds, terms=self.terms, url_patterns=self.url_patterns,
+                    max_depth=self.max_depth, max_pages=self.max_pages)
+
+    def accepts(self, url: str, depth: int) -> bool:
+        """Whether this study's own crawl would have reached the page
+
+        Seeds are always accepted, like crawl4ai never filters the start URL.
+        """
+
+        return depth <= self.max_depth and (depth == 0 or self.url_filter.apply(url))
+
+    def analyze(self, content: str) -> Optional[Dict[str, Any]]:
+        """Score lower-cased page text; None when the page holds no evidence for this study"""
+
+        evidence: Dict[str, Any] = {
+            f'{group}_score': sum(1 for term in terms if term in content)
+            for group, terms in self.indicators.items()
+        }
+
+        # Snippets come from the study's terms as one list, or from named indicator groups as one list each
+        context = self.snippets.get('context', 100)
+        source = self.snippets.get('from', 'terms')
+        if isinstance(source, list):
+            snippets = {group: find_snippets(content, self.indicators[group], context) for group in source}
+            found = any(snippets.values())
+        else:
+            snippets = find_snippets(content, self.terms, context)
+            found = bool(snippets)
+        evidence[self.snippets.get('key', 'snippets')] = snippets
+
+        total_score = sum(evidence[f'{group}_score'] for group in self.indicators)
+        return evidence if total_score > 0 or found else None
+
+    def iter_results(self, checkpoint) -> Iterator[Dict[str, Any]]:
+        """This study's evidence from a shared checkpoint or crawl frontier, in the layout its report has always used"""
+
+        for result in checkpoint.iter_results():
+            evidence = result['studies'].get(self.name)
+            if evidence is None:
+                continue
+            yield {
+                'url': result['url'],
+                'title': result['title'],
+                'depth': result['depth'],
+                self.evidence_key: evidence,
+                'relevance_score': result['relevance_score'],
+                'timestamp': result['timestamp']
+            }
+
+    def compile(self, results: Iterable[Dict[str, Any]], deduplication: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the study's findings from its evidence in a single pass"""
+
+        report = self.report
+        sources = report['sources']
+        summary: Dict[str, Any] = {report['count_key'].format(group=group): 0 for group in self.indicators}
+        summary[sources['key']] = []
+        for key in report.get('lists', []):
+            summary[key] = []
+
+        findings = {
+            report['title_key']: self.title,
+            'research_timestamp': datetime.now().isoformat(),
+            'total_evidence_sources': 0,
+            report['summary_key']: summary,
+            report['assessment_key']: {}
+        }
+
+        for result in results:
+            evidence = result[self.evidence_key]
+            findings['total_evidence_sources'] += 1
+
+            scores = {group: evidence[f'{group}_score'] for group in self.indicators}
+            for group, score in scores.items():
+                if score > 0:
+                    summary[report['count_key'].format(group=group)] += 1
+
+            total_score = sum(scores.values())
+            if total_score >= sources.get('min_total', 1):
+                source = {'url': result['url'], 'title': result['title']}
+                if sources.get('scores_key'):
+                    source[sources['scores_key']] = scores
+                source[sources.get('total_key', 'total_score')] = total_score
+                summary[sources['key']].append(source)
+
+        # Report how many crawled pages were collapsed into an already analyzed page
+        findings['deduplication'] = deduplication
+        findings[report['assessment_key']] = self.assess(findings)
+        return findings
+
+    def assess(self, findings: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the study's assessment rules to its evidence counts
+
+        Tiers are checked in order and the first whose minimums all hold wins. A tier can
+        require a group's count, `sources` (evidence sources) or `evidence` (all group counts).
+        """
+
+        summary = findings[self.report['summary_key']]
+        counts = {group: summary[self.report['count_key'].format(group=group)] for group in self.indicators}
+        measures = dict(counts, sources=findings['total_evidence_sources'], evidence=sum(counts.values()))
+
+        assessment = dict(self.rules.get('defaults', {}))
+        extremes = self.rules.get('extremes')
+        if extremes and max(counts.values()) > 0:
+            assessment[extremes['most']] = max(counts, key=counts.get)
+            assessment[extremes['least']] = min(counts, key=counts.get)
+
+        for tier in self.rules.get('tiers', []):
+            if all(measures[key] >= minimum for key, minimum in tier['when'].items()):
+                assessment.update(tier['set'])
+                break
+
+        recommendations = []
+        for rule in self.rules.get('recommendations', []):
+            text = rule['then'] if counts[rule['group']] >= rule['min'] else rule.get('else')
+            if text:
+                recommendations.append(text)
+        assessment['recommendations'] = recommendations
+        return assessment
+
+
+def load_studies(path=STUDIES_FILE, names: Optional[List[str]] = None) -> List[Study]:
+    """Load studies from the JSON config, all of them or the named ones in the given order"""
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    names = names or list(config)
+    unknown = [name for name in names if name not in config]
+    if unknown:
+        raise ValueError(f"Unknown studies: {', '.join(unknown)} (configured: {', '.join(config)})")
+    return [Study(name, config[name]) for name in names]
+
+
+def plan_seeds(studies: List[Study]) -> List[Tuple[str, List[Study]]]:
+    """Every distinct seed once, with the studies that start from it"""
+
+    plan: Dict[str, Tuple[str, List[Study]]] = {}
+    for study in studies:
+        for seed in study.seeds:
+            plan.setdefault(canonicalize_url(seed), (seed, []))[1].append(study)
+    return list(plan.values())
+
+
+def crawl_scope(studies: List[Study]) -> Tuple[List[str], List[str]]:
+    """URL patterns and scorer keywords covering everything the given studies would crawl"""
+
+    patterns = _unique(pattern for study in studies for pattern in study.url_patterns)
+    keywords = url_keywords(_unique(term for study in studies for term in study.terms))
+    return patterns, keywords
+
+
+class StudyCrawler:
+    """Crawl the seeds of several studies once and run each study over the pages it covers
+
+    Seeds shared by studies are crawled once with the union of their URL patterns and
+    scorer terms, the deepest depth and the largest page budget. Each page is then handed
+    to every study whose own depth, patterns and budget would have reached it, so adding
+    a study adds analysis per page but no fetches for seeds already crawled. A page already
+    analyzed from another seed is not analyzed again, even for studies that only start
+    from the later seed.
+    """
+
+    def __init__(self, studies: List[Study], checkpoint_file, resume: bool = False,
+                 crawl_strategy: str = "bfs", min_relevance: float = 0.0, fetcher: str = "browser"):
+        self.studies = studies
+        self.crawl_strategy = crawl_strategy
+        self.min_relevance = min_relevance
+        self.fetcher = fetcher
+
+        # Analyzed pages of every study share one JSONL checkpoint
+        self.checkpoint = CrawlCheckpoint(checkpoint_file, resume=resume)
+
+        # Mirrored and overlapping pages across seeds are analyzed only once
+        self.dedup_index = DedupIndex()
+        if resume:
+            self.dedup_index.load(self.checkpoint.iter_records())
+
+    def seed_plan(self) -> List[Tuple[str, List[Study]]]:
+        """Every distinct seed once, with the studies that start from it"""
+        return plan_seeds(self.studies)
+
+    def crawl_config(self, studies: List[Study]) -> CrawlerRunConfig:
+        """Deep crawl config covering everything the given studies would crawl on their own"""
+
+        patterns, keywords = crawl_scope(studies)
+        filter_chain = FilterChain([
+            URLPatternFilter(patterns=patterns),
+            ContentTypeFilter(allowed_types=["text/html"])
+        ])
+        scorer = KeywordRelevanceScorer(keywords=keywords)
+        deep_crawl_strategy = build_deep_crawl_strategy(
+            self.crawl_strategy,
+            max_depth=max(study.max_depth for study in studies),
+            max_pages=max(study.max_pages for study in studies),
+            filter_chain=filter_chain,
+            scorer=scorer
+        )
+        return CrawlerRunConfig(
+            deep_crawl_strategy=deep_crawl_strategy,
+            scraping_strategy=LXMLWebScrapingStrategy(),
+            verbose=True,
+            stream=True  # Analyze and checkpoint each page as soon as it is fetched
+        )
+
+    async def crawl(self):
+        """Crawl every seed once, checkpointing each page with the evidence of every study"""
+
+        async with make_crawler(self.fetcher) as crawler:
+            for url, studies in self.seed_plan():
+                if self.checkpoint.is_seed_complete(url):
+                    print(f"\n⏭️  Skipping completed seed: {url}")
+                    continue
+
+                print(f"\n🚀 Deep crawling {url} for {', '.join(study.name for study in studies)}")
+                try:
+                    await self._crawl_seed(crawler, url, studies)
+                except Exception as e:
+                    print(f"❌ Error crawling {url}: {str(e)}")
+
+    async def _crawl_seed(self, crawler: AsyncWebCrawler, url: str, studies: List[Study]):
+        page_count = 0
+        skipped_count = 0
+        duplicate_count = 0
+        pages_taken = {study.name: 0 for study in studies}
+        cutoff = RelevanceCutoff(self.min_relevance) if self.crawl_strategy == "best-first" else None
+
+        stream = await crawler.arun(url, config=self.crawl_config(studies))
+        async for result in stream:
+            if self.checkpoint.is_visited(result.url):
+                skipped_count += 1
+                continue
+
+            if cutoff and cutoff.observe(result.metadata.get('score')):
+                print(f"🛑 Relevance fell below {self.min_relevance}, stopping early")
+                await stream.aclose()
+                break
+
+            canonical_url, fingerprint, duplicate_of, reason = self.dedup_index.check(
+                result.url, result.cleaned_html if result.success else None
+            )
+            if duplicate_of is not None:
+                duplicate_count += 1
+                self.checkpoint.record_duplicate(result.url, duplicate_of, reason)
+                continue
+            self.dedup_index.add(canonical_url, result.url, fingerprint)
+
+            page_count += 1
+            depth = result.metadata.get('depth', 0)
+            covering = [
+                study for study in studies
+                if pages_taken[study.name] < study.max_pages and study.accepts(result.url, depth)
+            ]
+            for study in covering:
+                pages_taken[study.name] += 1
+            evidence = analyze_page(covering, result.cleaned_html) if result.success and covering else {}
+
+            self.checkpoint.record_page(result.url, {
+                'url': result.url,
+                'title': result.metadata.get('title', 'Unknown'),
+                'depth': depth,
+                'studies': evidence,
+                'relevance_score': result.metadata.get('score', 0),
+                'timestamp': datetime.now().isoformat()
+            } if evidence else None, canonical_url=canonical_url, fingerprint=fingerprint)
+
+        self.checkpoint.mark_seed_complete(url)
+        print(f"✅ Analyzed {page_count} pages "
+              f"({duplicate_count} duplicates skipped, {skipped_count} already checkpointed)")
+
+    def compile(self, study: Study) -> Dict[str, Any]:
+        """Findings for one study from the shared checkpoint"""
+        return study.compile(study.iter_results(self.checkpoint), summarize_duplicates(self.checkpoint.iter_records()))
+
+    def save_report(self, study: Study, findings: Dict[str, Any], output_file=None) -> Path:
+        """Write one study's report, streaming its detailed evidence from the checkpoint"""
+
+        output_path = Path(output_file or study.report['output'])
+        save_report_with_results(
+            findings, output_path, study.report['results_key'], study.iter_results(self.checkpoint)
+        )
+        return output_path
+
+    def close(self):
+        self.checkpoint.close()
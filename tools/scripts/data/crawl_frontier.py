@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite URL frontier shared by several crawl worker processes
+Workers lease URLs, fetch and analyze them with their own crawler and write pages and new links back
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from crawl4ai import CrawlerRunConfig
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl4ai.deep_crawling.filters import URLPatternFilter, ContentTypeFilter
+from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
+
+from crawl_checkpoint import save_report_with_results
+from crawl_engine import Study, analyze_page, crawl_scope, make_crawler, plan_seeds
+from page_dedup import BAND_BITS, FINGERPRINT_BITS, canonicalize_url, page_text, simhash, summarize_duplicates
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS studies (position INTEGER PRIMARY KEY, name TEXT NOT NULL, config TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS seeds (
+    seed TEXT PRIMARY KEY,
+    studies TEXT NOT NULL,
+    max_depth INTEGER NOT NULL,
+    max_pages INTEGER NOT NULL,
+    enqueued INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    seed TEXT NOT NULL,
+    study TEXT NOT NULL,
+    taken INTEGER NOT NULL DEFAULT 0,
+    max_pages INTEGER NOT NULL,
+    PRIMARY KEY (seed, study)
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY,
+    canonical_url TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    seed TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    score REAL NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS frontier_by_depth ON frontier (state, depth, id);
+CREATE INDEX IF NOT EXISTS frontier_by_score ON frontier (state, score);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    canonical_url TEXT,
+    fingerprint TEXT,
+    duplicate_of TEXT,
+    reason TEXT,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, key INTEGER NOT NULL, fingerprint TEXT NOT NULL, url TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS bands_by_key ON bands (band, key);
+"""
+
+
+class Lease(NamedTuple):
+    id: int
+    url: str
+    seed: str
+    depth: int
+    score: float
+
+
+class CrawlFrontier:
+    """URL frontier, visited set and analyzed pages of a multi-process crawl in one SQLite file
+
+    Every URL is stored once under its canonical form, so the frontier doubles as the
+    visited set. Workers claim URLs by leasing them for `lease_seconds`. When a lease runs
+    out because its worker died or hung, the URL goes to the next worker that claims, up
+    to `max_attempts` claims before it is marked failed. Completing a page is one
+    transaction: the content duplicate check, the study budgets, the page result and its
+    new links. A crash leaves a page either fully recorded or still leased.
+    """
+
+    def __init__(self, path, lease_seconds: float = 60.0, max_attempts: int = 3, max_distance: int = 3):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_distance = max_distance
+        # Autocommit mode; writes go through _transaction so they take the write lock up front
+        self.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def reset(self, studies: List[Study], crawl_strategy: str = "bfs"):
+        """Start a new crawl: drop everything and queue every distinct seed of the studies"""
+
+        with self._transaction() as conn:
+            for table in ("meta", "studies", "seeds", "budgets", "frontier", "pages", "bands"):
+                conn.execute(f"DELETE FROM {table}")
+            conn.execute("INSERT INTO meta VALUES ('crawl_strategy', ?)", (crawl_strategy,))
+            conn.executemany("INSERT INTO studies VALUES (?, ?, ?)",
+                             [(i, study.name, json.dumps(study.as_config())) for i, study in enumerate(studies)])
+            for seed, seed_studies in plan_seeds(studies):
+                conn.execute("INSERT INTO seeds VALUES (?, ?, ?, ?, 1)", (
+                    seed, json.dumps([study.name for study in seed_studies]),
+                    max(study.max_depth for study in seed_studies), max(study.max_pages for study in seed_studies)
+                ))
+                conn.executemany("INSERT INTO budgets VALUES (?, ?, 0, ?)",
+                                 [(seed, study.name, study.max_pages) for study in seed_studies])
+                conn.execute("INSERT OR IGNORE INTO frontier (canonical_url, url, seed, depth) VALUES (?, ?, ?, 0)",
+                             (canonicalize_url(seed), seed, seed))
+
+    def requeue_leased(self) -> int:
+        """Return every leased URL to the queue; only safe while no worker is running"""
+
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE frontier SET state = 'queued', lease_owner = NULL, lease_expires = NULL WHERE state = 'leased'"
+            ).rowcount
+
+    def is_started(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'crawl_strategy'").fetchone() is not None
+
+    def crawl_strategy(self) -> str:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'crawl_strategy'").fetchone()
+        return row[0] if row else "bfs"
+
+    def load_studies(self) -> List[Study]:
+        """The studies the crawl was started with, as stored in the frontier"""
+        return [Study(name, json.loads(config))
+                for name, config in self.conn.execute("SELECT name, config FROM studies ORDER BY position")]
+
+    def seeds(self) -> Dict[str, Tuple[List[str], int]]:
+        """{seed: (study names, max depth)}"""
+        return {seed: (json.loads(studies), max_depth)
+                for seed, studies, max_depth in self.conn.execute("SELECT seed, studies, max_depth FROM seeds")}
+
+    def claim(self, owner: str, limit: int) -> List[Lease]:
+        """Lease up to `limit` queued or expired URLs, shallowest first for bfs and best scored for best-first"""
+
+        order = "score DESC, id" if self.crawl_strategy() == "best-first" else "depth, id"
+        now = time.time()
+        with self._transaction() as conn:
+            # A URL whose lease ran out too often is given up on, so a page that kills workers cannot loop forever
+            conn.execute("UPDATE frontier SET state = 'failed' WHERE state = 'leased' AND lease_expires < ? "
+                         "AND attempts >= ?", (now, self.max_attempts))
+            rows = conn.execute(f"""
+                UPDATE frontier SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE id IN (SELECT id FROM frontier
+                             WHERE state = 'queued' OR (state = 'leased' AND lease_expires < ?)
+                             ORDER BY {order} LIMIT ?)
+                RETURNING id, url, seed, depth, score
+            """, (owner, now + self.lease_seconds, now, limit)).fetchall()
+        return [Lease(*row) for row in rows]
+
+    def release(self, lease: Lease, owner: str):
+        """Give a URL back after a failed fetch so it can be retried, up to max_attempts claims"""
+
+        with self._transaction() as conn:
+            conn.execute("UPDATE frontier SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                         "lease_owner = NULL, lease_expires = NULL "
+                         "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                         (self.max_attempts, lease.id, owner))
+
+    def complete(self, lease: Lease, owner: str, page: Dict[str, Any], fingerprint: Optional[int],
+                 evidence: Dict[str, Dict[str, Any]], covering: List[str], links: List[Tuple[str, float]]) -> bool:
+        """Record a fetched page, its evidence per study and its outgoing links
+
+        `covering` names the studies whose depth and patterns reach the page; each takes one
+        page of its budget for this seed, and a study with no budget left drops its evidence.
+        Returns False when the lease ran out and the URL was handed to another worker.
+        """
+
+        with self._transaction() as conn:
+            row = conn.execute("SELECT canonical_url FROM frontier WHERE id = ? AND state = 'leased' "
+                               "AND lease_owner = ?", (lease.id, owner)).fetchone()
+            if row is None:
+                return False
+            canonical_url = row[0]
+            conn.execute("UPDATE frontier SET state = 'done', lease_owner = NULL, lease_expires = NULL, "
+                         "completed_at = ? WHERE id = ?", (time.time(), lease.id))
+
+            duplicate_of = self._find_near_duplicate(fingerprint)
+            if duplicate_of is not None:
+                conn.execute("INSERT INTO pages (kind, url, duplicate_of, reason) VALUES ('duplicate', ?, ?, 'content')",
+                             (lease.url, duplicate_of))
+                return True
+
+            if fingerprint is not None:
+                mask = (1 << BAND_BITS) - 1
+                conn.executemany("INSERT INTO bands VALUES (?, ?, ?, ?)", [
+                    (band, fingerprint >> (band * BAND_BITS) & mask, f"{fingerprint:016x}", lease.url)
+                    for band in range(FINGERPRINT_BITS // BAND_BITS)
+                ])
+
+            taken = {study for study in covering if conn.execute(
+                "UPDATE budgets SET taken = taken + 1 WHERE seed = ? AND study = ? AND taken < max_pages",
+                (lease.seed, study)
+            ).rowcount}
+            evidence = {study: found for study, found in evidence.items() if study in taken}
+            conn.execute("INSERT INTO pages (kind, url, canonical_url, fingerprint, result) VALUES ('page', ?, ?, ?, ?)", (
+                lease.url, canonical_url, None if fingerprint is None else f"{fingerprint:016x}",
+                json.dumps(dict(page, studies=evidence), ensure_ascii=False) if evidence else None
+            ))
+            self._enqueue(conn, lease.seed, lease.depth + 1, links)
+        return True
+
+    def _find_near_duplicate(self, fingerprint: Optional[int]) -> Optional[str]:
+        # Same banding as DedupIndex: a pair within max_distance bits shares at least one 16-bit band
+        if fingerprint is None:
+            return None
+        mask = (1 << BAND_BITS) - 1
+        for band in range(FINGERPRINT_BITS // BAND_BITS):
+            for candidate, url in self.conn.execute("SELECT fingerprint, url FROM bands WHERE band = ? AND key = ?",
+                                                    (band, fingerprint >> (band * BAND_BITS) & mask)):
+                if bin(int(candidate, 16) ^ fingerprint).count("1") <= self.max_distance:
+                    return url
+        return None
+
+    def _enqueue(self, conn: sqlite3.Connection, seed: str, depth: int, links: List[Tuple[str, float]]):
+        # The seed's page budget is spent as URLs are queued, so no worker fetches past it
+        enqueued, max_pages = conn.execute("SELECT enqueued, max_pages FROM seeds WHERE seed = ?", (seed,)).fetchone()
+        added = 0
+        for url, score in links:
+            if enqueued + added >= max_pages:
+                break
+            added += conn.execute("INSERT OR IGNORE INTO frontier (canonical_url, url, seed, depth, score) "
+                                  "VALUES (?, ?, ?, ?, ?)", (canonicalize_url(url), url, seed, depth, score)).rowcount
+        if added:
+            conn.execute("UPDATE seeds SET enqueued = enqueued + ? WHERE seed = ?", (added, seed))
+
+    def pending(self) -> int:
+        """URLs still queued or leased"""
+        return self.conn.execute("SELECT COUNT(*) FROM frontier WHERE state IN ('queued', 'leased')").fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Frontier URLs per state, plus how many were claimed more than once"""
+
+        counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall())
+        counts["reclaimed"] = self.conn.execute("SELECT COUNT(*) FROM frontier WHERE attempts > 1").fetchone()[0]
+        return counts
+
+    def completion_times(self) -> List[float]:
+        """Wall clock time each done URL was completed, in order"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT completed_at FROM frontier WHERE state = 'done' ORDER BY completed_at")]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Page and duplicate records in completion order, shaped like CrawlCheckpoint records"""
+
+        for kind, url, canonical_url, fingerprint, duplicate_of, reason, result in self.conn.execute(
+                "SELECT kind, url, canonical_url, fingerprint, duplicate_of, reason, result FROM pages ORDER BY id"):
+            if kind == "duplicate":
+                yield {'kind': kind, 'url': url, 'duplicate_of': duplicate_of, 'reason': reason}
+            else:
+                yield {'kind': kind, 'url': url, 'canonical_url': canonical_url,
+                       'fingerprint': None if fingerprint is None else int(fingerprint, 16),
+                       'result': None if result is None else json.loads(result)}
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Stored result of every page that produced evidence, in completion order"""
+
+        for (result,) in self.conn.execute("SELECT result FROM pages WHERE result IS NOT NULL ORDER BY id"):
+            yield json.loads(result)
+
+    def close(self):
+        self.conn.close()
+
+
+class SeedScope:
+    """What a worker needs to analyze pages and follow links under one seed"""
+
+    def __init__(self, studies: List[Study], max_depth: int):
+        self.studies = studies
+        self.max_depth = max_depth
+        patterns, keywords = crawl_scope(studies)
+        self.url_filter = URLPatternFilter(patterns=patterns)
+        self.scorer = KeywordRelevanceScorer(keywords=keywords)
+
+
+async def run_worker(frontier_file, fetcher: str = "browser", batch: int = 4, lease_seconds: float = 60.0,
+                     poll: float = 0.2) -> int:
+    """Claim, fetch, analyze and complete URLs until the frontier is drained; returns pages completed
+
+    Each worker fetches up to `batch` leased URLs at a time with its own crawler.
+    """
+
+    frontier = CrawlFrontier(frontier_file, lease_seconds=lease_seconds)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    studies = {study.name: study for study in frontier.load_studies()}
+    scopes = {seed: SeedScope([studies[name] for name in names], max_depth)
+              for seed, (names, max_depth) in frontier.seeds().items()}
+    content_filter = ContentTypeFilter(allowed_types=["text/html"])
+    config = CrawlerRunConfig(scraping_strategy=LXMLWebScrapingStrategy(), verbose=False)
+    completed = 0
+
+    async with make_crawler(fetcher) as crawler:
+        while True:
+            leases = frontier.claim(owner, batch)
+            if not leases:
+                # Other workers may still add links from the pages they hold
+                if not frontier.pending():
+                    break
+                await asyncio.sleep(poll)
+                continue
+
+            results = await asyncio.gather(*(crawler.arun(lease.url, config=config) for lease in leases),
+                                           return_exceptions=True)
+            for lease, result in zip(leases, results):
+                if isinstance(result, BaseException):
+                    print(f"❌ Error crawling {lease.url}: {result}")
+                    frontier.release(lease, owner)
+                    continue
+
+                scope = scopes[lease.seed]
+                covering = [study for study in scope.studies if study.accepts(lease.url, lease.depth)]
+                html = result.cleaned_html if result.success else None
+                links = []
+                if result.success and lease.depth < scope.max_depth:
+                    for link in result.links.get('internal', []):
+                        href = link.get('href')
+                        if href and scope.url_filter.apply(href) and content_filter.apply(href):
+                            links.append((href, scope.scorer.score(href)))
+
+                completed += frontier.complete(lease, owner, {
+                    'url': lease.url,
+                    'title': (result.metadata or {}).get('title', 'Unknown'),
+                    'depth': lease.depth,
+                    'relevance_score': lease.score,
+                    'timestamp': datetime.now().isoformat()
+                }, simhash(page_text(html)) if html else None,
+                    analyze_page(covering, html) if html and covering else {},
+                    [study.name for study in covering], links)
+
+    frontier.close()
+    return completed
+
+
+def worker_process(frontier_file, fetcher: str, batch: int, lease_seconds: float):
+    """Entry point of a spawned worker process"""
+
+    completed = asyncio.run(run_worker(frontier_file, fetcher=fetcher, batch=batch, lease_seconds=lease_seconds))
+    print(f"✅ Worker {os.getpid()} completed {completed} pages")
+
+
+class FrontierCrawler:
+    """Crawl studies with several worker processes sharing one CrawlFrontier
+
+    Each worker runs its own crawler (and browser), so the crawl is no longer held to one
+    CPU. Studies see pages exactly as with StudyCrawler, except that the pages a seed's
+    budget buys depend on which worker finishes first. Relevance cutoff is not applied.
+    """
+
+    def __init__(self, studies: List[Study], frontier_file, resume: bool = False, crawl_strategy: str = "bfs",
+                 fetcher: str = "browser", workers: int = 4, batch: int = 4, lease_seconds: float = 60.0):
+        self.frontier_file = str(frontier_file)
+        self.fetcher = fetcher
+        self.workers = workers
+        self.batch = batch
+        self.lease_seconds = lease_seconds
+        self.frontier = CrawlFrontier(frontier_file, lease_seconds=lease_seconds)
+        self.processes: List[multiprocessing.Process] = []
+
+        if resume and self.frontier.is_started():
+            # No worker of the previous run is alive, so every lease it left is stale
+            requeued = self.frontier.requeue_leased()
+            if requeued:
+                print(f"♻️  Requeued {requeued} URLs leased by the previous run")
+        else:
+            self.frontier.reset(studies, crawl_strategy)
+        self.studies = self.frontier.load_studies()
+
+    def start(self) -> List[multiprocessing.Process]:
+        """Spawn the worker processes"""
+
+        context = multiprocessing.get_context("spawn")
+        self.processes = [
+            context.Process(target=worker_process, name=f"crawl-worker-{i}",
+                            args=(self.frontier_file, self.fetcher, self.batch, self.lease_seconds))
+            for i in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+        return self.processes
+
+    def join(self) -> List[Optional[int]]:
+        """Wait for every worker; returns their exit codes"""
+
+        for process in self.processes:
+            process.join()
+        return [process.exitcode for process in self.processes]
+
+    def crawl(self) -> List[Optional[int]]:
+        """Run the workers until the frontier is drained"""
+
+        self.start()
+        return self.join()
+
+    def compile(self, study: Study) -> Dict[str, Any]:
+        """Findings for one study from the frontier's pages"""
+        return study.compile(study.iter_results(self.frontier), summarize_duplicates(self.frontier.iter_records()))
+
+    def save_report(self, study: Study, findings: Dict[str, Any], output_file=None) -> Path:
+        """Write one study's report, streaming its detailed evidence from the frontier"""
+
+        output_path = Path(output_file or study.report['output'])
+        save_report_with_results(
+            findings, output_path, study.report['results_key'], study.iter_results(self.frontier)
+        )
+        return output_path
+
+    def close(self):
+        self.frontier.close()
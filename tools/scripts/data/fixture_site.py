@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Offline fixture web corpus for the research crawlers
+Generates (or loads a recorded) site graph and serves it locally with controllable
+link fan-out, page size and latency, plus a mock GitHub repository search API
+"""
+
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+# Every fixture path sits under a section the researchers' URL filters accept
+SECTIONS = ["architecture", "patterns", "design"]
+OFF_TOPIC_SLUGS = ["news", "careers", "events", "podcast", "about", "pricing", "team", "press"]
+FILLER_WORDS = [
+    "update", "release", "company", "people", "office", "weekly", "schedule", "register",
+    "announcement", "support", "contact", "community", "meetup", "newsletter", "policy"
+]
+
+class FixtureSite:
+    """An in-memory site graph: page paths, topic labels, outgoing links and rendered HTML"""
+
+    def __init__(self, paths: List[str], relevant: List[bool], links: List[List[int]],
+                 pages: Optional[Dict[str, str]] = None):
+        self.paths = paths
+        self.relevant = relevant
+        self.links = links
+        self.pages = pages or {}
+        self.entry_pages: List[int] = []
+
+    @classmethod
+    def generate(cls, topic_words: List[str], topic_phrases: List[str], pages: int = 500,
+                 fan_out: int = 8, page_bytes: int = 8000, relevant_share: float = 0.15,
+                 homophily: float = 0.7, slug_accuracy: float = 1.0, seed: int = 0) -> "FixtureSite":
+        """Generate a site where on-topic pages mostly link to each other
+
+        A page is relevant by its content (topic phrases in the body). Its URL slug names the
+        topic with probability slug_accuracy and the other kind of slug otherwise, so below 1.0
+        the URL is only a noisy hint of what the page holds.
+        """
+
+        rng = random.Random(seed)
+        paths, relevant = [], []
+        for i in range(pages):
+            is_relevant = rng.random() < relevant_share
+            topical_slug = is_relevant if slug_accuracy >= 1.0 or rng.random() < slug_accuracy else not is_relevant
+            slug = "-".join(rng.sample(topic_words, 2)) if topical_slug else rng.choice(OFF_TOPIC_SLUGS)
+            paths.append(f"/{rng.choice(SECTIONS)}/{slug}/page-{i}")
+            relevant.append(is_relevant)
+
+        relevant_ids = [i for i in range(pages) if relevant[i]]
+        other_ids = [i for i in range(pages) if not relevant[i]]
+        links = []
+        for i in range(pages):
+            same, different = (relevant_ids, other_ids) if relevant[i] else (other_ids, relevant_ids)
+            targets = set()
+            while len(targets) < min(fan_out, pages - 1):
+                pool = same if rng.random() < homophily and same else different or same
+                target = rng.choice(pool)
+                if target != i:
+                    targets.add(target)
+            links.append(sorted(targets))
+
+        site = cls(paths, relevant, links)
+        for i in range(pages):
+            phrases = rng.sample(topic_phrases, min(5, len(topic_phrases))) if relevant[i] else []
+            site.pages[paths[i]] = site.render_page(i, phrases, page_bytes, rng)
+        site.entry_pages = rng.sample(range(pages), min(fan_out, pages))
+        site.pages["/"] = site.render_index(site.entry_pages)
+        return site
+
+    def render_page(self, page: int, phrases: List[str], page_bytes: int, rng: random.Random) -> str:
+        """Render one page: its topic phrases, filler text up to page_bytes and its links"""
+
+        body = [f"<p>{html.escape(phrase)} in practice.</p>" for phrase in phrases]
+        size = sum(len(part) for part in body)
+        while size < page_bytes:
+            sentence = " ".join(rng.choice(FILLER_WORDS) for _ in range(12))
+            body.append(f"<p>{sentence}.</p>")
+            size += len(sentence) + 8
+
+        anchors = "".join(
+            f'<li><a href="{self.paths[link]}">{self.paths[link]}</a></li>' for link in self.links[page]
+        )
+        return (f"<html><head><title>Fixture page {page}</title></head><body>"
+                f"<h1>{self.paths[page]}</h1>{''.join(body)}<ul>{anchors}</ul></body></html>")
+
+    def render_index(self, entry_pages: List[int]) -> str:
+        anchors = "".join(f'<li><a href="{self.paths[page]}">{self.paths[page]}</a></li>' for page in entry_pages)
+        return f"<html><head><title>Fixture site</title></head><body><ul>{anchors}</ul></body></html>"
+
+    def save(self, path):
+        """Record the site so later runs replay exactly the same corpus"""
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"paths": self.paths, "relevant": self.relevant, "links": self.links,
+                       "entry_pages": self.entry_pages, "pages": self.pages}, f)
+
+    @classmethod
+    def load(cls, path) -> "FixtureSite":
+        """Load a recorded site saved with save()"""
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        site = cls(data["paths"], data["relevant"], data["links"], data["pages"])
+        site.entry_pages = data.get("entry_pages", [])
+        return site
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    # A deep listen backlog keeps concurrent crawlers from hitting SYN retry stalls
+    request_queue_size = 128
+    daemon_threads = True
+
+class FixtureServer:
+    """Serve a FixtureSite over HTTP on 127.0.0.1 from a background thread
+
+    Also answers /search/repositories like the GitHub search API so the pain point
+    researcher can be driven offline. Request counts are kept for throughput metrics.
+    """
+
+    def __init__(self, site: FixtureSite, latency: float = 0.0, port: int = 0):
+        self.site = site
+        self.latency = latency
+        self.page_requests = 0
+        self.api_requests = 0
+        self._lock = threading.Lock()
+        self.httpd = FixtureHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def _count(self, attribute: str):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def _make_handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if parsed.path == "/search/repositories":
+                    server._count("api_requests")
+                    query = parse_qs(parsed.query).get("q", [""])[0]
+                    self._send(200, "application/json", json.dumps(mock_repository_search(query)),
+                               {"X-RateLimit-Remaining": "1000",
+                                "X-RateLimit-Reset": str(int(time.time()) + 60)})
+                    return
+
+                page = server.site.pages.get(parsed.path)
+                if page is None:
+                    self._send(404, "text/html", "<html><body>Not found</body></html>")
+                    return
+                server._count("page_requests")
+                self._send(200, "text/html; charset=utf-8", page)
+
+            def _send(self, status: int, content_type: str, body: str, headers: Optional[Dict[str, str]] = None):
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return FixtureHandler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+def mock_repository_search(query: str) -> Dict[str, Any]:
+    """Deterministic stand-in for a GitHub /search/repositories response"""
+
+    slug = query.replace(" ", "-")
+    return {
+        "total_count": 5,
+        "items": [
+            {
+                "full_name": f"mock/{slug}-{i}",
+                "html_url": f"https://github.com/mock/{slug}-{i}",
+                "description": f"Mock repository for {query}",
+                "stargazers_count": 1000 // (i + 1),
+                "language": "Python",
+                "topics": []
+            }
+            for i in range(5)
+        ]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an offline fixture site for the research crawlers")
+    parser.add_argument("--corpus", help="Recorded site JSON to serve instead of generating one")
+    parser.add_argument("--record", help="Write the generated site to this JSON file")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--page-bytes", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.corpus:
+        site = FixtureSite.load(args.corpus)
+    else:
+        site = FixtureSite.generate(
+            topic_words=["vertical", "slice", "atomic", "hybrid", "modular", "monolith", "microservices"],
+            topic_phrases=["vertical slice architecture", "atomic components", "hybrid deployment",
+                           "modular monolith case study", "feature slice", "lessons learned"],
+            pages=args.pages, fan_out=args.fan_out, page_bytes=args.page_bytes, seed=args.seed
+        )
+    if args.record:
+        site.save(args.record)
+        print(f"📼 Recorded fixture site to {args.record}")
+
+    server = FixtureServer(site, latency=args.latency, port=args.port)
+    print(f"🌐 Serving {len(site.paths)} fixture pages at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate page detection for deep crawls
+Canonicalizes URLs and SimHash-fingerprints page text so mirrored pages are analyzed once
+"""
+
+import hashlib
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "source"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WORD_PATTERN = re.compile(r"\w+")
+
+FINGERPRINT_BITS = 64
+BAND_BITS = 16  # 4 bands of 16 bits: any pair within 3 bits shares at least one band
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of one page compare equal"""
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    path = re.sub(r"/index\.(html?|php)$", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+
+    # Scheme is dropped from the key so http/https mirrors collapse too
+    return urlunsplit(("", host, path, query, "")).lstrip("/")
+
+
+def page_text(html: str) -> str:
+    """Strip markup so fingerprints depend on visible text only"""
+    return TAG_PATTERN.sub(" ", html or "").lower()
+
+
+def simhash(text: str, shingle_size: int = 3) -> Optional[int]:
+    """64-bit SimHash over word shingles; None when the page has no text to compare"""
+
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        return None
+
+    shingles = (
+        " ".join(words[i:i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    )
+
+    weights = [0] * FINGERPRINT_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class DedupIndex:
+    """Index of seen canonical URLs and content fingerprints
+
+    Fingerprints are split into bands so a lookup only compares pages sharing a band
+    instead of every page seen so far.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.canonical_urls: Dict[str, str] = {}
+        self.bands: List[Dict[int, List[Tuple[int, str]]]] = [
+            {} for _ in range(FINGERPRINT_BITS // BAND_BITS)
+        ]
+
+    def _band_keys(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        mask = (1 << BAND_BITS) - 1
+        for band in range(len(self.bands)):
+            yield band, fingerprint >> (band * BAND_BITS) & mask
+
+    def find_url(self, canonical_url: str) -> Optional[str]:
+        """Return the first URL seen with this canonical form"""
+        return self.canonical_urls.get(canonical_url)
+
+    def find_near_duplicate(self, fingerprint: Optional[int]) -> Optional[str]:
+        """Return the URL of an indexed page within max_distance bits of the fingerprint"""
+
+        if fingerprint is None:
+            return None
+        for band, key in self._band_keys(fingerprint):
+            for candidate, url in self.bands[band].get(key, ()):
+                if bin(candidate ^ fingerprint).count("1") <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, canonical_url: str, url: str, fingerprint: Optional[int]):
+        """Index a page that was kept for analysis"""
+
+        self.canonical_urls.setdefault(canonical_url, url)
+        if fingerprint is not None:
+            for band, key in self._band_keys(fingerprint):
+                self.bands[band].setdefault(key, []).append((fingerprint, url))
+
+    def check(self, url: str, html: Optional[str]) -> Tuple[str, Optional[int], Optional[str], Optional[str]]:
+        """Classify a crawled page before analysis
+
+        Returns (canonical_url, fingerprint, duplicate_of, reason) where reason is
+        'url' or 'content' for duplicates and None for new pages.
+        """
+
+        canonical_url = canonicalize_url(url)
+        duplicate_of = self.find_url(canonical_url)
+        if duplicate_of is not None:
+            return canonical_url, None, duplicate_of, "url"
+
+        fingerprint = simhash(page_text(html)) if html else None
+        duplicate_of = self.find_near_duplicate(fingerprint)
+        if duplicate_of is not None:
+            return canonical_url, fingerprint, duplicate_of, "content"
+
+        return canonical_url, fingerprint, None, None
+
+    def load(self, records: Iterable[Dict[str, Any]]):
+        """Rebuild the index from checkpoint records when resuming a crawl"""
+
+        for record in records:
+            if record.get("kind") == "page" and record.get("canonical_url"):
+                self.add(record["canonical_url"], record["url"], record.get("fingerprint"))
+
+
+def summarize_duplicates(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Count deduplicated pages in checkpoint records and group them under their original"""
+
+    summary = {
+        "pages_deduplicated": 0,
+        "url_duplicates": 0,
+        "content_duplicates": 0,
+        "collapsed_pages": {}
+    }
+    for record in records:
+        if record.get("kind") != "duplicate":
+            continue
+        summary["pages_deduplicated"] += 1
+        summary[f"{record['reason']}_duplicates"] += 1
+        summary["collapsed_pages"].setdefault(record["duplicate_of"], []).append(record["url"])
+    return summary
@@ -6,16 +6,79 @@ Searches for existing tools, repos, and implementations that solve each identifi
 
 import asyncio
 import json
+import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional
 import logging
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+import httpx
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GITHUB_API_URL = "https://api.github.com"
+
+def retry_after_seconds(value: str) -> Optional[float]:
+    """Seconds to wait from a Retry-After value, given as delay-seconds or an HTTP-date; None if unparseable"""
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucketRateLimiter:
+    """Token bucket that also honours GitHub's X-RateLimit-* and Retry-After headers"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate  # tokens added per second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0  # monotonic time before which no request may start
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until a request may be sent and take a token for it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update_from_headers(self, headers: httpx.Headers):
+        """Shrink the budget to what the server says is left, pausing until reset when exhausted"""
+        now = time.monotonic()
+        retry_after = retry_after_seconds(headers.get("retry-after", ""))
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        self.tokens = min(self.tokens, float(remaining))
+        reset = headers.get("x-ratelimit-reset")
+        if int(remaining) == 0 and reset is not None:
+            # Reset is a wall-clock epoch; translate it onto the monotonic clock
+            self.blocked_until = max(self.blocked_until, now + max(0.0, float(reset) - time.time()))
+
 class PainPointSolutionsResearcher:
-    def __init__(self):
+    def __init__(self, api_base_url: str = GITHUB_API_URL, rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 max_concurrency: int = 5):
         # Pain points with targeted search strategies
         self.pain_points = {
             "guilt_inducing_design": {
@@ -150,49 +213,75 @@ class PainPointSolutionsResearcher:
             }
         }
         
-        self.browser_config = BrowserConfig(
-            headless=True,
-            viewport={"width": 1920, "height": 1080}
+        self.api_base_url = api_base_url.rstrip("/")
+        # Unauthenticated search is limited to 10 requests/minute, authenticated to 30
+        self.github_token = os.environ.get("GITHUB_TOKEN")
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(
+            rate=(30 if self.github_token else 10) / 60,
+            capacity=5
         )
+        self.max_concurrency = max_concurrency
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self):
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.github_token:
+            headers["Authorization"] = f"Bearer {self.github_token}"
+        # One pooled client is shared by every search instead of a browser per request
+        self.client = httpx.AsyncClient(
+            base_url=self.api_base_url,
+            headers=headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=self.max_concurrency)
+        )
+        self._search_slots = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+        self.client = None
 
     async def search_github_repos(self, search_term: str) -> List[Dict[str, Any]]:
         """Search GitHub for repositories matching the search term"""
-        # Use GitHub API search endpoint instead of web scraping
-        api_search_url = f"https://api.github.com/search/repositories?q={search_term.replace(' ', '+')}&sort=stars&order=desc&per_page=5"
+        if self.client is None:
+            raise RuntimeError("Use PainPointSolutionsResearcher as 'async with researcher:' before searching")
+        params = {"q": search_term, "sort": "stars", "order": "desc", "per_page": 5}
         
-        async with AsyncWebCrawler(config=self.browser_config) as crawler:
-            run_config = CrawlerRunConfig(
-                cache_mode=CacheMode.BYPASS,
-                delay_before_return_html=1.0
-            )
-            
-            try:
-                result = await crawler.arun(
-                    url=api_search_url,
-                    config=run_config
-                )
+        async with self._search_slots:
+            for attempt in range(3):
+                await self.rate_limiter.acquire()
+                try:
+                    response = await self.client.get("/search/repositories", params=params)
+                except httpx.RequestError as e:
+                    logger.error(f"Error searching GitHub: {str(e)}")
+                    return []
                 
-                if result.success:
-                    # Parse JSON response
-                    import json
-                    data = json.loads(result.cleaned_html or result.raw_html)
-                    
-                    repos = []
-                    for item in data.get("items", [])[:5]:
-                        repo_info = {
-                            "name": item.get("full_name", ""),
-                            "url": item.get("html_url", ""),
-                            "description": item.get("description", ""),
-                            "stars": item.get("stargazers_count", 0),
-                            "language": item.get("language", ""),
-                            "topics": item.get("topics", []),
-                            "search_term": search_term
-                        }
-                        repos.append(repo_info)
-                    
-                    return repos
-            except Exception as e:
-                logger.error(f"Error searching GitHub: {str(e)}")
+                self.rate_limiter.update_from_headers(response.headers)
+                # Secondary rate limits come back as 403/429; the limiter now holds until reset
+                if response.status_code in (403, 429) and attempt < 2:
+                    logger.warning(f"Rate limited searching '{search_term}', retrying")
+                    continue
+                
+                if response.status_code != 200:
+                    logger.error(f"Error searching GitHub: HTTP {response.status_code} for '{search_term}'")
+                    return []
+                
+                data = response.json()
+                
+                repos = []
+                for item in data.get("items", [])[:5]:
+                    repo_info = {
+                        "name": item.get("full_name", ""),
+                        "url": item.get("html_url", ""),
+                        "description": item.get("description", ""),
+                        "stars": item.get("stargazers_count", 0),
+                        "language": item.get("language", ""),
+                        "topics": item.get("topics", []),
+                        "search_term": search_term
+                    }
+                    repos.append(repo_info)
+                
+                return repos
             
             return []
 
@@ -223,11 +312,13 @@ class PainPointSolutionsResearcher:
             "recommended_solutions": []
         }
         
-        # Search GitHub repositories
-        for search_term in pain_point_data["search_terms"][:2]:  # Limit searches
-            repos = await self.search_github_repos(search_term)
+        # Search GitHub repositories concurrently; the shared rate limiter paces requests
+        searches = await asyncio.gather(*(
+            self.search_github_repos(search_term)
+            for search_term in pain_point_data["search_terms"][:2]  # Limit searches
+        ))
+        for repos in searches:
             results["github_repos"].extend(repos)
-            await asyncio.sleep(1)  # Rate limiting
         
         # Search for design patterns
         patterns = await self.search_design_patterns(
@@ -278,27 +369,38 @@ class PainPointSolutionsResearcher:
             }
         }
         
-        # Research each pain point
-        for pain_point_key, pain_point_data in self.pain_points.items():
+        async def research_and_save(pain_point_key: str, pain_point_data: Dict[str, Any]):
             try:
                 results = await self.research_pain_point(pain_point_key, pain_point_data)
-                all_results["pain_point_solutions"][pain_point_key] = results
-                
-                # Update summary
-                all_results["summary"]["total_repos_found"] += len(results["github_repos"])
-                all_results["summary"]["total_patterns_found"] += len(results["design_patterns"])
-                all_results["summary"]["high_quality_solutions"] += len(results["recommended_solutions"])
                 
                 # Save intermediate results
                 with open(f"pain_point_{pain_point_key}_research.json", "w") as f:
                     json.dump(results, f, indent=2)
                 
                 logger.info(f"Completed research for: {pain_point_key}")
-                await asyncio.sleep(2)  # Rate limiting between pain points
+                return results
                 
             except Exception as e:
                 logger.error(f"Error researching {pain_point_key}: {str(e)}")
+                return None
+        
+        # Research every pain point concurrently within the shared rate-limit budget
+        started = time.perf_counter()
+        async with self:
+            researched = await asyncio.gather(*(
+                research_and_save(key, data) for key, data in self.pain_points.items()
+            ))
+        all_results["summary"]["runtime_seconds"] = round(time.perf_counter() - started, 3)
+        
+        for pain_point_key, results in zip(self.pain_points, researched):
+            if results is None:
                 continue
+            all_results["pain_point_solutions"][pain_point_key] = results
+            
+            # Update summary
+            all_results["summary"]["total_repos_found"] += len(results["github_repos"])
+            all_results["summary"]["total_patterns_found"] += len(results["design_patterns"])
+            all_results["summary"]["high_quality_solutions"] += len(results["recommended_solutions"])
         
         # Save complete results
         with open("pain_points_solutions_research.json", "w") as f:
@@ -355,6 +457,7 @@ async def main():
     print(f"Total repositories found: {results['summary']['total_repos_found']}")
     print(f"Total design patterns found: {results['summary']['total_patterns_found']}")
     print(f"High quality solutions identified: {results['summary']['high_quality_solutions']}")
+    print(f"End-to-end runtime: {results['summary']['runtime_seconds']}s")
     print("\nResults saved to:")
     print("- Individual pain points: pain_point_*_research.json")
     print("- Complete results: pain_points_solutions_research.json")
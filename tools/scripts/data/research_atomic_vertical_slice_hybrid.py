@@ -4,74 +4,34 @@ Deep crawl research for "Atomic Vertical Slice Hybrid Architecture" theory
 Using Crawl4AI to systematically analyze architectural patterns
 """
 
+import argparse
 import asyncio
-import json
-from pathlib import Path
-from datetime import datetime
 
-# Import Crawl4AI components based on official documentation
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
-from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
-from crawl4ai.deep_crawling.filters import FilterChain, URLPatternFilter, ContentTypeFilter
-from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
-from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl_engine import FETCHERS, STUDIES_FILE, StudyCrawler, load_studies
+from crawl_strategy import CRAWL_STRATEGIES
+
+# Research terms, indicators and report rules live in research_studies.json under this name
+STUDY = "atomic_vertical_slice"
 
 class AtomicVerticalSliceResearcher:
     """Research tool for Atomic Vertical Slice Hybrid Architecture theory"""
     
-    def __init__(self):
-        self.research_terms = [
-            "atomic vertical slice hybrid architecture",
-            "atomic architecture patterns",
-            "vertical slice architecture", 
-            "hybrid architecture",
-            "atomic components",
-            "vertical slicing",
-            "hybrid deployment"
-        ]
+    def __init__(self, checkpoint_file="atomic_vertical_slice_research.checkpoint.jsonl", resume=False,
+                 crawl_strategy="bfs", min_relevance=0.0, fetcher="browser", studies_file=STUDIES_FILE):
+        self.study = load_studies(studies_file, [STUDY])[0]
+        self.research_terms = self.study.terms
         
         # Target URLs for architectural research
-        self.research_urls = [
-            "https://martinfowler.com",
-            "https://patterns.dev"
-        ]
+        self.research_urls = self.study.seeds
         
-        self.results = []
+        # The shared engine streams analyzed pages to a JSONL checkpoint and skips duplicate pages
+        self.engine = StudyCrawler([self.study], checkpoint_file, resume=resume, crawl_strategy=crawl_strategy,
+                                   min_relevance=min_relevance, fetcher=fetcher)
+        self.checkpoint = self.engine.checkpoint
 
     async def setup_deep_crawl_config(self):
         """Configure deep crawl strategy for architectural research"""
-        
-        # Create filter chain for architectural content
-        filter_chain = FilterChain([
-            # Focus on documentation and architectural content
-            URLPatternFilter(patterns=[
-                "*architecture*", "*pattern*", "*design*", "*guide*", 
-                "*docs*", "*documentation*", "*best-practices*"
-            ]),
-            
-            # Only HTML content
-            ContentTypeFilter(allowed_types=["text/html"])
-        ])
-        
-        # Create scorer for architecture-relevant content  
-        architecture_scorer = KeywordRelevanceScorer(
-            keywords=self.research_terms
-        )
-        
-        # Use BFSDeepCrawlStrategy for reliable crawling
-        deep_crawl_strategy = BFSDeepCrawlStrategy(
-            max_depth=2,
-            include_external=False,
-            max_pages=30,
-            filter_chain=filter_chain
-        )
-        
-        return CrawlerRunConfig(
-            deep_crawl_strategy=deep_crawl_strategy,
-            scraping_strategy=LXMLWebScrapingStrategy(),
-            verbose=True,
-            stream=False  # Get all results at once for analysis
-        )
+        return self.engine.crawl_config([self.study])
 
     async def research_atomic_vertical_slice_hybrid(self):
         """Execute deep crawl research for the architecture theory"""
@@ -79,172 +39,27 @@ class AtomicVerticalSliceResearcher:
         print("🔍 Starting Deep Crawl Research: Atomic Vertical Slice Hybrid Architecture")
         print("=" * 80)
         
-        config = await self.setup_deep_crawl_config()
-        
-        async with AsyncWebCrawler() as crawler:
-            for url in self.research_urls:
-                print(f"\n🚀 Deep crawling: {url}")
-                try:
-                    results = await crawler.arun(url, config=config)
-                    
-                    print(f"✅ Found {len(results)} pages")
-                    
-                    # Analyze results for architecture patterns
-                    for result in results:
-                        evidence = self.analyze_content_for_theory(result)
-                        if evidence:
-                            self.results.append({
-                                'url': result.url,
-                                'title': result.metadata.get('title', 'Unknown'),
-                                'depth': result.metadata.get('depth', 0),
-                                'evidence': evidence,
-                                'relevance_score': result.metadata.get('score', 0),
-                                'timestamp': datetime.now().isoformat()
-                            })
-                            
-                except Exception as e:
-                    print(f"❌ Error crawling {url}: {str(e)}")
-                    
+        self.study.seeds = self.research_urls
+        await self.engine.crawl()
         return self.compile_research_findings()
 
     def analyze_content_for_theory(self, crawl_result):
         """Analyze crawled content for evidence of Atomic Vertical Slice Hybrid Architecture"""
-        
-        content = crawl_result.cleaned_html.lower()
-        evidence = {}
-        
-        # Check for atomic patterns
-        atomic_indicators = [
-            "atomic", "independent components", "self-contained", 
-            "autonomous", "isolated units"
-        ]
-        
-        # Check for vertical slice patterns  
-        vertical_slice_indicators = [
-            "vertical slice", "feature slice", "cross-cutting", 
-            "end-to-end", "full stack feature"
-        ]
-        
-        # Check for hybrid patterns
-        hybrid_indicators = [
-            "hybrid", "mixed approach", "combined", "flexible deployment",
-            "adaptive architecture"
-        ]
-        
-        # Score evidence for each aspect
-        evidence['atomic_score'] = sum(1 for term in atomic_indicators if term in content)
-        evidence['vertical_slice_score'] = sum(1 for term in vertical_slice_indicators if term in content)  
-        evidence['hybrid_score'] = sum(1 for term in hybrid_indicators if term in content)
-        
-        # Extract relevant snippets
-        evidence['snippets'] = []
-        for term in self.research_terms:
-            if term in content:
-                # Find context around the term
-                start = max(0, content.find(term) - 100)
-                end = min(len(content), content.find(term) + 100)
-                snippet = content[start:end].strip()
-                evidence['snippets'].append({
-                    'term': term,
-                    'context': snippet
-                })
-        
-        # Only return evidence if significant matches found
-        total_score = evidence['atomic_score'] + evidence['vertical_slice_score'] + evidence['hybrid_score']
-        return evidence if total_score > 0 or evidence['snippets'] else None
+        return self.study.analyze(crawl_result.cleaned_html.lower())
 
     def compile_research_findings(self):
         """Compile and analyze all research findings"""
-        
-        findings = {
-            'theory': 'Atomic Vertical Slice Hybrid Architecture',
-            'research_timestamp': datetime.now().isoformat(),
-            'total_evidence_sources': len(self.results),
-            'evidence_summary': {
-                'atomic_patterns_found': 0,
-                'vertical_slice_patterns_found': 0, 
-                'hybrid_patterns_found': 0,
-                'supporting_sources': [],
-                'related_patterns': []
-            },
-            'feasibility_analysis': {},
-            'detailed_evidence': self.results
-        }
-        
-        # Analyze evidence
-        for result in self.results:
-            evidence = result['evidence']
-            
-            if evidence['atomic_score'] > 0:
-                findings['evidence_summary']['atomic_patterns_found'] += 1
-                
-            if evidence['vertical_slice_score'] > 0:
-                findings['evidence_summary']['vertical_slice_patterns_found'] += 1
-                
-            if evidence['hybrid_score'] > 0:
-                findings['evidence_summary']['hybrid_patterns_found'] += 1
-                
-            if any([evidence['atomic_score'], evidence['vertical_slice_score'], evidence['hybrid_score']]):
-                findings['evidence_summary']['supporting_sources'].append({
-                    'url': result['url'],
-                    'title': result['title'], 
-                    'total_score': sum([evidence['atomic_score'], evidence['vertical_slice_score'], evidence['hybrid_score']])
-                })
-        
-        # Determine theory feasibility
-        findings['feasibility_analysis'] = self.assess_theory_feasibility(findings)
-        
-        return findings
+        return self.engine.compile(self.study)
 
     def assess_theory_feasibility(self, findings):
         """Assess the feasibility of Atomic Vertical Slice Hybrid Architecture theory"""
-        
-        evidence_count = findings['total_evidence_sources']
-        atomic_support = findings['evidence_summary']['atomic_patterns_found']
-        vertical_support = findings['evidence_summary']['vertical_slice_patterns_found'] 
-        hybrid_support = findings['evidence_summary']['hybrid_patterns_found']
-        
-        assessment = {
-            'overall_feasibility': 'Unknown',
-            'confidence_level': 'Low',
-            'supporting_evidence_strength': 'Insufficient',
-            'architectural_soundness': 'Needs Analysis',
-            'implementation_practicality': 'Unclear',
-            'recommendations': []
-        }
-        
-        # Analyze evidence strength
-        if evidence_count >= 10:
-            if atomic_support >= 3 and vertical_support >= 3 and hybrid_support >= 2:
-                assessment['overall_feasibility'] = 'Highly Feasible'
-                assessment['confidence_level'] = 'High'
-                assessment['supporting_evidence_strength'] = 'Strong'
-            elif atomic_support >= 2 and vertical_support >= 2:
-                assessment['overall_feasibility'] = 'Feasible with Modifications'
-                assessment['confidence_level'] = 'Medium'
-                assessment['supporting_evidence_strength'] = 'Moderate'
-        
-        # Generate recommendations
-        if atomic_support > 0:
-            assessment['recommendations'].append("Atomic component patterns show promise - investigate further")
-            
-        if vertical_support > 0:
-            assessment['recommendations'].append("Vertical slice architecture has established precedents")
-            
-        if hybrid_support > 0:
-            assessment['recommendations'].append("Hybrid approaches are documented in industry")
-        else:
-            assessment['recommendations'].append("Hybrid aspect needs more research - may be novel contribution")
-            
-        return assessment
+        return self.study.assess(findings)
 
     async def save_research_results(self, findings, output_file="atomic_vertical_slice_research.json"):
-        """Save research findings to file"""
-        
-        output_path = Path(output_file)
+        """Save research findings to file, streaming detailed evidence from the checkpoint"""
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(findings, f, indent=2, ensure_ascii=False)
+        output_path = self.engine.save_report(self.study, findings, output_file)
+        self.engine.close()
             
         print(f"\n📊 Research results saved to: {output_path}")
         return output_path
@@ -252,7 +67,26 @@ class AtomicVerticalSliceResearcher:
 async def main():
     """Execute the deep crawl research"""
     
-    researcher = AtomicVerticalSliceResearcher()
+    parser = argparse.ArgumentParser(description="Atomic Vertical Slice Hybrid Architecture deep crawl")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip pages and seeds already recorded in the checkpoint")
+    parser.add_argument("--checkpoint", default="atomic_vertical_slice_research.checkpoint.jsonl",
+                        help="JSONL file that analyzed pages are appended to")
+    parser.add_argument("--strategy", choices=CRAWL_STRATEGIES, default="bfs",
+                        help="bfs crawls breadth-first; best-first follows the keyword relevance scorer")
+    parser.add_argument("--min-relevance", type=float, default=0.0,
+                        help="Stop a best-first seed once recent pages average below this score (0 disables)")
+    parser.add_argument("--fetcher", choices=FETCHERS, default="browser",
+                        help="browser renders pages in headless Chromium; http fetches raw HTML")
+    args = parser.parse_args()
+    
+    researcher = AtomicVerticalSliceResearcher(
+        checkpoint_file=args.checkpoint,
+        resume=args.resume,
+        crawl_strategy=args.strategy,
+        min_relevance=args.min_relevance,
+        fetcher=args.fetcher
+    )
     
     print("🎯 Theory: Atomic Vertical Slice Hybrid Architecture")
     print("📝 Research Method: Deep Crawl Analysis using Crawl4AI")
@@ -269,6 +103,7 @@ async def main():
     print("🔍 RESEARCH SUMMARY")
     print("=" * 80)
     print(f"📊 Evidence Sources Found: {findings['total_evidence_sources']}")
+    print(f"🧹 Duplicate Pages Skipped: {findings['deduplication']['pages_deduplicated']}")
     print(f"⚛️  Atomic Pattern Evidence: {findings['evidence_summary']['atomic_patterns_found']}")
     print(f"📏 Vertical Slice Evidence: {findings['evidence_summary']['vertical_slice_patterns_found']}")
     print(f"🔀 Hybrid Pattern Evidence: {findings['evidence_summary']['hybrid_patterns_found']}")
@@ -283,4 +118,4 @@ async def main():
     print(f"\n📄 Full results: {output_file}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -4,115 +4,36 @@ Targeted Deep Crawl for Atomic Vertical Slice Hybrid Architecture Research Gaps
 Focuses on missing patterns: vertical slicing, implementation details, tooling, case studies
 """
 
+import argparse
 import asyncio
-import json
-from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Any
 
-# Import Crawl4AI components
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
-from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
-from crawl4ai.deep_crawling.filters import FilterChain, URLPatternFilter, ContentTypeFilter
-from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
-from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl_engine import FETCHERS, STUDIES_FILE, StudyCrawler, load_studies
+from crawl_strategy import CRAWL_STRATEGIES
+
+# Gap terms, indicators and report rules live in research_studies.json under this name
+STUDY = "architecture_gaps"
 
 class ArchitectureGapResearcher:
     """Fill specific research gaps identified in initial analysis"""
     
-    def __init__(self):
-        # Target the specific gaps identified
-        self.gap_focus_terms = [
-            # Vertical Slice Research (Gap #1)
-            "vertical slice architecture",
-            "feature slice architecture", 
-            "domain driven design vertical",
-            "feature based architecture",
-            "slice based deployment",
-            "vertical decomposition",
-            
-            # Implementation Patterns (Gap #2)
-            "atomic component implementation",
-            "self contained systems",
-            "autonomous services implementation",
-            "hybrid deployment patterns",
-            "modular monolith to microservices",
-            "architecture transition patterns",
-            
-            # Tooling Support (Gap #3)
-            "vertical slice tooling",
-            "atomic component tools",
-            "hybrid architecture tools",
-            "architecture migration tools",
-            "modular deployment tools",
-            
-            # Case Studies (Gap #4)
-            "architecture case study",
-            "modular monolith case study",
-            "microservices transition",
-            "hybrid architecture example",
-            "vertical slice example"
-        ]
+    def __init__(self, checkpoint_file="architecture_gaps_research.checkpoint.jsonl", resume=False,
+                 crawl_strategy="bfs", min_relevance=0.0, fetcher="browser", studies_file=STUDIES_FILE):
+        # Target the specific gaps identified: vertical slicing, implementation, tooling, case studies
+        self.study = load_studies(studies_file, [STUDY])[0]
+        self.gap_focus_terms = self.study.terms
         
         # Target URLs for gap-specific research
-        self.gap_research_urls = [
-            # DDD and Vertical Slicing
-            "https://martinfowler.com",
-            "https://www.dddcommunity.org",
-            
-            # Implementation and Patterns
-            "https://microservices.io",
-            "https://patterns.dev",
-            
-            # Case Studies and Examples
-            "https://netflix.com/techblog",
-            "https://engineering.grab.com",
-            "https://blog.twitter.com/engineering",
-            "https://engineering.linkedin.com",
-            
-            # Architecture Communities
-            "https://www.infoq.com",
-            "https://highscalability.com"
-        ]
+        self.gap_research_urls = self.study.seeds
         
-        self.results = []
+        # The shared engine streams analyzed pages to a JSONL checkpoint and skips duplicate pages
+        self.engine = StudyCrawler([self.study], checkpoint_file, resume=resume, crawl_strategy=crawl_strategy,
+                                   min_relevance=min_relevance, fetcher=fetcher)
+        self.checkpoint = self.engine.checkpoint
 
     async def setup_gap_focused_crawl_config(self):
         """Configure deep crawl strategy targeting research gaps"""
-        
-        # Create filter chain for gap-specific content
-        filter_chain = FilterChain([
-            # Focus on architecture, case studies, implementation
-            URLPatternFilter(patterns=[
-                "*architecture*", "*pattern*", "*design*", "*case-study*",
-                "*implementation*", "*migration*", "*transition*", "*example*",
-                "*ddd*", "*domain-driven*", "*vertical*", "*slice*", "*hybrid*",
-                "*modular*", "*monolith*", "*microservices*", "*tooling*"
-            ]),
-            
-            # Only HTML content
-            ContentTypeFilter(allowed_types=["text/html"])
-        ])
-        
-        # Create scorer for gap-specific content  
-        gap_scorer = KeywordRelevanceScorer(
-            keywords=self.gap_focus_terms
-        )
-        
-        # Use deeper crawling for comprehensive gap research
-        deep_crawl_strategy = BFSDeepCrawlStrategy(
-            max_depth=3,  # Deeper for more comprehensive research
-            include_external=False,
-            max_pages=50,  # More pages for thorough coverage
-            filter_chain=filter_chain
-        )
-        
-        return CrawlerRunConfig(
-            deep_crawl_strategy=deep_crawl_strategy,
-            scraping_strategy=LXMLWebScrapingStrategy(),
-            verbose=True,
-            stream=False
-        )
+        return self.engine.crawl_config([self.study])
 
     async def research_architecture_gaps(self):
         """Execute targeted deep crawl for identified research gaps"""
@@ -126,239 +47,27 @@ class ArchitectureGapResearcher:
         print("   4. Hybrid deployment strategies")
         print("=" * 80)
         
-        config = await self.setup_gap_focused_crawl_config()
-        
-        async with AsyncWebCrawler() as crawler:
-            for url in self.gap_research_urls:
-                print(f"\n🚀 Deep crawling for gaps: {url}")
-                try:
-                    results = await crawler.arun(url, config=config)
-                    
-                    print(f"✅ Found {len(results)} pages")
-                    
-                    # Analyze results for gap-specific evidence
-                    for result in results:
-                        gap_evidence = self.analyze_content_for_gaps(result)
-                        if gap_evidence:
-                            self.results.append({
-                                'url': result.url,
-                                'title': result.metadata.get('title', 'Unknown'),
-                                'depth': result.metadata.get('depth', 0),
-                                'gap_evidence': gap_evidence,
-                                'relevance_score': result.metadata.get('score', 0),
-                                'timestamp': datetime.now().isoformat()
-                            })
-                            
-                except Exception as e:
-                    print(f"❌ Error crawling {url}: {str(e)}")
-                    
+        self.study.seeds = self.gap_research_urls
+        await self.engine.crawl()
         return self.compile_gap_research_findings()
 
     def analyze_content_for_gaps(self, crawl_result) -> Dict[str, Any]:
         """Analyze content specifically for research gap areas"""
-        
-        content = crawl_result.cleaned_html.lower()
-        gap_evidence = {}
-        
-        # Gap 1: Vertical Slice Architecture Evidence
-        vertical_slice_indicators = [
-            "vertical slice", "feature slice", "domain slice", "feature based",
-            "slice architecture", "vertical decomposition", "feature oriented",
-            "domain driven vertical", "slice by feature", "vertical organization"
-        ]
-        
-        # Gap 2: Implementation Pattern Evidence  
-        implementation_indicators = [
-            "implementation pattern", "code example", "how to implement",
-            "step by step", "practical guide", "tutorial", "walkthrough",
-            "architecture implementation", "migration steps", "transition guide"
-        ]
-        
-        # Gap 3: Tooling Evidence
-        tooling_indicators = [
-            "tools", "framework", "library", "platform", "cli", "automation",
-            "deployment tool", "architecture tool", "migration tool", "generator"
-        ]
-        
-        # Gap 4: Case Study Evidence
-        case_study_indicators = [
-            "case study", "real world", "production", "at scale", "lessons learned",
-            "experience report", "migration story", "transformation", "journey"
-        ]
-        
-        # Score evidence for each gap area
-        gap_evidence['vertical_slice_score'] = sum(1 for term in vertical_slice_indicators if term in content)
-        gap_evidence['implementation_score'] = sum(1 for term in implementation_indicators if term in content)
-        gap_evidence['tooling_score'] = sum(1 for term in tooling_indicators if term in content)
-        gap_evidence['case_study_score'] = sum(1 for term in case_study_indicators if term in content)
-        
-        # Extract relevant snippets for each gap
-        gap_evidence['gap_snippets'] = {}
-        
-        # Find vertical slice snippets
-        gap_evidence['gap_snippets']['vertical_slice'] = []
-        for term in vertical_slice_indicators:
-            if term in content:
-                start = max(0, content.find(term) - 150)
-                end = min(len(content), content.find(term) + 150)
-                snippet = content[start:end].strip()
-                gap_evidence['gap_snippets']['vertical_slice'].append({
-                    'term': term,
-                    'context': snippet
-                })
-        
-        # Find implementation snippets
-        gap_evidence['gap_snippets']['implementation'] = []
-        for term in implementation_indicators:
-            if term in content:
-                start = max(0, content.find(term) - 150)
-                end = min(len(content), content.find(term) + 150)
-                snippet = content[start:end].strip()
-                gap_evidence['gap_snippets']['implementation'].append({
-                    'term': term,
-                    'context': snippet
-                })
-        
-        # Calculate total relevance for gap research
-        total_gap_score = (gap_evidence['vertical_slice_score'] + 
-                          gap_evidence['implementation_score'] + 
-                          gap_evidence['tooling_score'] + 
-                          gap_evidence['case_study_score'])
-        
-        # Only return evidence if significant gap-relevant matches found
-        return gap_evidence if total_gap_score > 0 or any(gap_evidence['gap_snippets'].values()) else None
+        return self.study.analyze(crawl_result.cleaned_html.lower())
 
     def compile_gap_research_findings(self):
         """Compile and analyze gap-focused research findings"""
-        
-        findings = {
-            'research_focus': 'Atomic Vertical Slice Hybrid Architecture - Gap Analysis',
-            'research_timestamp': datetime.now().isoformat(),
-            'total_evidence_sources': len(self.results),
-            'gap_analysis': {
-                'vertical_slice_evidence': 0,
-                'implementation_evidence': 0,
-                'tooling_evidence': 0,
-                'case_study_evidence': 0,
-                'gap_filling_sources': [],
-                'implementation_patterns': [],
-                'tooling_discoveries': [],
-                'case_studies_found': []
-            },
-            'gap_assessment': {},
-            'detailed_gap_evidence': self.results
-        }
-        
-        # Analyze gap-specific evidence
-        for result in self.results:
-            evidence = result['gap_evidence']
-            
-            if evidence['vertical_slice_score'] > 0:
-                findings['gap_analysis']['vertical_slice_evidence'] += 1
-                
-            if evidence['implementation_score'] > 0:
-                findings['gap_analysis']['implementation_evidence'] += 1
-                
-            if evidence['tooling_score'] > 0:
-                findings['gap_analysis']['tooling_evidence'] += 1
-                
-            if evidence['case_study_score'] > 0:
-                findings['gap_analysis']['case_study_evidence'] += 1
-                
-            # Collect high-value sources
-            total_score = sum([
-                evidence['vertical_slice_score'],
-                evidence['implementation_score'], 
-                evidence['tooling_score'],
-                evidence['case_study_score']
-            ])
-            
-            if total_score >= 2:  # High relevance threshold
-                findings['gap_analysis']['gap_filling_sources'].append({
-                    'url': result['url'],
-                    'title': result['title'],
-                    'gap_scores': {
-                        'vertical_slice': evidence['vertical_slice_score'],
-                        'implementation': evidence['implementation_score'],
-                        'tooling': evidence['tooling_score'],
-                        'case_study': evidence['case_study_score']
-                    },
-                    'total_gap_relevance': total_score
-                })
-        
-        # Assess gap filling success
-        findings['gap_assessment'] = self.assess_gap_filling_success(findings)
-        
-        return findings
+        return self.engine.compile(self.study)
 
     def assess_gap_filling_success(self, findings):
         """Assess how well the research filled identified gaps"""
-        
-        gap_counts = findings['gap_analysis']
-        
-        assessment = {
-            'overall_gap_resolution': 'Unknown',
-            'gap_resolution_confidence': 'Low',
-            'most_resolved_gap': 'None',
-            'least_resolved_gap': 'All gaps remain',
-            'recommendations': []
-        }
-        
-        # Analyze gap resolution
-        gap_scores = {
-            'vertical_slice': gap_counts['vertical_slice_evidence'],
-            'implementation': gap_counts['implementation_evidence'],
-            'tooling': gap_counts['tooling_evidence'],
-            'case_study': gap_counts['case_study_evidence']
-        }
-        
-        # Determine best and worst resolved gaps
-        if max(gap_scores.values()) > 0:
-            assessment['most_resolved_gap'] = max(gap_scores, key=gap_scores.get)
-            assessment['least_resolved_gap'] = min(gap_scores, key=gap_scores.get)
-            
-            # Overall assessment based on evidence strength
-            total_evidence = sum(gap_scores.values())
-            if total_evidence >= 15:
-                assessment['overall_gap_resolution'] = 'Significantly Resolved'
-                assessment['gap_resolution_confidence'] = 'High'
-            elif total_evidence >= 8:
-                assessment['overall_gap_resolution'] = 'Partially Resolved'
-                assessment['gap_resolution_confidence'] = 'Medium'
-            elif total_evidence >= 3:
-                assessment['overall_gap_resolution'] = 'Minimally Resolved'
-                assessment['gap_resolution_confidence'] = 'Low'
-        
-        # Generate specific recommendations based on findings
-        if gap_scores['vertical_slice'] >= 3:
-            assessment['recommendations'].append("Strong vertical slice evidence found - proceed with pattern definition")
-        else:
-            assessment['recommendations'].append("Limited vertical slice evidence - consider original research contribution")
-            
-        if gap_scores['implementation'] >= 3:
-            assessment['recommendations'].append("Implementation patterns identified - create practical guide")
-        else:
-            assessment['recommendations'].append("Implementation gap remains - develop proof-of-concept")
-            
-        if gap_scores['tooling'] >= 2:
-            assessment['recommendations'].append("Tooling support found - evaluate existing solutions")
-        else:
-            assessment['recommendations'].append("Tooling gap identified - potential tool development opportunity")
-            
-        if gap_scores['case_study'] >= 2:
-            assessment['recommendations'].append("Real-world examples found - analyze for pattern validation")
-        else:
-            assessment['recommendations'].append("Case study gap - create exemplar implementation")
-            
-        return assessment
+        return self.study.assess(findings)
 
     async def save_gap_research_results(self, findings, output_file="architecture_gaps_research.json"):
-        """Save gap-focused research findings"""
+        """Save gap-focused research findings, streaming detailed evidence from the checkpoint"""
         
-        output_path = Path(output_file)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(findings, f, indent=2, ensure_ascii=False)
+        output_path = self.engine.save_report(self.study, findings, output_file)
+        self.engine.close()
             
         print(f"\n📊 Gap research results saved to: {output_path}")
         return output_path
@@ -366,7 +75,26 @@ class ArchitectureGapResearcher:
 async def main():
     """Execute the gap-focused deep crawl research"""
     
-    researcher = ArchitectureGapResearcher()
+    parser = argparse.ArgumentParser(description="Gap-focused deep crawl research")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip pages and seeds already recorded in the checkpoint")
+    parser.add_argument("--checkpoint", default="architecture_gaps_research.checkpoint.jsonl",
+                        help="JSONL file that analyzed pages are appended to")
+    parser.add_argument("--strategy", choices=CRAWL_STRATEGIES, default="bfs",
+                        help="bfs crawls breadth-first; best-first follows the keyword relevance scorer")
+    parser.add_argument("--min-relevance", type=float, default=0.0,
+                        help="Stop a best-first seed once recent pages average below this score (0 disables)")
+    parser.add_argument("--fetcher", choices=FETCHERS, default="browser",
+                        help="browser renders pages in headless Chromium; http fetches raw HTML")
+    args = parser.parse_args()
+    
+    researcher = ArchitectureGapResearcher(
+        checkpoint_file=args.checkpoint,
+        resume=args.resume,
+        crawl_strategy=args.strategy,
+        min_relevance=args.min_relevance,
+        fetcher=args.fetcher
+    )
     
     print("🎯 Research Focus: Atomic Vertical Slice Hybrid Architecture - Gap Analysis")
     print("📝 Research Method: Targeted Deep Crawl for Identified Gaps")
@@ -383,6 +111,7 @@ async def main():
     print("🔍 GAP RESEARCH SUMMARY")
     print("=" * 80)
     print(f"📊 Evidence Sources Found: {findings['total_evidence_sources']}")
+    print(f"🧹 Duplicate Pages Skipped: {findings['deduplication']['pages_deduplicated']}")
     print(f"🎯 Vertical Slice Evidence: {findings['gap_analysis']['vertical_slice_evidence']}")
     print(f"⚙️  Implementation Evidence: {findings['gap_analysis']['implementation_evidence']}")
     print(f"🔧 Tooling Evidence: {findings['gap_analysis']['tooling_evidence']}")
@@ -398,4 +127,4 @@ async def main():
     print(f"\n📄 Full gap analysis: {output_file}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Run several research studies over one shared deep crawl
+Studies are loaded from research_studies.json; each page is fetched once and every study writes its own report
+"""
+
+import argparse
+import asyncio
+
+from crawl_engine import FETCHERS, STUDIES_FILE, StudyCrawler, load_studies
+from crawl_frontier import FrontierCrawler
+from crawl_strategy import CRAWL_STRATEGIES
+
+async def main():
+    """Crawl the seeds of every selected study once and report each study"""
+
+    parser = argparse.ArgumentParser(description="Run config-driven research studies over one shared crawl")
+    parser.add_argument("--config", default=str(STUDIES_FILE), help="JSON file the studies are defined in")
+    parser.add_argument("--studies", nargs="+", help="Studies to run (default: every study in the config)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip pages and seeds already recorded in the checkpoint")
+    parser.add_argument("--checkpoint", default="research_studies.checkpoint.jsonl",
+                        help="JSONL file that analyzed pages of every study are appended to")
+    parser.add_argument("--strategy", choices=CRAWL_STRATEGIES, default="bfs",
+                        help="bfs crawls breadth-first; best-first follows the keyword relevance scorer")
+    parser.add_argument("--min-relevance", type=float, default=0.0,
+                        help="Stop a best-first seed once recent pages average below this score (0 disables)")
+    parser.add_argument("--fetcher", choices=FETCHERS, default="browser",
+                        help="browser renders pages in headless Chromium; http fetches raw HTML")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Crawl with this many worker processes sharing a SQLite frontier (0 crawls in-process)")
+    parser.add_argument("--frontier", default="research_studies.frontier.sqlite",
+                        help="SQLite frontier file for --workers; --resume continues the crawl stored in it")
+    parser.add_argument("--batch", type=int, default=4, help="URLs each worker fetches at a time")
+    parser.add_argument("--lease-seconds", type=float, default=60.0,
+                        help="How long a worker holds a URL before another worker may take it over")
+    args = parser.parse_args()
+
+    studies = load_studies(args.config, args.studies)
+    print(f"🔍 Studies: {', '.join(study.name for study in studies)}")
+    print(f"🌐 {len({seed for study in studies for seed in study.seeds})} distinct seeds")
+    print("=" * 80)
+
+    if args.workers:
+        # --min-relevance has no effect here: the frontier has no single page stream to cut off
+        engine = FrontierCrawler(studies, args.frontier, resume=args.resume, crawl_strategy=args.strategy,
+                                 fetcher=args.fetcher, workers=args.workers, batch=args.batch,
+                                 lease_seconds=args.lease_seconds)
+        studies = engine.studies
+        print(f"👷 {args.workers} workers sharing {args.frontier}")
+        exit_codes = engine.crawl()
+        if any(exit_codes):
+            print(f"⚠️  Worker exit codes: {exit_codes}; URLs left leased are crawled again with --resume")
+        print(f"📋 Frontier: {engine.frontier.counts()}")
+    else:
+        engine = StudyCrawler(studies, args.checkpoint, resume=args.resume, crawl_strategy=args.strategy,
+                              min_relevance=args.min_relevance, fetcher=args.fetcher)
+        await engine.crawl()
+
+    print("\n" + "=" * 80)
+    print("🔍 STUDY SUMMARY")
+    print("=" * 80)
+    for study in studies:
+        findings = engine.compile(study)
+        output_file = engine.save_report(study, findings)
+        summary = findings[study.report['summary_key']]
+        assessment = findings[study.report['assessment_key']]
+
+        print(f"\n🎯 {study.title}")
+        print(f"📊 Evidence Sources Found: {findings['total_evidence_sources']}")
+        for group in study.indicators:
+            print(f"   {group}: {summary[study.report['count_key'].format(group=group)]}")
+        headline = next(iter(assessment))
+        print(f"✅ {headline}: {assessment[headline]}")
+        print(f"📄 Full results: {output_file}")
+    engine.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())